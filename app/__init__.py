@@ -5,6 +5,8 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from app.utils.decorators import limiter
+from app.utils.rate_limit import configure_rate_limiting
+from app.utils.redis_client import init_redis
 from app.config import config
 from app.log_config import configure_logging
 
@@ -32,7 +34,9 @@ def create_app(config_name=None):
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    configure_rate_limiting(app)
     limiter.init_app(app)
+    init_redis(app)
 
     # Configure logging using shared log_config implementation
     configure_logging(app)
@@ -51,9 +55,39 @@ def create_app(config_name=None):
     # Register blueprints
     register_blueprints(app)
     
+    # Optional in-memory search node
+    from app.services.search_index import init_search_index
+    init_search_index(app)
+    
     # Register commands
-    from app.commands import init_badges
+    from app.commands import (
+        init_badges,
+        add_expertise_alias,
+        rebuild_connection_graph_command,
+        export_connection_graph_command,
+        prune_connection_tombstones_command,
+        reconcile_connection_counters_command,
+        compute_connection_suggestions_command,
+        refresh_connection_suggestions_command,
+        rebuild_leaderboards_command,
+        compact_points_command,
+        ingest_points_command,
+        gamification_worker_command,
+        backfill_users_command,
+    )
     app.cli.add_command(init_badges)
+    app.cli.add_command(add_expertise_alias)
+    app.cli.add_command(rebuild_connection_graph_command)
+    app.cli.add_command(export_connection_graph_command)
+    app.cli.add_command(prune_connection_tombstones_command)
+    app.cli.add_command(reconcile_connection_counters_command)
+    app.cli.add_command(compute_connection_suggestions_command)
+    app.cli.add_command(refresh_connection_suggestions_command)
+    app.cli.add_command(rebuild_leaderboards_command)
+    app.cli.add_command(compact_points_command)
+    app.cli.add_command(ingest_points_command)
+    app.cli.add_command(gamification_worker_command)
+    app.cli.add_command(backfill_users_command)
     
     # Create database tables if they don't exist
     try:
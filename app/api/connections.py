@@ -4,8 +4,14 @@ from app.services.connection_service import (
     get_connections,
     request_connection,
     update_connection_status,
-    delete_connection
+    delete_connection,
+    bulk_update_connections,
+    get_connection_distance,
+    get_connection_statuses,
+    get_connection_changes
 )
+from app.services.suggestion_service import get_suggestions
+from datetime import datetime, timezone
 from uuid import UUID
 from app.utils.responses import success_response, error_response
 
@@ -22,14 +28,25 @@ def get_connections_route(profile_id):
         # Get query parameters
         status = request.args.get('status', 'ACCEPTED')
         direction = request.args.get('direction', 'all')
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor')
+        include = {name.strip() for name in request.args.get('include', '').split(',')}
         
-        result = get_connections(profile_uuid, status, direction)
+        result = get_connections(
+            profile_uuid,
+            status,
+            direction,
+            limit=limit,
+            cursor=cursor,
+            include_profile='profile' in include
+        )
         
         if result["success"]:
             current_app.logger.info("Connections retrieved successfully")
             return success_response(result, 200)
         current_app.logger.error("Failed to get connections")
-        return error_response(result.get("message", "Not found"), 404)
+        message = result.get("message", "Not found")
+        return error_response(message, 404 if message == 'Profile not found' else 400)
     except ValueError:
         current_app.logger.error("Invalid profile ID")
         return error_response("Invalid profile ID", 400)
@@ -113,4 +130,163 @@ def delete_connection_route(profile_id, connection_id):
         return error_response("Invalid ID", 400)
     except Exception as e:
         current_app.logger.exception("Unhandled error in delete_connection_route")
-        return error_response(str(e), 500)
\ No newline at end of file
+        return error_response(str(e), 500)
+
+@connections_bp.route('/profiles/<profile_id>/connections/changes', methods=['GET'])
+@jwt_required()
+def get_connection_changes_route(profile_id):
+    """Get connection changes since a sync cursor"""
+    current_app.logger.info("Connection changes endpoint called")
+    try:
+        profile_uuid = UUID(profile_id)
+        
+        # Verify the user matches the profile ID
+        user_id = UUID(get_jwt_identity())
+        if user_id != profile_uuid:
+            current_app.logger.error("Unauthorized")
+            return error_response("Unauthorized", 403)
+        
+        result = get_connection_changes(
+            profile_uuid,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', type=int)
+        )
+        
+        if result["success"]:
+            return success_response(result, 200)
+        message = result.get("message", "Bad request")
+        if message == 'Profile not found':
+            return error_response(message, 404)
+        if message.startswith('Cursor expired'):
+            return error_response(message, 410)
+        return error_response(message, 400)
+    except ValueError:
+        return error_response("Invalid profile ID", 400)
+    except Exception as e:
+        current_app.logger.exception("Unhandled error in get_connection_changes_route")
+        return error_response(str(e), 500)
+
+@connections_bp.route('/profiles/<profile_id>/connections/status', methods=['POST'])
+@jwt_required()
+def get_connection_statuses_route(profile_id):
+    """Get the caller's connection status with each of many profiles"""
+    current_app.logger.info("Connection status endpoint called")
+    try:
+        profile_uuid = UUID(profile_id)
+        
+        # Verify the user matches the profile ID
+        user_id = UUID(get_jwt_identity())
+        if user_id != profile_uuid:
+            current_app.logger.error("Unauthorized")
+            return error_response("Unauthorized", 403)
+        
+        data = request.get_json(silent=True) or {}
+        profile_ids = data.get('profile_ids')
+        if not isinstance(profile_ids, list):
+            return error_response("profile_ids must be a list", 400)
+        
+        result = get_connection_statuses(profile_uuid, profile_ids)
+        
+        if result["success"]:
+            return success_response(result, 200)
+        message = result.get("message", "Bad request")
+        return error_response(message, 404 if message == 'Profile not found' else 400)
+    except ValueError:
+        return error_response("Invalid profile ID", 400)
+    except Exception as e:
+        current_app.logger.exception("Unhandled error in get_connection_statuses_route")
+        return error_response(str(e), 500)
+
+@connections_bp.route('/profiles/<profile_id>/connections/bulk', methods=['POST'])
+@jwt_required()
+def bulk_update_connections_route(profile_id):
+    """Accept, reject or delete many pending connection requests at once"""
+    current_app.logger.info("Bulk update connections endpoint called")
+    try:
+        profile_uuid = UUID(profile_id)
+        
+        # Verify the user matches the profile ID
+        user_id = UUID(get_jwt_identity())
+        if user_id != profile_uuid:
+            current_app.logger.error("Unauthorized")
+            return error_response("Unauthorized", 403)
+        
+        data = request.get_json(silent=True) or {}
+        if 'action' not in data:
+            return error_response("Action is required", 400)
+        
+        connection_ids = data.get('connection_ids')
+        if connection_ids is not None and not isinstance(connection_ids, list):
+            return error_response("connection_ids must be a list", 400)
+        
+        pending_before = None
+        if data.get('pending_before'):
+            try:
+                pending_before = datetime.fromisoformat(data['pending_before'])
+                if pending_before.tzinfo is not None:
+                    pending_before = pending_before.astimezone(timezone.utc).replace(tzinfo=None)
+            except (TypeError, ValueError):
+                return error_response("pending_before must be an ISO 8601 timestamp", 400)
+        
+        result = bulk_update_connections(
+            profile_uuid,
+            data['action'],
+            connection_ids=connection_ids,
+            pending_before=pending_before
+        )
+        
+        if result["success"]:
+            return success_response(result, 200)
+        return error_response(result.get("message", "Bad request"), 400)
+    except ValueError:
+        return error_response("Invalid profile ID", 400)
+    except Exception as e:
+        current_app.logger.exception("Unhandled error in bulk_update_connections_route")
+        return error_response(str(e), 500)
+
+@connections_bp.route('/profiles/<profile_id>/distance/<other_id>', methods=['GET'])
+@jwt_required()
+def get_connection_distance_route(profile_id, other_id):
+    """Get the degree of separation between two users"""
+    current_app.logger.info("Get connection distance endpoint called")
+    try:
+        profile_uuid = UUID(profile_id)
+        other_uuid = UUID(other_id)
+        max_depth = request.args.get('max_depth', 3, type=int)
+        
+        result = get_connection_distance(profile_uuid, other_uuid, max_depth)
+        
+        if result["success"]:
+            return success_response(result, 200)
+        message = result.get("message", "Not found")
+        return error_response(message, 404 if message == 'Profile not found' else 400)
+    except ValueError:
+        return error_response("Invalid profile ID", 400)
+    except Exception as e:
+        current_app.logger.exception("Unhandled error in get_connection_distance_route")
+        return error_response(str(e), 500)
+
+@connections_bp.route('/profiles/<profile_id>/suggestions', methods=['GET'])
+@jwt_required()
+def get_suggestions_route(profile_id):
+    """Get "people you may know" suggestions ranked by mutual connections"""
+    current_app.logger.info("Get suggestions endpoint called")
+    try:
+        profile_uuid = UUID(profile_id)
+        
+        # Suggestions are derived from private connection data
+        user_id = UUID(get_jwt_identity())
+        if user_id != profile_uuid:
+            current_app.logger.error("Unauthorized")
+            return error_response("Unauthorized", 403)
+        
+        result = get_suggestions(profile_uuid, limit=request.args.get('limit', type=int))
+        
+        if result["success"]:
+            return success_response(result, 200)
+        return error_response(result.get("message", "Not found"), 404)
+    except ValueError:
+        return error_response("Invalid profile ID", 400)
+    except Exception as e:
+        current_app.logger.exception("Unhandled error in get_suggestions_route")
+        return error_response(str(e), 500)
@@ -1,6 +1,11 @@
+from datetime import date
 from flask import Blueprint, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.gamification_service import GamificationService
+from app.services.leaderboard import UNAVAILABLE, get_around, get_rank, get_top
+from app.services.points_queue import enqueue_points
+from app.services.user_sync import apply_user_events
+from app.utils.decorators import jwt_required_with_permissions
 from app.utils.responses import success_response, error_response
 
 gamification_bp = Blueprint('gamification', __name__, url_prefix='/api/gamification')
@@ -30,22 +35,87 @@ def add_points():
     if not isinstance(points, int) or points <= 0:
         return error_response('Invalid points value', 400)
 
-    success, message = service.add_points(get_jwt_identity(), points, reason)
-    if not success:
-        return error_response(message, 400)
+    # Async mode: queue the award for the gamification worker
+    if data.get('async') is True or request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        try:
+            key = enqueue_points(get_jwt_identity(), points, reason, data.get('idempotency_key'))
+        except ValueError as e:
+            return error_response(str(e), 400)
+        if key is None:
+            return error_response('Points queue is unavailable', 503)
+        return success_response({'message': 'Points queued', 'idempotency_key': key}, 202)
 
     # Return updated progress for convenience
-    progress = service.get_user_progress(get_jwt_identity())
+    success, message, progress = service.add_points_with_progress(get_jwt_identity(), points, reason)
+    if not success:
+        return error_response(message, 400)
     return success_response({'message': message, 'progress': progress}, 200)
 
+@gamification_bp.route('/points/bulk', methods=['POST'])
+@jwt_required_with_permissions(['gamification:award'])
+def add_points_bulk():
+    """Record a batch of point awards for any users (service-to-service)."""
+    data = request.get_json(silent=True) or {}
+    awards = data.get('awards')
+    if not isinstance(awards, list) or not awards:
+        return error_response('awards must be a non-empty list', 400)
+    max_awards = current_app.config.get('GAMIFICATION_BULK_MAX', 5000)
+    if len(awards) > max_awards:
+        return error_response(f'At most {max_awards} awards can be submitted at once', 400)
+
+    success, message, summary = service.add_points_bulk(awards)
+    if not success:
+        return error_response(message, 400)
+    return success_response({'message': message, **summary}, 200)
+
+@gamification_bp.route('/history', methods=['GET'])
+@jwt_required()
+def get_history():
+    """Return the current user's points per day, week or month."""
+    try:
+        start = date.fromisoformat(request.args['from']) if request.args.get('from') else None
+        end = date.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return error_response('from and to must be ISO dates (YYYY-MM-DD)', 400)
+
+    success, message, history = service.get_points_buckets(
+        get_jwt_identity(),
+        bucket=request.args.get('bucket', 'day'),
+        start=start,
+        end=end,
+        cursor=request.args.get('cursor'),
+        limit=request.args.get('limit', type=int),
+        by_reason=request.args.get('by_reason', '').lower() in ('1', 'true', 'yes')
+    )
+    if not success:
+        return error_response(message, 400)
+    return success_response(history, 200)
+
+@gamification_bp.route('/users/events', methods=['POST'])
+@jwt_required_with_permissions(['gamification:sync-users'])
+def receive_user_events():
+    """Apply user.created/updated/deleted events from the Auth Service (webhook)."""
+    data = request.get_json(silent=True) or {}
+    events = data.get('events')
+    if not isinstance(events, list) or not events:
+        return error_response('events must be a non-empty list', 400)
+    max_events = current_app.config.get('USER_EVENTS_BATCH_MAX', 1000)
+    if len(events) > max_events:
+        return error_response(f'At most {max_events} events can be submitted at once', 400)
+
+    result = apply_user_events(events)
+    if not result['success']:
+        return error_response(result['message'], 400)
+    return success_response(result, 200)
+
 @gamification_bp.route('/badges', methods=['GET'])
 @jwt_required()
 def get_badges():
     """Return list of badges for the current user."""
-    progress = service.get_user_progress(get_jwt_identity())
-    if progress is None:
+    badges = service.get_user_badges(get_jwt_identity())
+    if badges is None:
         return error_response('User not found', 404)
-    return success_response({'badges': progress['badges']}, 200)
+    return success_response({'badges': badges}, 200)
 
 @gamification_bp.route('/badges/award', methods=['POST'])
 @jwt_required()
@@ -64,4 +134,35 @@ def award_badge():
         if badge:
             response['badge'] = badge
         return success_response(response, 200)
-    return error_response(message, 400) 
\ No newline at end of file
+    return error_response(message, 400) 
+
+def _leaderboard_response(result):
+    if result['success']:
+        return success_response(result, 200)
+    message = result.get('message', 'Bad request')
+    return error_response(message, 503 if message == UNAVAILABLE else 400)
+
+@gamification_bp.route('/leaderboard', methods=['GET'])
+@jwt_required()
+def get_leaderboard():
+    """Return the top of a leaderboard (global, weekly or monthly)."""
+    return _leaderboard_response(get_top(
+        request.args.get('board', 'global'),
+        limit=request.args.get('limit', type=int)
+    ))
+
+@gamification_bp.route('/leaderboard/me', methods=['GET'])
+@jwt_required()
+def get_my_rank():
+    """Return the current user's rank and score on a leaderboard."""
+    return _leaderboard_response(get_rank(get_jwt_identity(), request.args.get('board', 'global')))
+
+@gamification_bp.route('/leaderboard/around', methods=['GET'])
+@jwt_required()
+def get_leaderboard_around_me():
+    """Return the leaderboard entries around the current user."""
+    return _leaderboard_response(get_around(
+        get_jwt_identity(),
+        request.args.get('board', 'global'),
+        radius=request.args.get('radius', type=int)
+    ))
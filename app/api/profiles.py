@@ -14,6 +14,10 @@ from app.utils.responses import success_response, error_response
 
 profiles_bp = Blueprint('profiles', __name__)
 
+def _includes() -> set:
+    """Return the set of names requested through the ``include`` query parameter"""
+    return {name.strip() for name in request.args.get('include', '').split(',') if name.strip()}
+
 @profiles_bp.route('/<profile_id>', methods=['GET'])
 @jwt_required()
 def get_profile(profile_id: str):
@@ -27,7 +31,12 @@ def get_profile(profile_id: str):
         include_private = is_owner_or_admin(user_id, profile_uuid)
         
         # Get the profile
-        profile = get_profile_by_id(profile_uuid, include_private)
+        profile = get_profile_by_id(
+            profile_uuid,
+            include_private,
+            'expertise' in _includes(),
+            viewer_id=user_id
+        )
         
         if not profile:
             return error_response('Profile not found', 404)
@@ -45,7 +54,7 @@ def get_my_profile_route():
     """Get the current user's profile"""
     try:
         user_id = UUID(get_jwt_identity())
-        profile = get_my_profile(user_id)
+        profile = get_my_profile(user_id, 'expertise' in _includes())
         
         if not profile:
             result = create_profile(user_id, {
@@ -53,7 +62,10 @@ def get_my_profile_route():
                 'visibility': 'PRIVATE',
             })
             if result['success']:
-                return success_response({'profile': result['profile']}, 200)
+                profile = result['profile']
+                if 'expertise' in _includes():
+                    profile['expertise_areas'] = []
+                return success_response({'profile': profile}, 200)
             return error_response(result.get('message', 'Bad request'), 400)
         
         return success_response({'profile': profile}, 200)
@@ -117,6 +129,8 @@ def search_profiles_route():
         visibility = request.args.get('visibility', 'PUBLIC')
         limit = int(request.args.get('limit', 20))
         offset = int(request.args.get('offset', 0))
+        facets = [f.strip() for f in request.args.get('facets', '').split(',') if f.strip()]
+        facet_limit = request.args.get('facet_limit', type=int)
         
         # Search profiles
         result = search_profiles(
@@ -124,9 +138,15 @@ def search_profiles_route():
             expertise=expertise,
             visibility=visibility,
             limit=limit,
-            offset=offset
+            offset=offset,
+            facets=facets,
+            facet_limit=facet_limit,
+            include_expertise='expertise' in _includes(),
+            viewer_id=UUID(get_jwt_identity())
         )
         
+        if not result['success']:
+            return error_response(result.get('message', 'Bad request'), 400)
         return success_response(result, 200)
     except Exception as e:
         current_app.logger.exception("Unhandled error in search_profiles_route")
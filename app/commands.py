@@ -6,5 +6,212 @@ from app.models.gamification import Badge
 @with_appcontext
 def init_badges():
     """Initialize badges in the database"""
+    from app.services.badge_catalog import bump_badge_catalog_version
+
     Badge.create_initial_badges()
-    click.echo('Initial badges created successfully') 
\ No newline at end of file
+    bump_badge_catalog_version()
+    click.echo('Initial badges created successfully')
+
+@click.command('add-expertise-alias')
+@click.argument('domain')
+@click.argument('alias')
+@with_appcontext
+def add_expertise_alias(domain, alias):
+    """Register ALIAS as an alternative name for expertise DOMAIN"""
+    from app.services.expertise_service import add_domain_alias
+
+    result = add_domain_alias(domain, alias)
+    if not result['success']:
+        raise click.ClickException(result['message'])
+    click.echo(f"{alias} now resolves to {result['domain']['name']}")
+
+@click.command('rebuild-connection-graph')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows streamed per batch')
+@with_appcontext
+def rebuild_connection_graph_command(batch_size):
+    """Rebuild the Redis connection adjacency cache from user_connections"""
+    from app.services.connection_graph import rebuild_connection_graph
+
+    try:
+        count = rebuild_connection_graph(batch_size=batch_size)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f'Connection graph rebuilt for {count} users')
+
+@click.command('export-connection-graph')
+@click.option('--output', default=None, help='Snapshot directory (defaults to CONNECTION_GRAPH_SNAPSHOT_DIR)')
+@click.option('--batch-size', default=10000, show_default=True, help='Rows streamed per batch')
+@click.option('--keep', default=2, show_default=True, help='Snapshots to retain')
+@with_appcontext
+def export_connection_graph_command(output, batch_size, keep):
+    """Write a memory-mappable CSR snapshot of accepted connections"""
+    from flask import current_app
+    from app.services.graph_snapshot import write_graph_snapshot
+
+    output = output or current_app.config.get('CONNECTION_GRAPH_SNAPSHOT_DIR')
+    if not output:
+        raise click.ClickException('No output directory given and CONNECTION_GRAPH_SNAPSHOT_DIR is not set')
+    path = write_graph_snapshot(output, batch_size=batch_size, keep=keep)
+    click.echo(f'Connection graph snapshot written to {path}')
+
+@click.command('prune-connection-tombstones')
+@click.option('--days', type=int, default=None, help='Retention in days (defaults to CONNECTION_TOMBSTONE_RETENTION_DAYS)')
+@with_appcontext
+def prune_connection_tombstones_command(days):
+    """Delete connection tombstones older than the change-feed retention"""
+    from app.services.connection_service import prune_connection_tombstones
+
+    removed = prune_connection_tombstones(days=days)
+    click.echo(f'Removed {removed} connection tombstones')
+
+@click.command('reconcile-connection-counters')
+@click.option('--batch-size', default=1000, show_default=True, help='Profiles checked per transaction')
+@with_appcontext
+def reconcile_connection_counters_command(batch_size):
+    """Repair drift in the denormalized connection counters on profiles"""
+    from app.services.connection_service import reconcile_connection_counters
+
+    repaired = reconcile_connection_counters(batch_size=batch_size)
+    click.echo(f'Repaired connection counters on {repaired} profiles')
+
+@click.command('compute-connection-suggestions')
+@click.option('--top-k', type=int, default=None, help='Candidates kept per user')
+@click.option('--block-size', type=int, default=None, help='Users per matrix product and transaction')
+@with_appcontext
+def compute_connection_suggestions_command(top_k, block_size):
+    """Recompute mutual-connection suggestions for every user"""
+    from app.services.suggestion_service import compute_all_suggestions
+
+    written = compute_all_suggestions(top_k=top_k, block_size=block_size)
+    click.echo(f'Stored {written} connection suggestions')
+
+@click.command('refresh-connection-suggestions')
+@click.option('--batch-size', type=int, default=None, help='Users popped per round trip')
+@click.option('--max-users', type=int, default=None, help='Stop after refreshing this many users')
+@with_appcontext
+def refresh_connection_suggestions_command(batch_size, max_users):
+    """Refresh suggestions for users whose connections changed since the last run"""
+    from app.services.suggestion_service import refresh_stale_suggestions
+
+    try:
+        refreshed = refresh_stale_suggestions(batch_size=batch_size, max_users=max_users)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f'Refreshed suggestions for {refreshed} users')
+
+@click.command('rebuild-leaderboards')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows streamed per pipeline flush')
+@with_appcontext
+def rebuild_leaderboards_command(batch_size):
+    """Rebuild the Redis leaderboards from users and the points ledger"""
+    from app.services.leaderboard import rebuild_leaderboards
+
+    try:
+        count = rebuild_leaderboards(batch_size=batch_size)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f'Leaderboards rebuilt with {count} ranked users')
+
+@click.command('compact-points')
+@click.option('--older-than-days', type=int, default=None, help='Compact rows from before this many days ago (defaults to POINTS_COMPACTION_DAYS)')
+@click.option('--batch-size', default=5000, show_default=True, help='Points rows per transaction')
+@with_appcontext
+def compact_points_command(older_than_days, batch_size):
+    """Roll old points ledger rows into daily per-reason totals"""
+    from flask import current_app
+    from app.services.gamification_service import GamificationService
+
+    if older_than_days is None:
+        older_than_days = current_app.config.get('POINTS_COMPACTION_DAYS', 90)
+    compacted = GamificationService().compact_points(older_than_days=older_than_days, batch_size=batch_size)
+    click.echo(f'Compacted {compacted} points rows')
+
+@click.command('ingest-points')
+@click.argument('source', type=click.File('r'))
+@click.option('--batch-size', default=1000, show_default=True, help='Awards per transaction')
+@with_appcontext
+def ingest_points_command(source, batch_size):
+    """Record point awards from an NDJSON file (use - for stdin)
+
+    Each line is an object with user_id, points, reason and an optional
+    idempotency_key; awards whose key was already recorded are skipped.
+    """
+    import json
+    from app.services.gamification_service import GamificationService
+
+    service = GamificationService()
+    totals = {'accepted': 0, 'duplicates': 0, 'skipped': 0}
+
+    def flush(batch, first_line):
+        success, message, summary = service.add_points_bulk(batch)
+        if not success:
+            raise click.ClickException(f'Batch starting at line {first_line}: {message}')
+        for key in totals:
+            totals[key] += summary[key]
+
+    batch, first_line = [], 1
+    for line_number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            batch.append(json.loads(line))
+        except ValueError:
+            raise click.ClickException(f'Line {line_number}: invalid JSON')
+        if len(batch) >= batch_size:
+            flush(batch, first_line)
+            batch, first_line = [], line_number + 1
+    if batch:
+        flush(batch, first_line)
+    click.echo(f"Recorded {totals['accepted']} awards, skipped {totals['duplicates']} duplicates"
+               f" and {totals['skipped']} awards for unknown users")
+
+@click.command('gamification-worker')
+@click.option('--consumer', default=None,
+              help='Stable worker name owning its in-flight batch; unique per worker (defaults to the host name)')
+@click.option('--batch-size', type=int, default=None, help='Events per batch (defaults to POINTS_QUEUE_BATCH_SIZE)')
+@click.option('--timeout', default=1.0, show_default=True, help='Seconds to wait for the first event of a batch')
+@click.option('--max-batches', type=int, default=None, help='Stop after this many batches')
+@with_appcontext
+def gamification_worker_command(consumer, batch_size, timeout, max_batches):
+    """Apply queued point events in batches"""
+    import socket
+    from app.services.points_queue import run_points_worker
+
+    consumer = consumer or socket.gethostname()
+    totals = run_points_worker(consumer, batch_size=batch_size, timeout=timeout, max_batches=max_batches)
+    click.echo(f"Applied {totals['applied']} events, skipped {totals['duplicates']} duplicates, "
+               f"dead-lettered {totals['dead']}")
+
+@click.command('backfill-users')
+@click.argument('source', type=click.File('r'))
+@click.option('--batch-size', default=1000, show_default=True, help='Users upserted per transaction')
+@with_appcontext
+def backfill_users_command(source, batch_size):
+    """Upsert users from an NDJSON export of the Auth Service (use - for stdin)
+
+    Each line is an object with id, email and username.
+    """
+    import json
+    from app import db
+    from app.services.user_sync import upsert_users
+
+    written = 0
+    batch = []
+    for line_number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            user = json.loads(line)
+        except ValueError:
+            raise click.ClickException(f'Line {line_number}: invalid JSON')
+        if not isinstance(user, dict) or not all(user.get(key) for key in ('id', 'email', 'username')):
+            raise click.ClickException(f'Line {line_number}: id, email and username are required')
+        batch.append(user)
+        if len(batch) >= batch_size:
+            written += upsert_users(batch)
+            db.session.commit()
+            batch = []
+    if batch:
+        written += upsert_users(batch)
+        db.session.commit()
+    click.echo(f'Upserted {written} users')
@@ -39,11 +39,14 @@ class Config:
     REDIS_PORT = _get_int_env('REDIS_PORT', 6379)
     REDIS_DB = _get_int_env('REDIS_DB', 0)
     REDIS_PASSWORD = os.getenv('REDIS_PASSWORD', None)
+    REDIS_ENABLED = os.getenv('REDIS_ENABLED', 'True').lower() in ('true', '1', 't')
     
     # Rate limiting
     RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True').lower() in ('true', '1', 't')
     RATE_LIMIT_DEFAULT = os.getenv('RATE_LIMIT_DEFAULT', '60/minute')
     RATE_LIMIT_STORAGE_URL = os.getenv('RATE_LIMIT_STORAGE_URL', 'redis://localhost:6379/0')
+    # Fraction of a caller's remaining budget each worker may admit without asking the shared storage
+    RATE_LIMIT_LOCAL_SHARE = float(os.getenv('RATE_LIMIT_LOCAL_SHARE', '0.05'))
     
     # JWT
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-dev-key-change-in-production')
@@ -54,12 +57,55 @@ class Config:
     # Auth Service
     AUTH_SERVICE_URL = os.getenv('AUTH_SERVICE_URL', 'http://auth_api:5000')
     AUTH_SERVICE_TOKEN = os.getenv('AUTH_SERVICE_TOKEN', 'placeholder-token')
+    AUTH_MISSING_USER_TTL = _get_int_env('AUTH_MISSING_USER_TTL', 300)  # negative cache of unknown user IDs
+    USER_EVENTS_BATCH_MAX = _get_int_env('USER_EVENTS_BATCH_MAX', 1000)
     
     # Event Bus
     EVENT_BUS_ENABLED = os.getenv('EVENT_BUS_ENABLED', 'False').lower() in ('true', '1', 't')
     EVENT_BUS_TYPE = os.getenv('EVENT_BUS_TYPE', 'http')
     EVENT_BUS_URL = os.getenv('EVENT_BUS_URL', 'http://event_bus:8080/events')
     
+    # Search
+    SEARCH_FACET_LIMIT = _get_int_env('SEARCH_FACET_LIMIT', 10)
+    SEARCH_FACET_CACHE_TTL = _get_int_env('SEARCH_FACET_CACHE_TTL', 30)
+    SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'sql')  # 'sql' or 'memory'
+    SEARCH_INDEX_REFRESH_SECONDS = _get_int_env('SEARCH_INDEX_REFRESH_SECONDS', 300)
+    SEARCH_INDEX_BATCH_SIZE = _get_int_env('SEARCH_INDEX_BATCH_SIZE', 1000)
+    
+    # Connections
+    CONNECTIONS_PAGE_SIZE = _get_int_env('CONNECTIONS_PAGE_SIZE', 50)
+    CONNECTIONS_MAX_PAGE_SIZE = _get_int_env('CONNECTIONS_MAX_PAGE_SIZE', 200)
+    CONNECTIONS_BULK_MAX = _get_int_env('CONNECTIONS_BULK_MAX', 500)
+    CONNECTION_FEED_SETTLE_SECONDS = _get_int_env('CONNECTION_FEED_SETTLE_SECONDS', 2)
+    CONNECTION_TOMBSTONE_RETENTION_DAYS = _get_int_env('CONNECTION_TOMBSTONE_RETENTION_DAYS', 30)
+    CONNECTIONS_STATUS_MAX = _get_int_env('CONNECTIONS_STATUS_MAX', 200)
+    CONNECTIONS_STATUS_CACHE_TTL = _get_int_env('CONNECTIONS_STATUS_CACHE_TTL', 300)
+    CONNECTION_GRAPH_TTL = _get_int_env('CONNECTION_GRAPH_TTL', 86400)
+    CONNECTION_GRAPH_LOCAL_TTL = _get_int_env('CONNECTION_GRAPH_LOCAL_TTL', 5)
+    CONNECTION_GRAPH_LOCAL_SIZE = _get_int_env('CONNECTION_GRAPH_LOCAL_SIZE', 10000)
+    CONNECTION_GRAPH_IN_BATCH = _get_int_env('CONNECTION_GRAPH_IN_BATCH', 500)
+    CONNECTION_DISTANCE_MAX_DEPTH = _get_int_env('CONNECTION_DISTANCE_MAX_DEPTH', 6)
+    CONNECTION_DISTANCE_VISIT_BUDGET = _get_int_env('CONNECTION_DISTANCE_VISIT_BUDGET', 50000)
+    CONNECTION_DISTANCE_CACHE_TTL = _get_int_env('CONNECTION_DISTANCE_CACHE_TTL', 60)
+    CONNECTION_GRAPH_SNAPSHOT_DIR = os.getenv('CONNECTION_GRAPH_SNAPSHOT_DIR', '')
+    SUGGESTIONS_TOP_K = _get_int_env('SUGGESTIONS_TOP_K', 20)
+    SUGGESTIONS_BLOCK_SIZE = _get_int_env('SUGGESTIONS_BLOCK_SIZE', 2048)
+    SUGGESTIONS_REFRESH_BATCH_SIZE = _get_int_env('SUGGESTIONS_REFRESH_BATCH_SIZE', 100)
+    
+    # Gamification
+    BADGE_CATALOG_CHECK_SECONDS = _get_int_env('BADGE_CATALOG_CHECK_SECONDS', 30)
+    ACHIEVEMENT_RULES = None  # list of rule dicts; None uses the built-in rules
+    ACHIEVEMENT_RULES_FILE = os.getenv('ACHIEVEMENT_RULES_FILE', '')
+    GAMIFICATION_BULK_MAX = _get_int_env('GAMIFICATION_BULK_MAX', 5000)
+    POINTS_QUEUE_BATCH_SIZE = _get_int_env('POINTS_QUEUE_BATCH_SIZE', 500)
+    POINTS_COMPACTION_DAYS = _get_int_env('POINTS_COMPACTION_DAYS', 90)
+    POINTS_HISTORY_DEFAULT_DAYS = _get_int_env('POINTS_HISTORY_DEFAULT_DAYS', 90)
+    POINTS_HISTORY_MAX_BUCKETS = _get_int_env('POINTS_HISTORY_MAX_BUCKETS', 366)
+    POINTS_HISTORY_CACHE_TTL = _get_int_env('POINTS_HISTORY_CACHE_TTL', 3600)  # closed buckets only
+    LEADERBOARD_SIZE = _get_int_env('LEADERBOARD_SIZE', 10)
+    LEADERBOARD_MAX_SIZE = _get_int_env('LEADERBOARD_MAX_SIZE', 100)
+    LEADERBOARD_WINDOW_RETENTION_DAYS = _get_int_env('LEADERBOARD_WINDOW_RETENTION_DAYS', 7)
+    
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 
@@ -76,6 +122,9 @@ class TestingConfig(Config):
     JWT_SECRET_KEY = 'test-jwt-key'
     AUTH_SERVICE_URL = 'http://localhost:5000'
     EVENT_BUS_ENABLED = False
+    REDIS_ENABLED = False
+    SEARCH_BACKEND = 'sql'
+    SEARCH_INDEX_REFRESH_SECONDS = 0
 
 class ProductionConfig(Config):
     """Production configuration."""
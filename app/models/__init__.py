@@ -1,4 +1,5 @@
 from app.models.profile import UserProfile
-from app.models.expertise import ExpertiseArea
+from app.models.expertise import ExpertiseArea, ExpertiseDomain, ExpertiseDomainAlias
 from app.models.preference import UserPreference
-from app.models.connection import UserConnection
+from app.models.connection import UserConnection, ConnectionTombstone
+from app.models.suggestion import ConnectionSuggestion
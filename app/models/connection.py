@@ -1,7 +1,27 @@
 from datetime import datetime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import GenericFunction
 from app import db
 import uuid
 
+class least(GenericFunction):
+    """LEAST(a, b); SQLite spells it as the multi-argument MIN()."""
+    type = db.String()
+    inherit_cache = True
+
+class greatest(GenericFunction):
+    """GREATEST(a, b); SQLite spells it as the multi-argument MAX()."""
+    type = db.String()
+    inherit_cache = True
+
+@compiles(least, 'sqlite')
+def _sqlite_least(element, compiler, **kw):
+    return f"min({compiler.process(element.clauses, **kw)})"
+
+@compiles(greatest, 'sqlite')
+def _sqlite_greatest(element, compiler, **kw):
+    return f"max({compiler.process(element.clauses, **kw)})"
+
 class UserConnection(db.Model):
     __tablename__ = 'user_connections'
     
@@ -12,6 +32,20 @@ class UserConnection(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Composite indexes serving per-user listings filtered by status, newest first
+    __table_args__ = (
+        db.Index('idx_user_connections_requester_status_created', 'requester_id', 'status', 'created_at'),
+        db.Index('idx_user_connections_recipient_status_created', 'recipient_id', 'status', 'created_at'),
+        # Change feed: a participant's connections in modification order
+        db.Index('idx_user_connections_requester_updated', 'requester_id', 'updated_at'),
+        db.Index('idx_user_connections_recipient_updated', 'recipient_id', 'updated_at'),
+    )
+    
+    @classmethod
+    def pair_key(cls):
+        """Expressions of the canonical unordered pair: (least id, greatest id)"""
+        return least(cls.requester_id, cls.recipient_id), greatest(cls.requester_id, cls.recipient_id)
+    
     # Relationships
     requester = db.relationship('UserProfile', foreign_keys=[requester_id], backref='outgoing_connections')
     recipient = db.relationship('UserProfile', foreign_keys=[recipient_id], backref='incoming_connections')
@@ -28,4 +62,32 @@ class UserConnection(db.Model):
         }
     
     def __repr__(self):
-        return f'<UserConnection {self.requester_id} -> {self.recipient_id} ({self.status})>'
\ No newline at end of file
+        return f'<UserConnection {self.requester_id} -> {self.recipient_id} ({self.status})>'
+
+# At most one connection per unordered pair of users, whichever way it was requested
+db.Index('uq_user_connections_pair', *UserConnection.pair_key(), unique=True)
+
+class ConnectionTombstone(db.Model):
+    """Record of a deleted connection, kept so change feeds can report the deletion"""
+    __tablename__ = 'connection_tombstones'
+    
+    connection_id = db.Column(db.String(36), primary_key=True)
+    requester_id = db.Column(db.String(36), nullable=False)
+    recipient_id = db.Column(db.String(36), nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.Index('idx_connection_tombstones_requester_deleted', 'requester_id', 'deleted_at'),
+        db.Index('idx_connection_tombstones_recipient_deleted', 'recipient_id', 'deleted_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'connection_id': str(self.connection_id),
+            'requester_id': str(self.requester_id),
+            'recipient_id': str(self.recipient_id),
+            'deleted_at': self.deleted_at.isoformat() if self.deleted_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ConnectionTombstone {self.connection_id}>'
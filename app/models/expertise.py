@@ -1,15 +1,53 @@
+from datetime import datetime
 from app import db
 import uuid
 
+class ExpertiseDomain(db.Model):
+    """Canonical expertise domain; ``slug`` is the case-folded lookup key."""
+    __tablename__ = 'expertise_domains'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    slug = db.Column(db.String(100), unique=True, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    aliases = db.relationship('ExpertiseDomainAlias', backref='domain', lazy=True, cascade='all, delete-orphan')
+    
+    def to_dict(self):
+        return {
+            'id': str(self.id),
+            'slug': self.slug,
+            'name': self.name,
+            'aliases': [alias.slug for alias in self.aliases]
+        }
+    
+    def __repr__(self):
+        return f'<ExpertiseDomain {self.slug}>'
+
+class ExpertiseDomainAlias(db.Model):
+    """Alternative slug resolving to a canonical expertise domain."""
+    __tablename__ = 'expertise_domain_aliases'
+    
+    slug = db.Column(db.String(100), primary_key=True)
+    domain_id = db.Column(db.String(36), db.ForeignKey('expertise_domains.id'), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<ExpertiseDomainAlias {self.slug}>'
+
 class ExpertiseArea(db.Model):
     __tablename__ = 'expertise_areas'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('user_profiles.id'), nullable=False)
     domain = db.Column(db.String(100), nullable=False)
+    domain_id = db.Column(db.String(36), db.ForeignKey('expertise_domains.id'))
     level = db.Column(db.String(20), nullable=False)  # BEGINNER, INTERMEDIATE, EXPERT
     years_experience = db.Column(db.Integer)
     
+    # Semi-join lookups in search filter on domain_id and correlate on user_id
+    __table_args__ = (db.Index('idx_expertise_areas_domain_id_user_id', 'domain_id', 'user_id'),)
+    
     # Relationships
     user = db.relationship('UserProfile', back_populates='expertise_areas')
     
@@ -19,9 +57,10 @@ class ExpertiseArea(db.Model):
             'id': str(self.id),
             'user_id': str(self.user_id),
             'domain': self.domain,
+            'domain_id': str(self.domain_id) if self.domain_id else None,
             'level': self.level,
             'years_experience': self.years_experience
         }
     
     def __repr__(self):
-        return f'<ExpertiseArea {self.domain} ({self.level})>'
\ No newline at end of file
+        return f'<ExpertiseArea {self.domain} ({self.level})>'
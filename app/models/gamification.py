@@ -9,8 +9,15 @@ class Points(db.Model):
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     amount = db.Column(db.Integer, nullable=False)
     reason = db.Column(db.String(255))
+    # Caller-supplied key; a repeated key is ignored instead of awarding twice
+    idempotency_key = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('uq_points_idempotency_key', 'idempotency_key', unique=True),
+        db.Index('idx_points_user_created', 'user_id', 'created_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': str(self.id),
@@ -20,6 +27,35 @@ class Points(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class PointsDaily(db.Model):
+    """Per-user, per-day, per-reason rollup of compacted Points rows"""
+    __tablename__ = 'points_daily'
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    reason = db.Column(db.String(255), primary_key=True)  # '' for points recorded without a reason
+    amount = db.Column(db.BigInteger, nullable=False)
+    count = db.Column(db.Integer, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'user_id': str(self.user_id),
+            'day': self.day.isoformat() if self.day else None,
+            'reason': self.reason,
+            'amount': self.amount,
+            'count': self.count
+        }
+
+class AchievementState(db.Model):
+    """Progress of one user towards one stateful achievement rule"""
+    __tablename__ = 'achievement_state'
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    rule_id = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)  # events counted or current streak length
+    last_day = db.Column(db.Date)  # streak rules: last day counted
+    completed = db.Column(db.Boolean, nullable=False, default=False)
+
 class Badge(db.Model):
     __tablename__ = 'badges'
     
@@ -22,6 +22,13 @@ class UserProfile(db.Model):
     # Soft-delete
     deleted_at = db.Column(db.DateTime)
     
+    # Denormalized connection counters, maintained by connection_service
+    connections_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    pending_incoming_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    pending_outgoing_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped on every change to one of the user's connections; versions cached connection data
+    connection_generation = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    
     # Relationships
     expertise_areas = db.relationship('ExpertiseArea', back_populates='user', lazy=True, cascade='all, delete-orphan')
     preferences = db.relationship('UserPreference', backref='profile', lazy=True, cascade='all, delete-orphan')
@@ -30,9 +37,10 @@ class UserProfile(db.Model):
         """Return True if the profile has not been soft-deleted."""
         return self.deleted_at is None
 
-    def to_dict(self, include_private: bool = False):
+    def to_dict(self, include_private: bool = False, include_counters: bool = False):
         """Serialize profile to dict.
         If include_private=True, send all fields; otherwise omit potentially sensitive ones like biography.
+        If include_counters=True, add the connection count (and pending request counts when private).
         """
         data = {
             'id': str(self.id),
@@ -66,6 +74,12 @@ class UserProfile(db.Model):
                 data['github_username'] = self.github_username
             if _visible('show_linkedin_url'):
                 data['linkedin_url'] = self.linkedin_url
+
+        if include_counters:
+            data['connections_count'] = self.connections_count or 0
+            if include_private:
+                data['pending_incoming_count'] = self.pending_incoming_count or 0
+                data['pending_outgoing_count'] = self.pending_outgoing_count or 0
         return data
 
     def __repr__(self):
@@ -0,0 +1,27 @@
+from datetime import datetime
+from app import db
+
+class ConnectionSuggestion(db.Model):
+    """Precomputed "people you may know" candidate for a user."""
+    __tablename__ = 'connection_suggestions'
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('user_profiles.id'), primary_key=True)
+    candidate_id = db.Column(db.String(36), db.ForeignKey('user_profiles.id'), primary_key=True)
+    mutual_count = db.Column(db.Integer, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Serves a user's suggestions ranked by mutual connections
+    __table_args__ = (
+        db.Index('idx_connection_suggestions_user_rank', 'user_id', 'mutual_count'),
+    )
+    
+    def to_dict(self):
+        return {
+            'user_id': str(self.user_id),
+            'candidate_id': str(self.candidate_id),
+            'mutual_count': self.mutual_count,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ConnectionSuggestion {self.user_id} -> {self.candidate_id} ({self.mutual_count})>'
@@ -0,0 +1,178 @@
+"""Declarative achievement rules evaluated incrementally as points arrive.
+
+Rules come from ``ACHIEVEMENT_RULES`` (or the JSON file named by
+``ACHIEVEMENT_RULES_FILE``) and are compiled once per worker.  Each rule
+awards one badge, identified by ``badge_type`` (default ``achievement``) and
+``badge`` (the badge requirement).  Supported rule types:
+
+``threshold``
+    ``min_points``: total points reached.
+``count``
+    ``count`` point events, optionally only those with ``reason``.
+``streak``
+    Point events on ``days`` consecutive days (UTC, like the ledger), optionally only with ``reason``.
+
+Threshold rules fire on the event whose accrual crosses ``min_points``.
+Count and streak rules keep a small row per user and rule in
+``achievement_state`` instead of rescanning ``points``; a rule stops being
+evaluated for a user once it has fired.
+"""
+import json
+from datetime import date, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from flask import current_app
+from app import db
+from app.models.gamification import AchievementState
+from app.services.badge_catalog import get_badge_catalog
+from app.utils.sql import dialect_insert
+
+RULE_TYPES = ('threshold', 'count', 'streak')
+
+DEFAULT_RULES = [
+    {'id': 'first_points', 'type': 'threshold', 'min_points': 1, 'badge': 'first_points'},
+]
+
+
+class Rule(NamedTuple):
+    id: str
+    type: str
+    badge_type: str
+    badge: str
+    target: int
+    reason: Optional[str]
+
+    def matches(self, reason: Optional[str]) -> bool:
+        return self.reason is None or self.reason == reason
+
+
+class PointEvent(NamedTuple):
+    """One accrual as seen by the rule engine; ``total_points`` includes it"""
+    user_id: str
+    points: int
+    reason: Optional[str]
+    total_points: int
+    day: date
+
+
+def _compile(spec: Dict[str, Any]) -> Rule:
+    rule_type = spec.get('type')
+    if rule_type not in RULE_TYPES:
+        raise ValueError(f"Rule {spec.get('id')!r}: type must be one of {', '.join(RULE_TYPES)}")
+    if not spec.get('id') or not spec.get('badge'):
+        raise ValueError(f"Rule {spec.get('id')!r}: id and badge are required")
+    target_key = {'threshold': 'min_points', 'count': 'count', 'streak': 'days'}[rule_type]
+    target = spec.get(target_key)
+    if not isinstance(target, int) or target < 1:
+        raise ValueError(f"Rule {spec['id']!r}: {target_key} must be a positive integer")
+    return Rule(
+        id=str(spec['id']),
+        type=rule_type,
+        badge_type=spec.get('badge_type', 'achievement'),
+        badge=str(spec['badge']),
+        target=target,
+        reason=spec.get('reason')
+    )
+
+
+class AchievementEngine:
+    """Immutable set of compiled rules"""
+
+    def __init__(self, specs: List[Dict[str, Any]]):
+        rules = tuple(_compile(spec) for spec in specs)
+        ids = [rule.id for rule in rules]
+        if len(set(ids)) != len(ids):
+            raise ValueError('Rule ids must be unique')
+        self.thresholds = tuple(rule for rule in rules if rule.type == 'threshold')
+        self.stateful = tuple(rule for rule in rules if rule.type != 'threshold')
+
+    def evaluate(self, events: List[PointEvent]) -> List[Tuple[str, Any]]:
+        """Advance rule state for *events* and return (user_id, badge) pairs to award
+
+        Runs in the caller's transaction; state for every user and stateful
+        rule touched is read with one query and written back with one upsert.
+        """
+        if not events:
+            return []
+        catalog = get_badge_catalog()
+        fired: Dict[Tuple[str, str], Any] = {}
+
+        for event in events:
+            for rule in self.thresholds:
+                if event.total_points - event.points < rule.target <= event.total_points:
+                    fired[(event.user_id, rule.id)] = rule
+
+        relevant = [
+            (event, rule) for event in events for rule in self.stateful if rule.matches(event.reason)
+        ]
+        if relevant:
+            state = self._load_state({event.user_id for event, _ in relevant}, {rule.id for _, rule in relevant})
+            changed = {}
+            for event, rule in sorted(relevant, key=lambda pair: pair[0].day):
+                key = (event.user_id, rule.id)
+                value, last_day, completed = state.get(key, (0, None, False))
+                if completed:
+                    continue
+                if rule.type == 'count':
+                    value += 1
+                elif last_day != event.day:
+                    value = value + 1 if last_day == event.day - timedelta(days=1) else 1
+                    last_day = event.day
+                completed = value >= rule.target
+                if completed:
+                    fired[key] = rule
+                state[key] = changed[key] = (value, last_day, completed)
+            self._save_state(changed)
+
+        awards = []
+        for (user_id, _), rule in fired.items():
+            badge = catalog.get(rule.badge_type, rule.badge)
+            if badge is None:
+                current_app.logger.warning("Achievement rule %s references unknown badge %s/%s",
+                                           rule.id, rule.badge_type, rule.badge)
+                continue
+            awards.append((user_id, badge))
+        return awards
+
+    @staticmethod
+    def _load_state(user_ids, rule_ids) -> Dict[Tuple[str, str], tuple]:
+        table = AchievementState.__table__
+        rows = db.session.execute(
+            db.select(table.c.user_id, table.c.rule_id, table.c.value, table.c.last_day, table.c.completed)
+            .where(table.c.user_id.in_(user_ids), table.c.rule_id.in_(rule_ids))
+        )
+        return {(row.user_id, row.rule_id): (row.value, row.last_day, row.completed) for row in rows}
+
+    @staticmethod
+    def _save_state(changed: Dict[Tuple[str, str], tuple]) -> None:
+        if not changed:
+            return
+        table = AchievementState.__table__
+        insert = dialect_insert(table).values([
+            {'user_id': user_id, 'rule_id': rule_id, 'value': value, 'last_day': last_day, 'completed': completed}
+            for (user_id, rule_id), (value, last_day, completed) in changed.items()
+        ])
+        db.session.execute(insert.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.rule_id],
+            set_={
+                'value': insert.excluded.value,
+                'last_day': insert.excluded.last_day,
+                'completed': insert.excluded.completed
+            }
+        ))
+
+
+def _load_rule_specs() -> List[Dict[str, Any]]:
+    path = current_app.config.get('ACHIEVEMENT_RULES_FILE')
+    if path:
+        with open(path) as handle:
+            return json.load(handle)
+    rules = current_app.config.get('ACHIEVEMENT_RULES')
+    return DEFAULT_RULES if rules is None else rules
+
+
+def get_achievement_engine() -> AchievementEngine:
+    """Return this worker's compiled rules, compiling them on first use"""
+    engine = current_app.extensions.get('achievement_engine')
+    if engine is None:
+        engine = current_app.extensions['achievement_engine'] = AchievementEngine(_load_rule_specs())
+    return engine
@@ -0,0 +1,100 @@
+"""Per-worker, read-only cache of the badge catalog.
+
+Badges almost never change, so each worker loads the whole ``badges`` table
+once into an immutable :class:`BadgeCatalog` indexed by
+``(type, requirement)``.  Whoever changes the catalog calls
+:func:`bump_badge_catalog_version`, which increments a version counter in
+Redis; workers compare their copy's version with it at most every
+``BADGE_CATALOG_CHECK_SECONDS`` and reload when it moved.  Without Redis
+the catalog is simply reloaded on that interval.
+"""
+import time
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+from flask import current_app
+import redis
+from app import db
+from app.models.gamification import Badge
+from app.utils.redis_client import get_redis
+
+_VERSION_KEY = 'badges:catalog:version'
+
+
+class CatalogBadge(NamedTuple):
+    """Immutable copy of a Badge row"""
+    id: str
+    type: str
+    requirement: str
+    data: Mapping
+
+    def to_dict(self) -> Dict:
+        return dict(self.data)
+
+
+class BadgeCatalog:
+    """Immutable snapshot of every badge, indexed by (type, requirement)"""
+
+    def __init__(self, badges: List[Badge], version: Optional[str]):
+        self.version = version
+        self._by_key: Mapping[Tuple[str, str], CatalogBadge] = MappingProxyType({
+            (badge.type, badge.requirement): CatalogBadge(
+                str(badge.id), badge.type, badge.requirement, MappingProxyType(badge.to_dict())
+            )
+            for badge in badges
+        })
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def get(self, badge_type: str, requirement: str) -> Optional[CatalogBadge]:
+        return self._by_key.get((badge_type, str(requirement)))
+
+    def level_badges(self, above: int, up_to: int) -> List[CatalogBadge]:
+        """Return the level badges for every level in (above, up_to]"""
+        return [
+            badge for badge in (self.get('level', str(level)) for level in range(above + 1, up_to + 1))
+            if badge is not None
+        ]
+
+
+def _remote_version() -> Optional[str]:
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        return client.get(_VERSION_KEY) or '0'
+    except redis.RedisError as exc:
+        current_app.logger.warning("Badge catalog version unavailable: %s", exc)
+        return None
+
+
+def get_badge_catalog() -> BadgeCatalog:
+    """Return this worker's badge catalog, reloading it if it is out of date"""
+    cached = current_app.extensions.get('badge_catalog')
+    now = time.monotonic()
+    if cached is not None:
+        catalog, checked_at = cached
+        if now - checked_at < current_app.config.get('BADGE_CATALOG_CHECK_SECONDS', 30):
+            return catalog
+        version = _remote_version()
+        if version is not None and version == catalog.version:
+            current_app.extensions['badge_catalog'] = (catalog, now)
+            return catalog
+    else:
+        version = _remote_version()
+
+    catalog = BadgeCatalog(db.session.execute(db.select(Badge)).scalars().all(), version)
+    current_app.extensions['badge_catalog'] = (catalog, now)
+    return catalog
+
+
+def bump_badge_catalog_version() -> None:
+    """Make every worker reload the badge catalog; call after changing badges"""
+    current_app.extensions.pop('badge_catalog', None)
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.incr(_VERSION_KEY)
+    except redis.RedisError as exc:
+        current_app.logger.warning("Badge catalog version unavailable: %s", exc)
@@ -0,0 +1,339 @@
+"""Cache of accepted-connection adjacency for fast membership checks.
+
+Each user's accepted neighbours are held in a Redis set
+(``conn:adj:<user_id>``) with an in-process LRU in front of it.  A set only
+exists once it has been fully loaded; the ``*`` sentinel member marks it as
+loaded, so an empty neighbourhood is still a cache hit.
+
+Writers (the connection service) update loaded sets in place and bump a
+per-user version key.  Readers that miss load the set from
+``user_connections`` and only publish it if the version did not change
+while they were reading, so a load can never overwrite a newer write.
+The local layer has a short TTL because other workers cannot invalidate it.
+
+Without Redis every miss falls back to the database.
+"""
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+from flask import current_app
+import redis
+from app import db
+from app.models.connection import UserConnection
+from app.utils.cache import get_cache
+from app.utils.redis_client import get_redis
+
+_LOADED = '*'
+
+
+def _adjacency_key(user_id: str) -> str:
+    return f'conn:adj:{user_id}'
+
+
+def _version_key(user_id: str) -> str:
+    return f'conn:ver:{user_id}'
+
+
+def _local_cache():
+    return get_cache(
+        'connection_adjacency',
+        maxsize=current_app.config.get('CONNECTION_GRAPH_LOCAL_SIZE', 10000),
+        ttl=current_app.config.get('CONNECTION_GRAPH_LOCAL_TTL', 5)
+    )
+
+
+def _load_from_db(user_id: str) -> FrozenSet[str]:
+    """Return accepted neighbours of *user_id* from both connection directions"""
+    connections = UserConnection.__table__
+    accepted = connections.c.status == 'ACCEPTED'
+    stmt = db.union_all(
+        db.select(connections.c.recipient_id).where(connections.c.requester_id == user_id, accepted),
+        db.select(connections.c.requester_id).where(connections.c.recipient_id == user_id, accepted)
+    )
+    return frozenset(str(row[0]) for row in db.session.execute(stmt))
+
+
+def _publish(client: redis.Redis, user_id: str, neighbors: FrozenSet[str], version) -> None:
+    """Store a freshly loaded set unless a writer touched the user since *version*"""
+    key = _adjacency_key(user_id)
+    with client.pipeline() as pipe:
+        try:
+            pipe.watch(_version_key(user_id))
+            if pipe.get(_version_key(user_id)) != version:
+                return
+            pipe.multi()
+            pipe.delete(key)
+            pipe.sadd(key, _LOADED, *neighbors)
+            pipe.expire(key, current_app.config.get('CONNECTION_GRAPH_TTL', 86400))
+            pipe.execute()
+        except redis.WatchError:
+            pass
+
+
+def get_neighbors(user_id) -> FrozenSet[str]:
+    """Return the IDs of every user with an accepted connection to *user_id*"""
+    user_id = str(user_id)
+    local = _local_cache()
+    neighbors = local.get(user_id)
+    if neighbors is not None:
+        return neighbors
+
+    client = get_redis()
+    version = None
+    if client is not None:
+        try:
+            with client.pipeline(transaction=False) as pipe:
+                pipe.smembers(_adjacency_key(user_id))
+                pipe.get(_version_key(user_id))
+                members, version = pipe.execute()
+            if _LOADED in members:
+                neighbors = frozenset(members - {_LOADED})
+                local.set(user_id, neighbors)
+                return neighbors
+        except redis.RedisError as exc:
+            current_app.logger.warning("Connection graph cache unavailable: %s", exc)
+            client = None
+
+    neighbors = _load_from_db(user_id)
+    local.set(user_id, neighbors)
+    if client is not None:
+        try:
+            _publish(client, user_id, neighbors, version)
+        except redis.RedisError as exc:
+            current_app.logger.warning("Connection graph cache unavailable: %s", exc)
+    return neighbors
+
+
+def get_neighbors_many(user_ids: Iterable) -> Dict[str, FrozenSet[str]]:
+    """Return accepted neighbours for many users with batched lookups
+
+    Local hits are served first, the rest with one pipelined SMEMBERS round
+    trip, and whatever is still missing with ``IN`` queries of at most
+    ``CONNECTION_GRAPH_IN_BATCH`` users.  Sets loaded from the database are
+    kept locally but not published to Redis.
+    """
+    local = _local_cache()
+    result: Dict[str, FrozenSet[str]] = {}
+    missing = []
+    for user_id in dict.fromkeys(str(u) for u in user_ids):
+        neighbors = local.get(user_id)
+        if neighbors is None:
+            missing.append(user_id)
+        else:
+            result[user_id] = neighbors
+
+    client = get_redis()
+    if missing and client is not None:
+        try:
+            with client.pipeline(transaction=False) as pipe:
+                for user_id in missing:
+                    pipe.smembers(_adjacency_key(user_id))
+                replies = pipe.execute()
+            still_missing = []
+            for user_id, members in zip(missing, replies):
+                if _LOADED in members:
+                    result[user_id] = frozenset(members - {_LOADED})
+                    local.set(user_id, result[user_id])
+                else:
+                    still_missing.append(user_id)
+            missing = still_missing
+        except redis.RedisError as exc:
+            current_app.logger.warning("Connection graph cache unavailable: %s", exc)
+
+    connections = UserConnection.__table__
+    accepted = connections.c.status == 'ACCEPTED'
+    batch = current_app.config.get('CONNECTION_GRAPH_IN_BATCH', 500)
+    for start in range(0, len(missing), batch):
+        chunk = missing[start:start + batch]
+        loaded = {user_id: set() for user_id in chunk}
+        rows = db.session.execute(db.union_all(
+            db.select(connections.c.requester_id, connections.c.recipient_id)
+            .where(connections.c.requester_id.in_(chunk), accepted),
+            db.select(connections.c.recipient_id, connections.c.requester_id)
+            .where(connections.c.recipient_id.in_(chunk), accepted)
+        ))
+        for owner, other in rows:
+            loaded[str(owner)].add(str(other))
+        for user_id, neighbors in loaded.items():
+            result[user_id] = frozenset(neighbors)
+            local.set(user_id, result[user_id])
+    return result
+
+
+def shortest_distance(a, b, max_depth: int, visit_budget: int) -> Dict[str, Optional[int]]:
+    """Degrees of separation between *a* and *b* by bidirectional BFS
+
+    Each step expands the smaller of the two frontiers by one full level
+    (one batched neighbour lookup), so hubs on one side do not force the
+    search to enumerate their whole neighbourhood.  The search stops as soon
+    as the frontiers meet, when the combined depth reaches *max_depth*, or
+    once more than *visit_budget* users have been discovered.
+
+    Returns:
+        Dictionary with ``distance`` (None if not found) and ``truncated``
+        (True if the visit budget ran out first)
+    """
+    a, b = str(a), str(b)
+    if a == b:
+        return {'distance': 0, 'truncated': False}
+
+    visited = ({a: 0}, {b: 0})
+    frontiers = ({a}, {b})
+    depths = [0, 0]
+    visits = 2
+
+    while frontiers[0] and frontiers[1] and depths[0] + depths[1] < max_depth:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        mine, theirs = visited[side], visited[1 - side]
+        depth = depths[side] + 1
+
+        best = None
+        next_frontier = set()
+        for neighbors in get_neighbors_many(frontiers[side]).values():
+            for user_id in neighbors:
+                if user_id in theirs:
+                    distance = depth + theirs[user_id]
+                    best = distance if best is None else min(best, distance)
+                elif user_id not in mine:
+                    mine[user_id] = depth
+                    next_frontier.add(user_id)
+                    visits += 1
+        if best is not None:
+            return {'distance': best, 'truncated': False}
+        if visits > visit_budget:
+            return {'distance': None, 'truncated': True}
+
+        frontiers[side].clear()
+        frontiers[side].update(next_frontier)
+        depths[side] = depth
+
+    return {'distance': None, 'truncated': False}
+
+
+def are_connected(a, b) -> bool:
+    """Return True if users *a* and *b* have an accepted connection"""
+    return bool(connected_subset(a, [b]))
+
+
+def connected_subset(viewer, ids: Iterable) -> Set[str]:
+    """Return the members of *ids* that have an accepted connection to *viewer*
+
+    Answered from the local layer when the viewer's set is cached there,
+    otherwise with a single SMISMEMBER against Redis; a miss in both loads
+    the viewer's full set.
+    """
+    viewer = str(viewer)
+    ids = list(dict.fromkeys(str(i) for i in ids))
+    if not ids:
+        return set()
+
+    neighbors = _local_cache().get(viewer)
+    if neighbors is None:
+        client = get_redis()
+        if client is not None:
+            try:
+                flags = client.smismember(_adjacency_key(viewer), [_LOADED, *ids])
+                if flags[0]:
+                    return {i for i, flag in zip(ids, flags[1:]) if flag}
+            except redis.RedisError as exc:
+                current_app.logger.warning("Connection graph cache unavailable: %s", exc)
+        neighbors = get_neighbors(viewer)
+    return {i for i in ids if i in neighbors}
+
+
+def record_connection_change(requester_id, recipient_id, accepted: bool) -> None:
+    """Reflect a committed connection change in the cache
+
+    Call after commit with ``accepted=True`` when the pair is now connected
+    and ``accepted=False`` when it no longer is (or never was).
+    """
+    pair = (str(requester_id), str(recipient_id))
+    local = _local_cache()
+    for user_id in pair:
+        local.delete(user_id)
+
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        for owner, other in (pair, pair[::-1]):
+            _update_edge(client, owner, other, accepted)
+    except redis.RedisError as exc:
+        current_app.logger.warning("Connection graph cache unavailable: %s", exc)
+
+
+def _update_edge(client: redis.Redis, owner: str, other: str, accepted: bool) -> None:
+    key = _adjacency_key(owner)
+    with client.pipeline() as pipe:
+        try:
+            # Only touch loaded sets; adding to a missing key would create
+            # a partial set that looks complete
+            pipe.watch(key)
+            loaded = pipe.exists(key)
+            pipe.multi()
+            if loaded:
+                if accepted:
+                    pipe.sadd(key, other)
+                else:
+                    pipe.srem(key, other)
+            pipe.incr(_version_key(owner))
+            pipe.execute()
+        except redis.WatchError:
+            client.delete(key)
+            client.incr(_version_key(owner))
+
+
+def rebuild_connection_graph(batch_size: int = 1000) -> int:
+    """Repopulate Redis adjacency sets from ``user_connections``
+
+    Existing sets are dropped first (readers fall back to the database in
+    the meantime), then accepted edges are streamed ordered by owner and each
+    owner's complete set is written atomically in pipelined batches.
+
+    Returns:
+        Number of users whose adjacency set was written
+    """
+    client = get_redis()
+    if client is None:
+        raise RuntimeError('Redis is not configured')
+
+    for key in client.scan_iter(match=_adjacency_key('*'), count=batch_size):
+        client.delete(key)
+    _local_cache().clear()
+
+    connections = UserConnection.__table__
+    accepted = connections.c.status == 'ACCEPTED'
+    edges = db.union_all(
+        db.select(connections.c.requester_id.label('owner'), connections.c.recipient_id.label('other')).where(accepted),
+        db.select(connections.c.recipient_id.label('owner'), connections.c.requester_id.label('other')).where(accepted)
+    ).subquery()
+    rows = db.session.execute(
+        db.select(edges.c.owner, edges.c.other)
+        .order_by(edges.c.owner)
+        .execution_options(yield_per=batch_size)
+    )
+
+    ttl = current_app.config.get('CONNECTION_GRAPH_TTL', 86400)
+    written = 0
+    pipe = client.pipeline(transaction=True)
+
+    def flush_owner(owner, members):
+        key = _adjacency_key(owner)
+        pipe.delete(key)
+        pipe.sadd(key, _LOADED, *members)
+        pipe.expire(key, ttl)
+
+    current, members = None, []
+    for owner, other in rows:
+        owner, other = str(owner), str(other)
+        if owner != current:
+            if current is not None:
+                flush_owner(current, members)
+                written += 1
+                if written % batch_size == 0:
+                    pipe.execute()
+            current, members = owner, []
+        members.append(other)
+    if current is not None:
+        flush_owner(current, members)
+        written += 1
+    pipe.execute()
+    return written
@@ -1,23 +1,103 @@
+from datetime import datetime, timedelta
 from typing import Dict, Optional, List, Any
-from uuid import UUID
+from uuid import UUID, uuid4
+from flask import current_app
 from app import db
-from app.models.connection import UserConnection
+from app.models.connection import UserConnection, ConnectionTombstone
 from app.models.profile import UserProfile
+from app.services.connection_graph import record_connection_change, shortest_distance
+from app.services.suggestion_service import mark_suggestions_stale
+from app.utils.cache import get_cache
+from app.utils.events import publish_event
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.sql import dialect_insert
+
+def _connection_row_to_dict(row) -> Dict[str, Any]:
+    """Serialize a connection row (optionally with counterpart columns) like UserConnection.to_dict"""
+    data = {
+        'id': str(row.id),
+        'requester_id': str(row.requester_id),
+        'recipient_id': str(row.recipient_id),
+        'status': row.status,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'updated_at': row.updated_at.isoformat() if row.updated_at else None
+    }
+    if 'counterpart_id' in row._fields:
+        data['counterpart'] = {
+            'id': str(row.counterpart_id),
+            'username': row.counterpart_username,
+            'first_name': row.counterpart_first_name,
+            'last_name': row.counterpart_last_name,
+            'is_active': row.counterpart_deleted_at is None
+        } if row.counterpart_id else None
+    return data
+
+def _connections_page(
+    profile_id: str,
+    outgoing: bool,
+    status: Optional[str],
+    after: Optional[tuple],
+    limit: int,
+    include_profile: bool
+):
+    """Select one direction of a user's connections in (created_at, id) DESC order
+    
+    Filtering on (requester_id|recipient_id, status) and ordering by
+    created_at matches the composite connection indexes.
+    """
+    connections = UserConnection.__table__
+    own_column = connections.c.requester_id if outgoing else connections.c.recipient_id
+    counterpart_column = connections.c.recipient_id if outgoing else connections.c.requester_id
+    
+    stmt = db.select(
+        connections.c.id,
+        connections.c.requester_id,
+        connections.c.recipient_id,
+        connections.c.status,
+        connections.c.created_at,
+        connections.c.updated_at
+    ).where(own_column == profile_id)
+    
+    if include_profile:
+        profiles = UserProfile.__table__
+        stmt = stmt.add_columns(
+            profiles.c.id.label('counterpart_id'),
+            profiles.c.username.label('counterpart_username'),
+            profiles.c.first_name.label('counterpart_first_name'),
+            profiles.c.last_name.label('counterpart_last_name'),
+            profiles.c.deleted_at.label('counterpart_deleted_at')
+        ).outerjoin(profiles, profiles.c.id == counterpart_column)
+    
+    if status:
+        stmt = stmt.where(connections.c.status == status)
+    if after:
+        stmt = stmt.where(db.tuple_(connections.c.created_at, connections.c.id) < after)
+    
+    return stmt.order_by(connections.c.created_at.desc(), connections.c.id.desc()).limit(limit)
 
 def get_connections(
     profile_id: UUID, 
     status: Optional[str] = 'ACCEPTED',
-    direction: Optional[str] = 'all'
+    direction: Optional[str] = 'all',
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_profile: bool = False
 ) -> Dict[str, Any]:
     """Get user connections
     
+    Results are filtered in SQL and returned newest first, one page at a
+    time.  Pass the returned ``next_cursor`` back to fetch the next page.
+    
     Args:
         profile_id: UUID of the user profile
         status: Connection status filter (PENDING, ACCEPTED, REJECTED)
         direction: Filter for 'incoming', 'outgoing', or 'all' connections
+        limit: Maximum number of connections to return
+        cursor: Opaque cursor from a previous page
+        include_profile: Whether to embed a summary of the other user's profile
         
     Returns:
-        Dictionary with connections
+        Dictionary with connections and the cursor of the next page
     """
     profile = db.session.get(UserProfile, str(profile_id))
     if not profile or not profile.is_active():
@@ -26,97 +106,484 @@ def get_connections(
             'message': 'Profile not found'
         }
     
-    connections = []
+    if direction not in ['all', 'incoming', 'outgoing']:
+        return {
+            'success': False,
+            'message': 'Direction must be incoming, outgoing or all'
+        }
+    
+    max_limit = current_app.config.get('CONNECTIONS_MAX_PAGE_SIZE', 200)
+    if limit is None:
+        limit = current_app.config.get('CONNECTIONS_PAGE_SIZE', 50)
+    limit = max(1, min(limit, max_limit))
+    
+    after = None
+    if cursor:
+        try:
+            created_at, connection_id = decode_cursor(cursor, 2)
+            after = (datetime.fromisoformat(created_at), str(connection_id))
+        except (TypeError, ValueError):
+            return {
+                'success': False,
+                'message': 'Invalid cursor'
+            }
     
-    # Get outgoing connections
-    if direction in ['all', 'outgoing']:
-        outgoing = profile.outgoing_connections  # InstrumentedList
-        if status:
-            outgoing = [c for c in outgoing if c.status == status]
-        connections.extend(outgoing)
+    # Fetch one extra row to know whether another page exists
+    def page(outgoing: bool):
+        return _connections_page(str(profile_id), outgoing, status, after, limit + 1, include_profile)
     
-    # Get incoming connections
-    if direction in ['all', 'incoming']:
-        incoming = profile.incoming_connections
-        if status:
-            incoming = [c for c in incoming if c.status == status]
-        connections.extend(incoming)
+    if direction == 'all':
+        # Each branch is an index range scan; merge them into one ordered page
+        outgoing = page(True).subquery()
+        incoming = page(False).subquery()
+        merged = db.union_all(db.select(outgoing), db.select(incoming)).subquery()
+        stmt = (
+            db.select(merged)
+            .order_by(merged.c.created_at.desc(), merged.c.id.desc())
+            .limit(limit + 1)
+        )
+    else:
+        stmt = page(direction == 'outgoing')
+    
+    rows = db.session.execute(stmt).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at.isoformat(), str(last.id))
     
     return {
         'success': True,
-        'connections': [conn.to_dict() for conn in connections]
+        'connections': [_connection_row_to_dict(row) for row in rows],
+        'next_cursor': next_cursor
     }
 
-def request_connection(requester_id: UUID, recipient_id: UUID) -> Dict[str, Any]:
-    """Request a connection between two users
+def _changes_since(profile_id: str, outgoing: bool, after: Optional[tuple], until: datetime):
+    """Select one direction of a user's live and deleted connections changed in (after, until)
+    
+    Filtering on (requester_id|recipient_id) and ordering by the change
+    timestamp matches the (participant, updated_at) and tombstone indexes.
+    """
+    connections = UserConnection.__table__
+    tombstones = ConnectionTombstone.__table__
+    
+    live = db.select(
+        connections.c.id,
+        connections.c.requester_id,
+        connections.c.recipient_id,
+        connections.c.status,
+        connections.c.created_at,
+        connections.c.updated_at.label('changed_at')
+    ).where(
+        (connections.c.requester_id if outgoing else connections.c.recipient_id) == profile_id,
+        connections.c.updated_at < until
+    )
+    deleted = db.select(
+        tombstones.c.connection_id.label('id'),
+        tombstones.c.requester_id,
+        tombstones.c.recipient_id,
+        db.null().label('status'),
+        db.null().label('created_at'),
+        tombstones.c.deleted_at.label('changed_at')
+    ).where(
+        (tombstones.c.requester_id if outgoing else tombstones.c.recipient_id) == profile_id,
+        tombstones.c.deleted_at < until
+    )
+    if after:
+        live = live.where(db.tuple_(connections.c.updated_at, connections.c.id) > after)
+        deleted = deleted.where(db.tuple_(tombstones.c.deleted_at, tombstones.c.connection_id) > after)
+    return live, deleted
+
+def get_connection_changes(
+    profile_id: UUID,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Dict[str, Any]:
+    """Get a user's connection inserts, status changes and deletions since a cursor
+    
+    Changes are returned oldest first.  Keep the returned ``next_cursor``
+    and pass it back on the next sync; without a cursor the feed starts from
+    the beginning, which doubles as the initial full download.  Changes
+    younger than ``CONNECTION_FEED_SETTLE_SECONDS`` are held back so that
+    transactions still committing with earlier timestamps are not skipped.
     
     Args:
-        requester_id: UUID of the requesting user
-        recipient_id: UUID of the recipient user
+        profile_id: UUID of the user profile
+        cursor: Opaque cursor from a previous call
+        limit: Maximum number of changes to return
         
     Returns:
-        Dictionary with success status and connection data
+        Dictionary with changes, the cursor to resume from and whether more changes are ready
     """
-    # Check if both users exist and are active
-    requester = db.session.get(UserProfile, str(requester_id))
-    recipient = db.session.get(UserProfile, str(recipient_id))
-    
-    if not requester or not requester.is_active():
+    profile = db.session.get(UserProfile, str(profile_id))
+    if not profile:
         return {
             'success': False,
-            'message': 'Requester profile not found'
+            'message': 'Profile not found'
         }
+    
+    default_limit = current_app.config.get('CONNECTIONS_PAGE_SIZE', 50)
+    max_limit = current_app.config.get('CONNECTIONS_MAX_PAGE_SIZE', 200)
+    limit = default_limit if limit is None else max(1, min(limit, max_limit))
+    now = datetime.utcnow()
+    
+    after = None
+    if cursor:
+        try:
+            changed_at, connection_id = decode_cursor(cursor, 2)
+            after = (datetime.fromisoformat(changed_at), str(connection_id))
+        except (TypeError, ValueError):
+            return {
+                'success': False,
+                'message': 'Invalid cursor'
+            }
+        retention = timedelta(days=current_app.config.get('CONNECTION_TOMBSTONE_RETENTION_DAYS', 30))
+        if after[0] < now - retention:
+            return {
+                'success': False,
+                'message': 'Cursor expired, a full resync is required'
+            }
+    
+    until = now - timedelta(seconds=current_app.config.get('CONNECTION_FEED_SETTLE_SECONDS', 2))
+    feed = db.union_all(
+        *_changes_since(str(profile_id), True, after, until),
+        *_changes_since(str(profile_id), False, after, until)
+    ).subquery()
+    rows = db.session.execute(
+        db.select(feed).order_by(feed.c.changed_at, feed.c.id).limit(limit + 1)
+    ).all()
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    changes = []
+    for row in rows:
+        if row.status is None:
+            changes.append({
+                'change': 'deleted',
+                'connection': {
+                    'id': str(row.id),
+                    'requester_id': str(row.requester_id),
+                    'recipient_id': str(row.recipient_id)
+                },
+                'changed_at': row.changed_at.isoformat()
+            })
+        else:
+            changes.append({
+                'change': 'upserted',
+                'connection': {
+                    'id': str(row.id),
+                    'requester_id': str(row.requester_id),
+                    'recipient_id': str(row.recipient_id),
+                    'status': row.status,
+                    'created_at': row.created_at.isoformat() if row.created_at else None,
+                    'updated_at': row.changed_at.isoformat()
+                },
+                'changed_at': row.changed_at.isoformat()
+            })
+    
+    next_cursor = cursor
+    if rows:
+        next_cursor = encode_cursor(rows[-1].changed_at.isoformat(), str(rows[-1].id))
+    
+    return {
+        'success': True,
+        'changes': changes,
+        'next_cursor': next_cursor,
+        'has_more': has_more
+    }
+
+def prune_connection_tombstones(days: Optional[int] = None) -> int:
+    """Delete tombstones older than the retention period
+    
+    Returns:
+        Number of tombstones removed
+    """
+    days = days if days is not None else current_app.config.get('CONNECTION_TOMBSTONE_RETENTION_DAYS', 30)
+    tombstones = ConnectionTombstone.__table__
+    result = db.session.execute(
+        db.delete(tombstones).where(tombstones.c.deleted_at < datetime.utcnow() - timedelta(days=days))
+    )
+    db.session.commit()
+    return result.rowcount
+
+def get_connection_distance(profile_id: UUID, other_id: UUID, max_depth: int = 3) -> Dict[str, Any]:
+    """Get the degree of separation between two users
+    
+    Results are memoized per unordered pair and depth for
+    ``CONNECTION_DISTANCE_CACHE_TTL`` seconds.
+    
+    Args:
+        profile_id: UUID of the first user profile
+        other_id: UUID of the second user profile
+        max_depth: Largest degree to search for
         
-    if not recipient or not recipient.is_active():
+    Returns:
+        Dictionary with the distance (None if further than max_depth)
+    """
+    limit = current_app.config.get('CONNECTION_DISTANCE_MAX_DEPTH', 6)
+    if not 1 <= max_depth <= limit:
         return {
             'success': False,
-            'message': 'Recipient profile not found'
+            'message': f'max_depth must be between 1 and {limit}'
         }
     
-    # Prevent self-connections
-    if requester_id == recipient_id:
+    profile_id, other_id = str(profile_id), str(other_id)
+    found = db.session.execute(
+        db.select(db.func.count()).select_from(UserProfile)
+        .where(UserProfile.id.in_({profile_id, other_id}), UserProfile.deleted_at.is_(None))
+    ).scalar()
+    if found != len({profile_id, other_id}):
         return {
             'success': False,
-            'message': 'Cannot connect with yourself'
+            'message': 'Profile not found'
         }
     
-    # Check for existing connection in either direction
-    existing_outgoing = UserConnection.query.filter_by(
-        requester_id=str(requester_id),
-        recipient_id=str(recipient_id)
-    ).first()
+    cache = get_cache('connection_distance', ttl=current_app.config.get('CONNECTION_DISTANCE_CACHE_TTL', 60))
+    key = (min(profile_id, other_id), max(profile_id, other_id), max_depth)
+    result = cache.get(key)
+    if result is None:
+        result = shortest_distance(
+            profile_id,
+            other_id,
+            max_depth,
+            current_app.config.get('CONNECTION_DISTANCE_VISIT_BUDGET', 50000)
+        )
+        cache.set(key, result)
     
-    existing_incoming = UserConnection.query.filter_by(
-        requester_id=str(recipient_id),
-        recipient_id=str(requester_id)
-    ).first()
+    return {
+        'success': True,
+        'max_depth': max_depth,
+        **result
+    }
+
+def get_connection_statuses(viewer_id: UUID, target_ids: List[str]) -> Dict[str, Any]:
+    """Get the viewer's connection status with each of many profiles
     
-    if existing_outgoing:
+    Both directions are resolved with one lookup on the unordered-pair
+    index.  Results are cached per viewer, target set and the viewer's
+    ``connection_generation``, so any change to the viewer's connections
+    makes older entries unreachable.
+    
+    Args:
+        viewer_id: UUID of the viewing user profile
+        target_ids: Profile IDs to report on
+        
+    Returns:
+        Dictionary with the viewer's generation and a status per target:
+        'self', 'none', 'connected', 'pending_outgoing', 'pending_incoming' or 'rejected'
+    """
+    viewer_id = str(viewer_id)
+    targets = sorted({str(UUID(str(t))) for t in target_ids})
+    max_ids = current_app.config.get('CONNECTIONS_STATUS_MAX', 200)
+    if len(targets) > max_ids:
         return {
             'success': False,
-            'message': f'Connection already exists with status: {existing_outgoing.status}'
+            'message': f'At most {max_ids} profiles can be looked up at once'
         }
     
-    if existing_incoming:
+    generation = db.session.execute(
+        db.select(UserProfile.connection_generation)
+        .where(UserProfile.id == viewer_id, UserProfile.deleted_at.is_(None))
+    ).scalar()
+    if generation is None:
         return {
             'success': False,
-            'message': f'Reverse connection already exists with status: {existing_incoming.status}'
+            'message': 'Profile not found'
         }
     
-    # Create new connection request
-    connection = UserConnection(
-        requester_id=str(requester_id),
-        recipient_id=str(recipient_id),
-        status='PENDING'
+    cache = get_cache('connection_status', ttl=current_app.config.get('CONNECTIONS_STATUS_CACHE_TTL', 300))
+    key = (viewer_id, generation, tuple(targets))
+    statuses = cache.get(key)
+    if statuses is None:
+        statuses = {t: {'status': 'none', 'connection_id': None} for t in targets}
+        if viewer_id in statuses:
+            statuses[viewer_id]['status'] = 'self'
+        
+        pairs = [(min(viewer_id, t), max(viewer_id, t)) for t in targets if t != viewer_id]
+        if pairs:
+            rows = db.session.execute(
+                db.select(UserConnection.id, UserConnection.requester_id, UserConnection.recipient_id, UserConnection.status)
+                .where(db.tuple_(*UserConnection.pair_key()).in_(pairs))
+            ).all()
+            for row in rows:
+                outgoing = str(row.requester_id) == viewer_id
+                other = str(row.recipient_id) if outgoing else str(row.requester_id)
+                if row.status == 'ACCEPTED':
+                    status = 'connected'
+                elif row.status == 'PENDING':
+                    status = 'pending_outgoing' if outgoing else 'pending_incoming'
+                else:
+                    status = 'rejected'
+                statuses[other] = {'status': status, 'connection_id': str(row.id)}
+        cache.set(key, statuses)
+    
+    return {
+        'success': True,
+        'generation': generation,
+        'statuses': statuses
+    }
+
+# Denormalized counter deltas per profile: (accepted, pending incoming, pending outgoing)
+COUNTER_COLUMNS = ('connections_count', 'pending_incoming_count', 'pending_outgoing_count')
+
+def _adjust_connection_counters(deltas: Dict[str, tuple]) -> None:
+    """Apply counter deltas to several profiles in one UPDATE
+    
+    Every profile in *deltas* also gets its ``connection_generation`` bumped,
+    even when its counters are unchanged.  Must run in the same transaction
+    as the connection change it reflects.
+    
+    Args:
+        deltas: Mapping of profile ID to a tuple of deltas in COUNTER_COLUMNS order
+    """
+    deltas = {str(k): v for k, v in deltas.items()}
+    if not deltas:
+        return
+    profiles = UserProfile.__table__
+    values = {'connection_generation': profiles.c.connection_generation + 1}
+    for index, column in enumerate(COUNTER_COLUMNS):
+        per_profile = {pid: delta[index] for pid, delta in deltas.items() if delta[index]}
+        if per_profile:
+            values[column] = profiles.c[column] + db.case(per_profile, value=profiles.c.id, else_=0)
+    db.session.execute(
+        db.update(profiles).where(profiles.c.id.in_(list(deltas))).values(**values)
     )
+
+def _status_change_deltas(requester_id, recipient_id, old_status: str, new_status: Optional[str]) -> Dict[str, tuple]:
+    """Counter deltas for a connection moving from *old_status* to *new_status* (None = deleted)"""
+    def weight(status):
+        # (accepted, pending) contribution of a connection in this status
+        return (1 if status == 'ACCEPTED' else 0, 1 if status == 'PENDING' else 0)
+    (old_acc, old_pen), (new_acc, new_pen) = weight(old_status), weight(new_status)
+    accepted, pending = new_acc - old_acc, new_pen - old_pen
+    return {
+        str(requester_id): (accepted, 0, pending),
+        str(recipient_id): (accepted, pending, 0),
+    }
+
+def _record_tombstones(deleted: List[tuple]) -> None:
+    """Insert tombstones for deleted (connection_id, requester_id, recipient_id) rows
     
-    db.session.add(connection)
+    Must run in the same transaction as the delete so change feeds never miss it.
+    """
+    if not deleted:
+        return
+    now = datetime.utcnow()
+    db.session.execute(db.insert(ConnectionTombstone.__table__), [
+        {
+            'connection_id': str(connection_id),
+            'requester_id': str(requester_id),
+            'recipient_id': str(recipient_id),
+            'deleted_at': now
+        }
+        for connection_id, requester_id, recipient_id in deleted
+    ])
+
+def request_connection(requester_id: UUID, recipient_id: UUID) -> Dict[str, Any]:
+    """Request a connection between two users
+    
+    The happy path is a single statement: an INSERT ... SELECT that only
+    produces a row when both profiles exist and are active, guarded by the
+    unordered-pair unique index with ON CONFLICT DO NOTHING, so concurrent
+    reciprocal requests cannot both succeed.  Only when nothing is inserted
+    is the database consulted again, to explain why.
+    
+    Args:
+        requester_id: UUID of the requesting user
+        recipient_id: UUID of the recipient user
+        
+    Returns:
+        Dictionary with success status and connection data
+    """
+    # Prevent self-connections
+    if str(requester_id) == str(recipient_id):
+        return {
+            'success': False,
+            'message': 'Cannot connect with yourself'
+        }
+    
+    connections = UserConnection.__table__
+    profiles = UserProfile.__table__
+    now = datetime.utcnow()
+    
+    def active_profile(profile_id):
+        return db.exists().where(profiles.c.id == str(profile_id), profiles.c.deleted_at == None)
+    
+    source = db.select(
+        db.literal(str(uuid4()), db.String),
+        db.literal(str(requester_id), db.String),
+        db.literal(str(recipient_id), db.String),
+        db.literal('PENDING', db.String),
+        db.literal(now, db.DateTime),
+        db.literal(now, db.DateTime)
+    ).where(active_profile(requester_id), active_profile(recipient_id))
+    
+    stmt = (
+        dialect_insert(connections)
+        .from_select(
+            ['id', 'requester_id', 'recipient_id', 'status', 'created_at', 'updated_at'],
+            source
+        )
+        .on_conflict_do_nothing()
+        .returning(*connections.c)
+    )
+    row = db.session.execute(stmt).first()
+    if row is None:
+        db.session.commit()
+        return _explain_rejected_request(requester_id, recipient_id)
+    
+    _adjust_connection_counters(_status_change_deltas(requester_id, recipient_id, None, 'PENDING'))
     db.session.commit()
     
     return {
         'success': True,
         'message': 'Connection request sent',
-        'connection': connection.to_dict()
+        'connection': _connection_row_to_dict(row)
+    }
+
+def _explain_rejected_request(requester_id: UUID, recipient_id: UUID) -> Dict[str, Any]:
+    """Map a request that inserted nothing to the matching error message"""
+    active_ids = {
+        str(profile_id) for (profile_id,) in db.session.execute(
+            db.select(UserProfile.id).where(
+                UserProfile.id.in_([str(requester_id), str(recipient_id)]),
+                UserProfile.deleted_at == None
+            )
+        )
+    }
+    if str(requester_id) not in active_ids:
+        return {
+            'success': False,
+            'message': 'Requester profile not found'
+        }
+    if str(recipient_id) not in active_ids:
+        return {
+            'success': False,
+            'message': 'Recipient profile not found'
+        }
+    
+    existing = UserConnection.query.filter(
+        db.or_(
+            db.and_(UserConnection.requester_id == str(requester_id), UserConnection.recipient_id == str(recipient_id)),
+            db.and_(UserConnection.requester_id == str(recipient_id), UserConnection.recipient_id == str(requester_id))
+        )
+    ).first()
+    if existing and str(existing.requester_id) == str(requester_id):
+        return {
+            'success': False,
+            'message': f'Connection already exists with status: {existing.status}'
+        }
+    if existing:
+        return {
+            'success': False,
+            'message': f'Reverse connection already exists with status: {existing.status}'
+        }
+    
+    # The conflicting row was deleted between the insert and this check
+    return {
+        'success': False,
+        'message': 'Connection request conflicted with a concurrent change, please retry'
     }
 
 def update_connection_status(
@@ -163,9 +630,25 @@ def update_connection_status(
             'message': f'Cannot update a connection with status: {connection.status}'
         }
     
-    # Update status
-    connection.status = status
+    # Update status; the PENDING guard makes concurrent updates count once
+    updated = db.session.execute(
+        db.update(UserConnection.__table__)
+        .where(UserConnection.id == str(connection_id), UserConnection.status == 'PENDING')
+        .values(status=status, updated_at=datetime.utcnow())
+    )
+    if updated.rowcount == 0:
+        db.session.rollback()
+        return {
+            'success': False,
+            'message': 'Connection was updated concurrently, please retry'
+        }
+    _adjust_connection_counters(
+        _status_change_deltas(connection.requester_id, connection.recipient_id, 'PENDING', status)
+    )
     db.session.commit()
+    record_connection_change(connection.requester_id, connection.recipient_id, status == 'ACCEPTED')
+    if status == 'ACCEPTED':
+        mark_suggestions_stale([connection.recipient_id, connection.requester_id])
     
     return {
         'success': True,
@@ -201,10 +684,233 @@ def delete_connection(profile_id: UUID, connection_id: UUID) -> Dict[str, Any]:
             'message': 'You are not authorized to delete this connection'
         }
     
-    db.session.delete(connection)
+    requester_id, recipient_id = connection.requester_id, connection.recipient_id
+    
+    # RETURNING reports the status at deletion time, so counters stay exact
+    # even if the status changed after the row was loaded
+    deleted = db.session.execute(
+        db.delete(UserConnection.__table__)
+        .where(UserConnection.id == str(connection_id))
+        .returning(UserConnection.status)
+    ).first()
+    if deleted is None:
+        db.session.rollback()
+        return {
+            'success': False,
+            'message': 'Connection not found'
+        }
+    _record_tombstones([(str(connection_id), requester_id, recipient_id)])
+    _adjust_connection_counters(_status_change_deltas(requester_id, recipient_id, deleted.status, None))
     db.session.commit()
     
+    if deleted.status == 'ACCEPTED':
+        record_connection_change(requester_id, recipient_id, False)
+        mark_suggestions_stale([requester_id, recipient_id])
+    
     return {
         'success': True,
         'message': 'Connection deleted successfully'
-    }
\ No newline at end of file
+    }
+
+# Bulk action -> (new status or None to delete, outcome reported per connection)
+BULK_ACTIONS = {
+    'accept': ('ACCEPTED', 'accepted'),
+    'reject': ('REJECTED', 'rejected'),
+    'delete': (None, 'deleted'),
+}
+
+def bulk_update_connections(
+    profile_id: UUID,
+    action: str,
+    connection_ids: Optional[List[str]] = None,
+    pending_before: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Accept, reject or delete many pending requests addressed to a user
+    
+    The change is applied as one set-based UPDATE/DELETE restricted to
+    PENDING connections whose recipient is *profile_id*.  IDs that were not
+    affected are classified with a single follow-up query.
+    
+    Args:
+        profile_id: UUID of the user profile (must be the recipient)
+        action: 'accept', 'reject' or 'delete'
+        connection_ids: Connection IDs to act on
+        pending_before: Act on every pending request created before this time instead
+        
+    Returns:
+        Dictionary with a per-connection outcome
+    """
+    if action not in BULK_ACTIONS:
+        return {
+            'success': False,
+            'message': f'Action must be one of {", ".join(BULK_ACTIONS)}'
+        }
+    if (connection_ids is None) == (pending_before is None):
+        return {
+            'success': False,
+            'message': 'Provide either connection_ids or pending_before'
+        }
+    
+    if connection_ids is not None:
+        try:
+            connection_ids = list(dict.fromkeys(str(UUID(str(c))) for c in connection_ids))
+        except ValueError:
+            return {
+                'success': False,
+                'message': 'Invalid connection ID'
+            }
+        max_ids = current_app.config.get('CONNECTIONS_BULK_MAX', 500)
+        if len(connection_ids) > max_ids:
+            return {
+                'success': False,
+                'message': f'At most {max_ids} connections can be updated at once'
+            }
+    
+    connections = UserConnection.__table__
+    criteria = [
+        connections.c.recipient_id == str(profile_id),
+        connections.c.status == 'PENDING'
+    ]
+    if connection_ids is not None:
+        criteria.append(connections.c.id.in_(connection_ids))
+    else:
+        criteria.append(connections.c.created_at < pending_before)
+    
+    new_status, outcome = BULK_ACTIONS[action]
+    if new_status:
+        stmt = (
+            db.update(connections)
+            .where(*criteria)
+            .values(status=new_status, updated_at=datetime.utcnow())
+        )
+    else:
+        stmt = db.delete(connections).where(*criteria)
+    affected = db.session.execute(
+        stmt.returning(connections.c.id, connections.c.requester_id)
+    ).all()
+    
+    if new_status is None:
+        _record_tombstones([(row.id, row.requester_id, profile_id) for row in affected])
+    
+    deltas = {}
+    for row in affected:
+        for pid, delta in _status_change_deltas(row.requester_id, profile_id, 'PENDING', new_status).items():
+            deltas[pid] = tuple(a + b for a, b in zip(deltas.get(pid, (0, 0, 0)), delta))
+    _adjust_connection_counters(deltas)
+    db.session.commit()
+    
+    results = {str(row.id): outcome for row in affected}
+    
+    # Explain the IDs that were skipped
+    if connection_ids is not None:
+        skipped = [c for c in connection_ids if c not in results]
+        if skipped:
+            rows = db.session.execute(
+                db.select(connections.c.id, connections.c.recipient_id, connections.c.status)
+                .where(connections.c.id.in_(skipped))
+            ).all()
+            found = {str(row.id): row for row in rows}
+            for connection_id in skipped:
+                row = found.get(connection_id)
+                if row is None or str(row.recipient_id) != str(profile_id):
+                    results[connection_id] = 'not_found'
+                else:
+                    results[connection_id] = 'not_pending'
+    
+    if new_status == 'ACCEPTED':
+        for row in affected:
+            record_connection_change(row.requester_id, profile_id, True)
+        mark_suggestions_stale([profile_id, *(row.requester_id for row in affected)])
+    
+    if affected:
+        publish_event('connection.bulk_updated', {
+            'profile_id': str(profile_id),
+            'action': action,
+            'connections': [
+                {'id': str(row.id), 'requester_id': str(row.requester_id)} for row in affected
+            ]
+        })
+    
+    return {
+        'success': True,
+        'message': f'{len(affected)} connection(s) {outcome}',
+        'results': results
+    }
+
+def reconcile_connection_counters(batch_size: int = 1000) -> int:
+    """Recompute denormalized connection counters and repair any drift
+    
+    Profiles are walked in ID order in batches; each batch's true counts
+    come from one grouped query and only mismatching rows are updated.
+    The batch's profile rows are locked before counting, so a live
+    connection change cannot commit an increment between the count and
+    the write and have it overwritten; it waits and applies on top.
+    
+    Args:
+        batch_size: Number of profiles checked per transaction
+        
+    Returns:
+        Number of profiles whose counters were corrected
+    """
+    connections = UserConnection.__table__
+    profiles = UserProfile.__table__
+    repaired = 0
+    last_id = None
+    
+    while True:
+        stmt = (
+            db.select(profiles.c.id, *[profiles.c[c] for c in COUNTER_COLUMNS])
+            .order_by(profiles.c.id)
+            .limit(batch_size)
+            .with_for_update()
+        )
+        if last_id is not None:
+            stmt = stmt.where(profiles.c.id > last_id)
+        batch = db.session.execute(stmt).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        ids = [row.id for row in batch]
+        
+        # (profile, status, direction) -> count for this batch, in one pass
+        per_side = db.union_all(
+            db.select(
+                connections.c.requester_id.label('profile_id'),
+                connections.c.status,
+                db.literal('out').label('side')
+            ).where(connections.c.requester_id.in_(ids)),
+            db.select(
+                connections.c.recipient_id.label('profile_id'),
+                connections.c.status,
+                db.literal('in').label('side')
+            ).where(connections.c.recipient_id.in_(ids))
+        ).subquery()
+        grouped = db.session.execute(
+            db.select(per_side.c.profile_id, per_side.c.status, per_side.c.side, db.func.count())
+            .group_by(per_side.c.profile_id, per_side.c.status, per_side.c.side)
+        ).all()
+        
+        actual = {pid: [0, 0, 0] for pid in ids}
+        for pid, status, side, count in grouped:
+            if status == 'ACCEPTED':
+                actual[pid][0] += count
+            elif status == 'PENDING':
+                actual[pid][1 if side == 'in' else 2] += count
+        
+        keys = ['b_id'] + [f'b_{c}' for c in COUNTER_COLUMNS]
+        fixes = [
+            dict(zip(keys, (row.id, *actual[row.id])))
+            for row in batch
+            if tuple(row[1:]) != tuple(actual[row.id])
+        ]
+        if fixes:
+            db.session.execute(
+                db.update(profiles)
+                .where(profiles.c.id == db.bindparam('b_id'))
+                .values(**{c: db.bindparam(f'b_{c}') for c in COUNTER_COLUMNS}),
+                fixes
+            )
+            repaired += len(fixes)
+        db.session.commit()
+    
+    return repaired
@@ -1,9 +1,102 @@
+import re
 from typing import Dict, Optional, List, Any
 from uuid import UUID
+from sqlalchemy.exc import IntegrityError
 from app import db
-from app.models.expertise import ExpertiseArea
+from app.models.expertise import ExpertiseArea, ExpertiseDomain, ExpertiseDomainAlias
 from app.models.profile import UserProfile
 
+def normalize_domain_slug(name: str) -> str:
+    """Return the case-folded slug used to match expertise domains
+    
+    Runs of whitespace and punctuation collapse to a single hyphen, so
+    "Machine  Learning", "machine-learning" and "MACHINE_LEARNING" share a slug.
+    """
+    return re.sub(r'[\W_]+', '-', (name or '').casefold()).strip('-')
+
+def domain_ids_for_slug(slug: str):
+    """Return a select of domain IDs matching *slug* directly or via an alias"""
+    return db.select(ExpertiseDomain.id).where(ExpertiseDomain.slug == slug).union(
+        db.select(ExpertiseDomainAlias.domain_id).where(ExpertiseDomainAlias.slug == slug)
+    )
+
+def resolve_expertise_domain(name: str) -> Optional[ExpertiseDomain]:
+    """Return the canonical domain for *name*, creating it if it is unknown
+    
+    Args:
+        name: Domain name as entered by the user
+        
+    Returns:
+        The ExpertiseDomain, or None if the name has no usable characters
+    """
+    slug = normalize_domain_slug(name)
+    if not slug:
+        return None
+    
+    domain_id = db.session.execute(domain_ids_for_slug(slug)).scalars().first()
+    if domain_id:
+        return db.session.get(ExpertiseDomain, domain_id)
+    
+    domain = ExpertiseDomain(slug=slug, name=name.strip()[:100])
+    try:
+        # Savepoint so a concurrent insert of the same slug does not abort
+        # the caller's transaction
+        with db.session.begin_nested():
+            db.session.add(domain)
+    except IntegrityError:
+        domain = ExpertiseDomain.query.filter_by(slug=slug).first()
+    return domain
+
+def add_domain_alias(domain_name: str, alias: str) -> Dict[str, Any]:
+    """Register *alias* as an alternative name for a canonical domain
+    
+    Args:
+        domain_name: Name (or existing alias) of the canonical domain
+        alias: Alternative name to resolve to that domain
+        
+    Returns:
+        Dictionary with success status and domain data
+    """
+    alias_slug = normalize_domain_slug(alias)
+    if not alias_slug:
+        return {
+            'success': False,
+            'message': 'Alias must contain letters or digits'
+        }
+    
+    domain = resolve_expertise_domain(domain_name)
+    if not domain:
+        return {
+            'success': False,
+            'message': 'Domain must contain letters or digits'
+        }
+    
+    if alias_slug == domain.slug:
+        db.session.commit()
+        return {
+            'success': True,
+            'message': 'Alias matches the canonical domain',
+            'domain': domain.to_dict()
+        }
+    
+    conflict = db.session.execute(domain_ids_for_slug(alias_slug)).scalars().first()
+    if conflict and conflict != domain.id:
+        db.session.rollback()
+        return {
+            'success': False,
+            'message': f'{alias} already refers to another domain'
+        }
+    
+    if not conflict:
+        db.session.add(ExpertiseDomainAlias(slug=alias_slug, domain_id=domain.id))
+    db.session.commit()
+    
+    return {
+        'success': True,
+        'message': 'Alias added successfully',
+        'domain': domain.to_dict()
+    }
+
 def get_expertise_areas(profile_id: UUID) -> Dict[str, Any]:
     """Get all expertise areas for a user
     
@@ -51,22 +144,31 @@ def add_expertise_area(profile_id: UUID, data: Dict[str, Any]) -> Dict[str, Any]
             'message': 'Domain and level are required'
         }
     
+    domain = resolve_expertise_domain(data['domain'])
+    if not domain:
+        return {
+            'success': False,
+            'message': 'Domain must contain letters or digits'
+        }
+    
     # Check if domain already exists for this user
     existing = ExpertiseArea.query.filter_by(
         user_id=str(profile_id), 
-        domain=data['domain']
+        domain_id=domain.id
     ).first()
     
     if existing:
+        db.session.rollback()
         return {
             'success': False,
-            'message': f'Expertise in {data["domain"]} already exists for this user'
+            'message': f'Expertise in {domain.name} already exists for this user'
         }
     
     # Create new expertise area
     expertise = ExpertiseArea(
         user_id=str(profile_id),
-        domain=data['domain'],
+        domain=domain.name,
+        domain_id=domain.id,
         level=data['level'],
         years_experience=data.get('years_experience')
     )
@@ -113,7 +215,28 @@ def update_expertise_area(profile_id: UUID, expertise_id: UUID, data: Dict[str,
     
     # Update expertise fields
     if 'domain' in data:
-        expertise.domain = data['domain']
+        domain = resolve_expertise_domain(data['domain'])
+        if not domain:
+            return {
+                'success': False,
+                'message': 'Domain must contain letters or digits'
+            }
+        
+        duplicate = (
+            ExpertiseArea.query
+            .filter_by(user_id=str(profile_id), domain_id=domain.id)
+            .filter(ExpertiseArea.id != expertise.id)
+            .first()
+        )
+        if duplicate:
+            db.session.rollback()
+            return {
+                'success': False,
+                'message': f'Expertise in {domain.name} already exists for this user'
+            }
+        
+        expertise.domain = domain.name
+        expertise.domain_id = domain.id
     if 'level' in data:
         expertise.level = data['level']
     if 'years_experience' in data:
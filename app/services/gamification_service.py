@@ -1,8 +1,21 @@
-from datetime import datetime
+import uuid
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy.orm import joinedload
 from app import db
 from app.models.user import User
-from app.models.gamification import Points, Badge, UserBadge
+from app.models.gamification import Badge, Points, PointsDaily, UserBadge
+from app.services.achievements import PointEvent, get_achievement_engine
+from app.services.badge_catalog import get_badge_catalog
+from app.services.leaderboard import record_points, record_points_many
+from app.services.user_sync import missing_users_cache
 from app.utils.auth_client import get_user_basic
+from app.utils.cache import get_cache
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.sql import DATE_BUCKETS, date_bucket, dialect_insert
+
+class InvalidAwardError(ValueError):
+    """A point award that can never be applied as given"""
 
 class GamificationService:
     def __init__(self):
@@ -11,111 +24,547 @@ class GamificationService:
         
     def add_points(self, user_id, points, reason):
         """Add points to user's total"""
+        success, message, _ = self.add_points_with_progress(user_id, points, reason)
+        return success, message
+    
+    def add_points_with_progress(self, user_id, points, reason):
+        """Add points and return the resulting progress
+        
+        Level and total come from the accrual's ``RETURNING`` row, so the
+        user is not reloaded; only the badges are read, with one query.
+        
+        Returns:
+            Tuple of (success, message, progress)
+        """
         try:
-            user = self._get_or_create_user(user_id)
-            if not user:
-                return False, "User not found"
-            
-            # Create points record
-            points_record = Points(
-                user_id=user_id,
-                amount=points,
-                reason=reason,
-                created_at=datetime.utcnow()
-            )
-            db.session.add(points_record)
+            state = self._accrue_points(user_id, points, reason)
+            if state is None:
+                return False, "User not found", None
+            db.session.commit()
+            record_points(user_id, state['total_points'], points)
+            progress = self._progress(state['level'], state['total_points'], self.get_user_badges(user_id))
+            return True, "Points added successfully", progress
+        except Exception as e:
+            db.session.rollback()
+            return False, str(e), None
+    
+    def add_points_bulk(self, awards, chunk_size=1000):
+        """Record many point awards in one transaction
+        
+        Each award is a dict with ``user_id``, ``points``, ``reason`` and an
+        optional ``idempotency_key``.  Ledger rows are inserted in multi-row
+        chunks that skip keys already recorded (including repeats within the
+        batch), then totals are applied with one aggregated UPDATE and every
+        crossed level badge and achievement is awarded with one INSERT.  Keys are remembered
+        only as long as their ledger rows, i.e. until they are compacted.
+        
+        Users must already exist (they are provisioned from auth events);
+        awards for unknown users are skipped, not recorded, and their IDs
+        are reported so the awards can be resubmitted later.
+        
+        Returns:
+            Tuple of (success, message, summary with accepted/duplicates/users,
+            skipped and unknown_users)
+        """
+        try:
+            awards = [self.validate_award(award, index) for index, award in enumerate(awards)]
+        except ValueError as e:
+            return False, str(e), None
+        
+        try:
+            user_ids = {award['user_id'] for award in awards}
+            existing = set(db.session.execute(
+                db.select(User.id).where(User.id.in_(user_ids))
+            ).scalars()) if user_ids else set()
+            unknown_users = sorted(user_ids - existing)
+            submitted = len(awards)
+            awards = [award for award in awards if award['user_id'] in existing]
             
-            # Update user's total points
-            user.total_points += points
+            points = Points.__table__
+            now = datetime.utcnow()
+            deltas = {}
+            recorded = []
+            for start in range(0, len(awards), chunk_size):
+                rows = db.session.execute(
+                    dialect_insert(points)
+                    .values([
+                        {
+                            'id': str(uuid.uuid4()),
+                            'user_id': award['user_id'],
+                            'amount': award['points'],
+                            'reason': award['reason'],
+                            'idempotency_key': award['idempotency_key'],
+                            'created_at': now
+                        }
+                        for award in awards[start:start + chunk_size]
+                    ])
+                    .on_conflict_do_nothing()
+                    .returning(points.c.user_id, points.c.amount, points.c.reason)
+                )
+                for row in rows:
+                    deltas[row.user_id] = deltas.get(row.user_id, 0) + row.amount
+                    recorded.append(row)
+            accepted = len(recorded)
             
-            # Check for level up
-            self._check_level_up(user)
+            totals = []
+            if deltas:
+                catalog = get_badge_catalog()
+                badges = []
+                new_totals = {}
+                for row in self._increment_totals(deltas):
+                    new_totals[row.id] = row.total_points
+                    totals.append((row.id, row.total_points, deltas[row.id]))
+                    previous_level = self._level_before(row.total_points, deltas[row.id])
+                    badges.extend((row.id, badge) for badge in catalog.level_badges(previous_level, row.level))
+                # Replay the accepted rows in order to give every event its running total
+                running = {user_id: new_totals[user_id] - delta for user_id, delta in deltas.items()}
+                events = []
+                for row in recorded:
+                    running[row.user_id] += row.amount
+                    events.append(PointEvent(row.user_id, row.amount, row.reason, running[row.user_id], now.date()))
+                badges.extend(get_achievement_engine().evaluate(events))
+                self._award_user_badges(badges)
             
             db.session.commit()
-            return True, "Points added successfully"
+            record_points_many(totals)
+            return True, f"{accepted} award(s) recorded", {
+                'accepted': accepted,
+                'duplicates': len(awards) - accepted,
+                'users': len(deltas),
+                'skipped': submitted - len(awards),
+                'unknown_users': unknown_users
+            }
         except Exception as e:
             db.session.rollback()
-            return False, str(e)
+            return False, str(e), None
     
-    def _check_level_up(self, user):
-        """Check if user should level up based on points"""
-        current_level = user.level
-        new_level = min(user.total_points // self.points_per_level + 1, self.max_level)
-        
-        if new_level > current_level:
-            user.level = new_level
-            self._award_level_badge(user, new_level)
+    def validate_award(self, award, index=None):
+        """Normalize one award, raising InvalidAwardError (naming its position, if given)"""
+        prefix = '' if index is None else f"Award {index}: "
+        if not isinstance(award, dict):
+            raise InvalidAwardError(f"{prefix}must be an object")
+        points = award.get('points')
+        if not isinstance(points, int) or isinstance(points, bool) or points <= 0:
+            raise InvalidAwardError(f"{prefix}invalid points value")
+        if not award.get('user_id'):
+            raise InvalidAwardError(f"{prefix}user_id is required")
+        key = award.get('idempotency_key')
+        if key is not None and (not isinstance(key, str) or not key or len(key) > 255):
+            raise InvalidAwardError(f"{prefix}idempotency_key must be a non-empty string of at most 255 characters")
+        return {
+            'user_id': str(award['user_id']),
+            'points': points,
+            'reason': award.get('reason') or 'other',
+            'idempotency_key': key
+        }
+    
+    def _accrue_points(self, user_id, points, reason):
+        """Credit points, record them and apply any level-up in the current transaction
+        
+        The total is incremented by a single ``UPDATE ... RETURNING`` so
+        concurrent accruals for the same user never lose updates, and the
+        level is raised in the same statement.  The UPDATE runs first so the
+        row lock is taken before anything is read.
+        
+        Returns:
+            Dictionary with total_points, level and previous_level, or None if
+            the user does not exist and cannot be created
+        """
+        user_id = str(user_id)
+        row = self._increment_total(user_id, points)
+        if row is None:
+            if not self._get_or_create_user(user_id):
+                return None
+            row = self._increment_total(user_id, points)
+        
+        now = datetime.utcnow()
+        db.session.execute(db.insert(Points.__table__).values(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            amount=points,
+            reason=reason,
+            created_at=now
+        ))
+        
+        previous_level = self._level_before(row.total_points, points)
+        badges = [(user_id, badge) for badge in get_badge_catalog().level_badges(previous_level, row.level)]
+        badges.extend(get_achievement_engine().evaluate([
+            PointEvent(user_id, points, reason, row.total_points, now.date())
+        ]))
+        self._award_user_badges(badges)
+        
+        return {
+            'total_points': row.total_points,
+            'level': row.level,
+            'previous_level': previous_level
+        }
     
-    def _award_level_badge(self, user, level):
-        """Award level badge to user"""
-        badge = Badge.query.filter_by(
-            type='level',
-            requirement=str(level)
-        ).first()
-        
-        if badge and not UserBadge.query.filter_by(
-            user_id=user.id,
-            badge_id=badge.id
-        ).first():
-            user_badge = UserBadge(
-                user_id=user.id,
-                badge_id=badge.id,
-                awarded_at=datetime.utcnow()
+    def _increment_total(self, user_id, points):
+        """Atomically add *points* and raise the level; returns (id, total_points, level) or None"""
+        return self._increment_totals({user_id: points}).first()
+    
+    def _increment_totals(self, deltas):
+        """Add per-user point deltas and raise levels with one UPDATE
+        
+        Args:
+            deltas: Mapping of user ID to points to add
+            
+        Returns:
+            Result of (id, total_points, level) rows for the users that exist
+        """
+        users = User.__table__
+        deltas = {str(user_id): points for user_id, points in deltas.items()}
+        if len(deltas) == 1:
+            delta = next(iter(deltas.values()))
+        else:
+            delta = db.case(deltas, value=users.c.id, else_=0)
+        new_total = db.func.coalesce(users.c.total_points, 0) + delta
+        earned_level = db.case(
+            (new_total // self.points_per_level + 1 >= self.max_level, self.max_level),
+            else_=new_total // self.points_per_level + 1
+        )
+        current_level = db.func.coalesce(users.c.level, 1)
+        return db.session.execute(
+            db.update(users)
+            .where(users.c.id.in_(list(deltas)))
+            .values(
+                total_points=new_total,
+                level=db.case((earned_level > current_level, earned_level), else_=current_level)
             )
-            db.session.add(user_badge)
+            .returning(users.c.id, users.c.total_points, users.c.level)
+        )
+    
+    def _level_before(self, total_points, points):
+        """Level implied by the total before *points* were added"""
+        return min(max((total_points - points) // self.points_per_level + 1, 1), self.max_level)
+    
+    def _award_badges(self, user_id, badges):
+        """Award *badges* to one user, skipping ones the user already has
+        
+        Returns:
+            IDs of the badges that were newly awarded
+        """
+        return {badge_id for _, badge_id in self._award_user_badges([(user_id, badge) for badge in badges])}
+    
+    def _award_user_badges(self, awards):
+        """Award (user_id, badge) pairs with one multi-row INSERT ignoring duplicates
+        
+        Returns:
+            (user_id, badge_id) pairs that were newly awarded
+        """
+        if not awards:
+            return set()
+        now = datetime.utcnow()
+        user_badges = UserBadge.__table__
+        rows = db.session.execute(
+            dialect_insert(user_badges)
+            .values([
+                {'id': str(uuid.uuid4()), 'user_id': str(user_id), 'badge_id': badge.id, 'awarded_at': now}
+                for user_id, badge in awards
+            ])
+            .on_conflict_do_nothing()
+            .returning(user_badges.c.user_id, user_badges.c.badge_id)
+        )
+        return {(str(user_id), str(badge_id)) for user_id, badge_id in rows}
     
     def get_user_progress(self, user_id):
         """Get user's gamification progress"""
-        user = self._get_or_create_user(user_id)
-        if not user:
-            return None
+        user = db.session.execute(
+            db.select(User)
+            .options(joinedload(User.user_badges).joinedload(UserBadge.badge))
+            .where(User.id == str(user_id))
+            .execution_options(populate_existing=True)
+        ).unique().scalar_one_or_none()
+        if user is None:
+            user = self._get_or_create_user(user_id)
+            if not user:
+                return None
+        badges = [ub.badge.to_dict() for ub in sorted(user.user_badges, key=lambda ub: ub.awarded_at or datetime.min)]
+        return self._progress(user.level, user.total_points, badges)
+    
+    def get_user_badges(self, user_id):
+        """Get a user's badges, oldest award first, with one joined query
         
+        Returns:
+            List of badge dictionaries, or None if the user does not exist
+            and cannot be created
+        """
+        rows = db.session.execute(
+            db.select(User.id, Badge)
+            .outerjoin(UserBadge, UserBadge.user_id == User.id)
+            .outerjoin(Badge, Badge.id == UserBadge.badge_id)
+            .where(User.id == str(user_id))
+            .order_by(UserBadge.awarded_at)
+        ).all()
+        if not rows:
+            return [] if self._get_or_create_user(user_id) else None
+        return [badge.to_dict() for _, badge in rows if badge is not None]
+    
+    def _progress(self, level, total_points, badges):
         # Points thresholds for the *start* of current and next levels
-        current_level_points = (user.level - 1) * self.points_per_level
-        next_level_points = user.level * self.points_per_level
+        current_level_points = (level - 1) * self.points_per_level
+        next_level_points = level * self.points_per_level
 
         # Clamp to [0, 100]
-        progress = max(0, min(100, (user.total_points - current_level_points) / self.points_per_level * 100))
+        progress = max(0, min(100, (total_points - current_level_points) / self.points_per_level * 100))
         
         return {
-            'level': user.level,
-            'total_points': user.total_points,
+            'level': level,
+            'total_points': total_points,
             'current_level_points': current_level_points,
             'next_level_points': next_level_points,
             'progress_percentage': progress,
-            'badges': [ub.badge.to_dict() for ub in user.user_badges]
+            'badges': badges
         }
     
     def award_badge(self, user_id, badge_type, requirement):
         """Award a specific badge to user"""
         try:
-            badge = Badge.query.filter_by(
-                type=badge_type,
-                requirement=requirement
-            ).first()
-            
+            badge = get_badge_catalog().get(badge_type, requirement)
             if not badge:
                 return False, "Badge not found", None
             
-            if UserBadge.query.filter_by(
-                user_id=user_id,
-                badge_id=badge.id
-            ).first():
+            if not self._award_badges(user_id, [badge]):
+                db.session.rollback()
                 return False, "User already has this badge", None
             
-            user_badge = UserBadge(
-                user_id=user_id,
-                badge_id=badge.id,
-                awarded_at=datetime.utcnow()
-            )
-            
-            db.session.add(user_badge)
             db.session.commit()
             return True, "Badge awarded successfully", badge.to_dict()
         except Exception as e:
             db.session.rollback()
             return False, str(e), None
 
+    # -------------------------------------------------------------------
+    # Ledger
+    # -------------------------------------------------------------------
+
+    def ledger_by_day(self, user_id=None, start=None, end=None):
+        """Select the points ledger as (user_id, day, reason, amount, count) rows
+        
+        Rollups in ``points_daily`` and raw ``points`` rows that have not been
+        compacted yet are combined, so callers never need to know which days
+        were compacted.  Raw rows are grouped per day and reason; a day can
+        appear in both sources while it is being compacted, so aggregate
+        over the result rather than assuming one row per key.
+        
+        Args:
+            user_id: Restrict to one user
+            start: First day to include
+            end: Day after the last one to include
+        """
+        points = Points.__table__
+        daily = PointsDaily.__table__
+        day = db.func.date(points.c.created_at)
+        raw = db.select(
+            points.c.user_id,
+            day.label('day'),
+            db.func.coalesce(points.c.reason, '').label('reason'),
+            db.func.sum(points.c.amount).label('amount'),
+            db.func.count().label('count')
+        ).group_by(points.c.user_id, day, db.func.coalesce(points.c.reason, ''))
+        rolled = db.select(daily.c.user_id, daily.c.day, daily.c.reason, daily.c.amount, daily.c.count)
+        
+        if user_id is not None:
+            raw = raw.where(points.c.user_id == str(user_id))
+            rolled = rolled.where(daily.c.user_id == str(user_id))
+        if start is not None:
+            raw = raw.where(points.c.created_at >= datetime.combine(start, datetime.min.time()))
+            rolled = rolled.where(daily.c.day >= start)
+        if end is not None:
+            raw = raw.where(points.c.created_at < datetime.combine(end, datetime.min.time()))
+            rolled = rolled.where(daily.c.day < end)
+        return db.union_all(rolled, raw).subquery('ledger')
+
+    def get_points_history(self, user_id, start=None, end=None):
+        """Return a user's points per day and reason, oldest first"""
+        ledger = self.ledger_by_day(user_id, start, end)
+        rows = db.session.execute(
+            db.select(
+                ledger.c.day,
+                ledger.c.reason,
+                db.func.sum(ledger.c.amount).label('amount'),
+                db.func.sum(ledger.c.count).label('count')
+            )
+            .group_by(ledger.c.day, ledger.c.reason)
+            .order_by(ledger.c.day, ledger.c.reason)
+        ).all()
+        return [
+            {
+                'day': row.day.isoformat() if isinstance(row.day, date) else row.day,
+                'reason': row.reason or None,
+                'amount': int(row.amount),
+                'count': int(row.count)
+            }
+            for row in rows
+        ]
+
+    def get_points_buckets(self, user_id, bucket='day', start=None, end=None, cursor=None, limit=None,
+                           by_reason=False):
+        """Return a user's points aggregated per day, week or month, oldest first
+        
+        Buckets are aggregated in SQL over the daily ledger.  Buckets that
+        ended before the current one can no longer change, so that part of a
+        page is cached per worker; only the open bucket is queried every time.
+        
+        Args:
+            user_id: ID of the user
+            bucket: 'day', 'week' (starting Monday) or 'month'
+            start: First day to include (default: ``POINTS_HISTORY_DEFAULT_DAYS`` ago)
+            end: Last day to include (default: today)
+            cursor: Opaque cursor returned as ``next_cursor`` by the previous page
+            limit: Maximum number of buckets to return
+            by_reason: Break every bucket down per reason
+        
+        Returns:
+            Tuple of (success, message, data with buckets and next_cursor)
+        """
+        if bucket not in DATE_BUCKETS:
+            return False, f"Bucket must be one of {', '.join(DATE_BUCKETS)}", None
+        config = current_app.config
+        today = datetime.utcnow().date()  # ledger rows are stamped in UTC
+        end = (end or today) + timedelta(days=1)
+        start = start or today - timedelta(days=config.get('POINTS_HISTORY_DEFAULT_DAYS', 90))
+        if start >= end:
+            return False, "from must not be after to", None
+        max_limit = config.get('POINTS_HISTORY_MAX_BUCKETS', 366)
+        limit = max_limit if limit is None else max(1, min(limit, max_limit))
+        if cursor:
+            try:
+                after = date.fromisoformat(decode_cursor(cursor, 1)[0])
+            except (TypeError, ValueError):
+                return False, "Invalid cursor", None
+            start = max(start, self._next_bucket(bucket, after))
+        
+        user_id = str(user_id)
+        open_start = self._bucket_start(bucket, today)
+        buckets = []
+        if start < min(end, open_start):
+            key = (user_id, bucket, start, min(end, open_start), limit + 1, by_reason)
+            cache = get_cache('points_history', ttl=config.get('POINTS_HISTORY_CACHE_TTL', 3600))
+            closed = cache.get(key)
+            if closed is None:
+                closed = self._aggregate_buckets(user_id, bucket, start, min(end, open_start), limit + 1, by_reason)
+                cache.set(key, closed)
+            buckets.extend(closed)
+        if len(buckets) <= limit and max(start, open_start) < end:
+            buckets.extend(self._aggregate_buckets(
+                user_id, bucket, max(start, open_start), end, limit + 1 - len(buckets), by_reason
+            ))
+        
+        next_cursor = encode_cursor(buckets[limit - 1]['start']) if len(buckets) > limit else None
+        return True, "History retrieved successfully", {
+            'bucket': bucket,
+            'buckets': buckets[:limit],
+            'next_cursor': next_cursor
+        }
+
+    def _aggregate_buckets(self, user_id, bucket, start, end, limit, by_reason):
+        """Aggregate the ledger of [start, end) into at most *limit* buckets"""
+        def iso(value):
+            return value.isoformat() if isinstance(value, date) else value
+        
+        ledger = self.ledger_by_day(user_id, start, end)
+        bucket_start = date_bucket(bucket, ledger.c.day).label('bucket_start')
+        rows = db.session.execute(
+            db.select(
+                bucket_start,
+                db.func.sum(ledger.c.amount).label('amount'),
+                db.func.sum(ledger.c.count).label('count')
+            )
+            .group_by(bucket_start)
+            .order_by(bucket_start)
+            .limit(limit)
+        ).all()
+        buckets = [
+            {'start': iso(row.bucket_start), 'amount': int(row.amount), 'count': int(row.count)}
+            for row in rows
+        ]
+        if not by_reason or not buckets:
+            return buckets
+        
+        # Breakdown limited to the buckets on this page
+        last = date.fromisoformat(buckets[-1]['start'])
+        ledger = self.ledger_by_day(user_id, start, min(end, self._next_bucket(bucket, last)))
+        bucket_start = date_bucket(bucket, ledger.c.day).label('bucket_start')
+        by_bucket = {entry['start']: entry for entry in buckets}
+        for entry in buckets:
+            entry['reasons'] = []
+        for row in db.session.execute(
+            db.select(
+                bucket_start,
+                ledger.c.reason,
+                db.func.sum(ledger.c.amount).label('amount'),
+                db.func.sum(ledger.c.count).label('count')
+            )
+            .group_by(bucket_start, ledger.c.reason)
+            .order_by(bucket_start, ledger.c.reason)
+        ):
+            by_bucket[iso(row.bucket_start)]['reasons'].append(
+                {'reason': row.reason or None, 'amount': int(row.amount), 'count': int(row.count)}
+            )
+        return buckets
+
+    @staticmethod
+    def _bucket_start(bucket, day):
+        if bucket == 'week':
+            return day - timedelta(days=day.weekday())
+        if bucket == 'month':
+            return day.replace(day=1)
+        return day
+
+    @classmethod
+    def _next_bucket(cls, bucket, day):
+        start = cls._bucket_start(bucket, day)
+        if bucket == 'week':
+            return start + timedelta(days=7)
+        if bucket == 'month':
+            return (start + timedelta(days=32)).replace(day=1)
+        return start + timedelta(days=1)
+
+    def compact_points(self, older_than_days=90, batch_size=5000):
+        """Roll Points rows from before the cutoff day into ``points_daily``
+        
+        Each batch aggregates up to *batch_size* of the oldest rows into the
+        rollup (adding to existing rollup rows) and deletes them in the same
+        transaction, so a crash never double counts or loses points.
+        
+        Returns:
+            Number of Points rows compacted
+        """
+        cutoff = datetime.combine(datetime.utcnow().date() - timedelta(days=older_than_days), datetime.min.time())
+        points = Points.__table__
+        daily = PointsDaily.__table__
+        compacted = 0
+        
+        while True:
+            ids = db.session.execute(
+                db.select(points.c.id)
+                .where(points.c.created_at < cutoff)
+                .order_by(points.c.created_at)
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return compacted
+            
+            day = db.func.date(points.c.created_at)
+            reason = db.func.coalesce(points.c.reason, '')
+            rollup = (
+                db.select(points.c.user_id, day, reason, db.func.sum(points.c.amount), db.func.count())
+                .where(points.c.id.in_(ids))
+                .group_by(points.c.user_id, day, reason)
+            )
+            insert = dialect_insert(daily).from_select(['user_id', 'day', 'reason', 'amount', 'count'], rollup)
+            db.session.execute(insert.on_conflict_do_update(
+                index_elements=[daily.c.user_id, daily.c.day, daily.c.reason],
+                set_={
+                    'amount': daily.c.amount + insert.excluded.amount,
+                    'count': daily.c.count + insert.excluded.count
+                }
+            ))
+            db.session.execute(db.delete(points).where(points.c.id.in_(ids)))
+            db.session.commit()
+            compacted += len(ids)
+
     # -------------------------------------------------------------------
     # Internal helpers
     # -------------------------------------------------------------------
@@ -126,8 +575,16 @@ class GamificationService:
         if user:
             return user
 
+        # Users are normally pre-provisioned from auth events; skip IDs known not to exist
+        missing = missing_users_cache()
+        if str(user_id) in missing:
+            return None
+
         # Try to fetch minimal info from Auth Service; fall back to placeholders
         basic = get_user_basic(user_id)
+        if basic.get("not_found"):
+            missing.set(str(user_id), True)
+            return None
 
         try:
             user = User(
@@ -0,0 +1,157 @@
+"""Compact on-disk snapshot of the accepted-connection graph.
+
+A snapshot is a directory of three NumPy arrays in CSR layout:
+
+``ids.npy``
+    Profile UUIDs as ASCII bytes (``S36``), sorted, so a UUID's dense index
+    is found with a binary search instead of a per-process dictionary.
+``offsets.npy``
+    ``int64`` array of length ``n + 1``; the neighbours of user ``i`` are
+    ``neighbors[offsets[i]:offsets[i + 1]]``.
+``neighbors.npy``
+    ``int32`` dense neighbour indices, sorted within each row.
+
+Snapshots are written to a fresh ``snapshot-<timestamp>`` directory and
+published by atomically repointing the ``current`` symlink.  Readers open the
+arrays with ``np.load(mmap_mode='r')`` so every worker shares the page cache
+copy of the graph instead of building its own.
+"""
+import os
+import shutil
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+from flask import current_app
+from app import db
+from app.models.connection import UserConnection
+
+CURRENT = 'current'
+_FILES = ('ids', 'offsets', 'neighbors')
+
+
+class GraphSnapshot:
+    """Read-only view over a memory-mapped CSR snapshot"""
+
+    def __init__(self, path: str):
+        self.path = os.path.realpath(path)
+        self.ids = np.load(os.path.join(self.path, 'ids.npy'), mmap_mode='r')
+        self.offsets = np.load(os.path.join(self.path, 'offsets.npy'), mmap_mode='r')
+        self.neighbors = np.load(os.path.join(self.path, 'neighbors.npy'), mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def index_of(self, user_id) -> Optional[int]:
+        """Return the dense index of *user_id*, or None if it has no edges"""
+        key = str(user_id).encode('ascii')
+        position = int(np.searchsorted(self.ids, key))
+        if position < len(self.ids) and self.ids[position] == key:
+            return position
+        return None
+
+    def _row(self, index: int) -> np.ndarray:
+        return self.neighbors[self.offsets[index]:self.offsets[index + 1]]
+
+    def degree(self, user_id) -> int:
+        index = self.index_of(user_id)
+        return 0 if index is None else int(self.offsets[index + 1] - self.offsets[index])
+
+    def get_neighbors(self, user_id) -> List[str]:
+        """Return the UUIDs of *user_id*'s accepted connections at snapshot time"""
+        index = self.index_of(user_id)
+        if index is None:
+            return []
+        return [value.decode('ascii') for value in self.ids[self._row(index)]]
+
+    def are_connected(self, a, b) -> bool:
+        a_index, b_index = self.index_of(a), self.index_of(b)
+        if a_index is None or b_index is None:
+            return False
+        row = self._row(a_index)
+        position = int(np.searchsorted(row, b_index))
+        return position < len(row) and int(row[position]) == b_index
+
+
+def write_graph_snapshot(directory: str, batch_size: int = 10000, keep: int = 2) -> str:
+    """Stream accepted connections into a new CSR snapshot under *directory*
+
+    Args:
+        directory: Parent directory of the snapshots
+        batch_size: Rows fetched per round trip
+        keep: Snapshots to retain, including the new one; older ones are
+            removed (workers still mapping them keep their open pages)
+
+    Returns:
+        Path of the snapshot that ``current`` now points to
+    """
+    connections = UserConnection.__table__
+    rows = db.session.execute(
+        db.select(connections.c.requester_id, connections.c.recipient_id)
+        .where(connections.c.status == 'ACCEPTED')
+        .execution_options(yield_per=batch_size)
+    )
+
+    # Provisional dense IDs in first-seen order, remapped to sorted UUID order below
+    index: Dict[str, int] = {}
+    uuids: List[str] = []
+    sources, targets = array('i'), array('i')
+    for requester_id, recipient_id in rows:
+        pair = []
+        for user_id in (str(requester_id), str(recipient_id)):
+            position = index.get(user_id)
+            if position is None:
+                position = index[user_id] = len(uuids)
+                uuids.append(user_id)
+            pair.append(position)
+        sources.extend(pair)
+        targets.extend(pair[::-1])
+
+    ids = np.array(uuids, dtype='S36')
+    order = np.argsort(ids, kind='stable')
+    remap = np.empty(len(ids), dtype=np.int32)
+    remap[order] = np.arange(len(ids), dtype=np.int32)
+    ids = ids[order]
+
+    sources = remap[np.frombuffer(sources, dtype=np.int32)]
+    targets = remap[np.frombuffer(targets, dtype=np.int32)]
+    edge_order = np.lexsort((targets, sources))
+    neighbors = targets[edge_order]
+    offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=len(ids)), out=offsets[1:])
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"snapshot-{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}")
+    os.makedirs(path)
+    for name, values in zip(_FILES, (ids, offsets, neighbors)):
+        np.save(os.path.join(path, f'{name}.npy'), values)
+
+    link = os.path.join(directory, CURRENT)
+    staging = f'{link}.{os.getpid()}'
+    os.symlink(os.path.basename(path), staging)
+    os.replace(staging, link)
+
+    snapshots = sorted(name for name in os.listdir(directory) if name.startswith('snapshot-'))
+    for name in snapshots[:-keep]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    return path
+
+
+def get_graph_snapshot() -> Optional[GraphSnapshot]:
+    """Return the current snapshot from ``CONNECTION_GRAPH_SNAPSHOT_DIR``
+
+    The mapping is reopened when ``current`` has been repointed since it was
+    last loaded.  Returns None if no snapshot has been written.
+    """
+    directory = current_app.config.get('CONNECTION_GRAPH_SNAPSHOT_DIR')
+    if not directory:
+        return None
+    link = os.path.join(directory, CURRENT)
+    if not os.path.exists(link):
+        return None
+
+    path = os.path.realpath(link)
+    snapshot = current_app.extensions.get('graph_snapshot')
+    if snapshot is None or snapshot.path != path:
+        snapshot = current_app.extensions['graph_snapshot'] = GraphSnapshot(path)
+    return snapshot
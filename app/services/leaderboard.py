@@ -0,0 +1,221 @@
+"""Redis sorted-set leaderboards.
+
+``lb:global`` ranks users by ``total_points``.  Windowed boards rank users by
+points earned in the current ISO week (``lb:weekly:<year>-W<week>``) or
+calendar month (``lb:monthly:<year>-<month>``); their keys expire
+``LEADERBOARD_WINDOW_RETENTION_DAYS`` after the window closes.
+
+Boards are updated after every committed accrual.  The global board stores
+the absolute total returned by the accrual with ``ZADD GT``, so replays and
+out-of-order updates cannot move a score backwards.  ``flask
+rebuild-leaderboards`` repopulates the boards from the database.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from flask import current_app
+import redis
+from app import db
+from app.models.user import User
+from app.utils.redis_client import get_redis
+
+BOARDS = ('global', 'weekly', 'monthly')
+UNAVAILABLE = 'Leaderboards are unavailable'
+
+
+def _window(board: str, at: datetime):
+    """Return (key, window start, window end) of the *board* window containing *at*"""
+    if board == 'weekly':
+        year, week, weekday = at.isocalendar()
+        start = datetime(at.year, at.month, at.day) - timedelta(days=weekday - 1)
+        return f'lb:weekly:{year}-W{week:02d}', start, start + timedelta(days=7)
+    if board == 'monthly':
+        end = datetime(at.year + 1, 1, 1) if at.month == 12 else datetime(at.year, at.month + 1, 1)
+        return f'lb:monthly:{at.year}-{at.month:02d}', datetime(at.year, at.month, 1), end
+    return 'lb:global', None, None
+
+
+def _board_key(board: str, at: Optional[datetime] = None) -> str:
+    return _window(board, at or datetime.utcnow())[0]
+
+
+def record_points(user_id, total_points: int, points: int, at: Optional[datetime] = None) -> None:
+    """Reflect a committed accrual on every board (best effort)"""
+    record_points_many([(user_id, total_points, points)], at)
+
+
+def record_points_many(accruals: List[Tuple[Any, int, int]], at: Optional[datetime] = None) -> None:
+    """Reflect committed (user_id, total_points, points) accruals in one pipeline (best effort)"""
+    client = get_redis()
+    if client is None or not accruals:
+        return
+    at = at or datetime.utcnow()
+    retention = timedelta(days=current_app.config.get('LEADERBOARD_WINDOW_RETENTION_DAYS', 7))
+    windows = [_window(board, at) for board in ('weekly', 'monthly')]
+    try:
+        with client.pipeline(transaction=False) as pipe:
+            for user_id, total_points, points in accruals:
+                user_id = str(user_id)
+                pipe.zadd('lb:global', {user_id: total_points}, gt=True)
+                for key, _, _ in windows:
+                    pipe.zincrby(key, points, user_id)
+            for key, _, end in windows:
+                pipe.expireat(key, end + retention)
+            pipe.execute()
+    except redis.RedisError as exc:
+        current_app.logger.warning("Leaderboard update failed: %s", exc)
+
+
+def remove_from_leaderboards(user_ids: List[Any], at: Optional[datetime] = None) -> None:
+    """Drop deleted users from every current board (best effort)"""
+    client = get_redis()
+    if client is None or not user_ids:
+        return
+    members = [str(user_id) for user_id in user_ids]
+    try:
+        with client.pipeline(transaction=False) as pipe:
+            for board in BOARDS:
+                pipe.zrem(_board_key(board, at), *members)
+            pipe.execute()
+    except redis.RedisError as exc:
+        current_app.logger.warning("Leaderboard update failed: %s", exc)
+
+
+def _entries(rows, first_rank: int) -> List[Dict[str, Any]]:
+    """Attach ranks and usernames (one query) to (user_id, score) pairs"""
+    ids = [user_id for user_id, _ in rows]
+    usernames = dict(db.session.execute(
+        db.select(User.id, User.username).where(User.id.in_(ids))
+    ).all()) if ids else {}
+    return [
+        {'rank': first_rank + i, 'user_id': user_id, 'username': usernames.get(user_id), 'score': int(score)}
+        for i, (user_id, score) in enumerate(rows)
+    ]
+
+
+def _validate(board: str) -> Optional[Dict[str, Any]]:
+    if board not in BOARDS:
+        return {'success': False, 'message': f'Board must be one of {", ".join(BOARDS)}'}
+    if get_redis() is None:
+        return {'success': False, 'message': UNAVAILABLE}
+    return None
+
+
+def get_top(board: str = 'global', limit: Optional[int] = None) -> Dict[str, Any]:
+    """Get the top of a leaderboard
+
+    Args:
+        board: 'global', 'weekly' or 'monthly'
+        limit: Number of entries to return
+
+    Returns:
+        Dictionary with ranked entries
+    """
+    error = _validate(board)
+    if error:
+        return error
+    default = current_app.config.get('LEADERBOARD_SIZE', 10)
+    limit = default if limit is None else max(1, min(limit, current_app.config.get('LEADERBOARD_MAX_SIZE', 100)))
+    try:
+        rows = get_redis().zrevrange(_board_key(board), 0, limit - 1, withscores=True)
+    except redis.RedisError as exc:
+        current_app.logger.warning("Leaderboard read failed: %s", exc)
+        return {'success': False, 'message': UNAVAILABLE}
+    return {'success': True, 'board': board, 'entries': _entries(rows, 1)}
+
+
+def get_rank(user_id, board: str = 'global') -> Dict[str, Any]:
+    """Get a user's 1-based rank and score (both None when unranked)"""
+    error = _validate(board)
+    if error:
+        return error
+    key = _board_key(board)
+    try:
+        with get_redis().pipeline(transaction=False) as pipe:
+            pipe.zrevrank(key, str(user_id))
+            pipe.zscore(key, str(user_id))
+            rank, score = pipe.execute()
+    except redis.RedisError as exc:
+        current_app.logger.warning("Leaderboard read failed: %s", exc)
+        return {'success': False, 'message': UNAVAILABLE}
+    return {
+        'success': True,
+        'board': board,
+        'rank': None if rank is None else rank + 1,
+        'score': None if score is None else int(score)
+    }
+
+
+def get_around(user_id, board: str = 'global', radius: Optional[int] = None) -> Dict[str, Any]:
+    """Get the entries ranked just above and below a user"""
+    error = _validate(board)
+    if error:
+        return error
+    radius = 5 if radius is None else max(0, min(radius, current_app.config.get('LEADERBOARD_MAX_SIZE', 100) // 2))
+    key = _board_key(board)
+    client = get_redis()
+    try:
+        rank = client.zrevrank(key, str(user_id))
+        if rank is None:
+            return {'success': True, 'board': board, 'rank': None, 'entries': []}
+        start = max(0, rank - radius)
+        rows = client.zrevrange(key, start, rank + radius, withscores=True)
+    except redis.RedisError as exc:
+        current_app.logger.warning("Leaderboard read failed: %s", exc)
+        return {'success': False, 'message': UNAVAILABLE}
+    return {'success': True, 'board': board, 'rank': rank + 1, 'entries': _entries(rows, start + 1)}
+
+
+def rebuild_leaderboards(batch_size: int = 1000) -> int:
+    """Repopulate every current board from the database
+
+    Each board is streamed into a staging key with pipelined writes and
+    then renamed over the live key, so readers never see a partial board.
+
+    Returns:
+        Number of users on the global board
+    """
+    client = get_redis()
+    if client is None:
+        raise RuntimeError('Redis is not configured')
+
+    now = datetime.utcnow()
+    retention = timedelta(days=current_app.config.get('LEADERBOARD_WINDOW_RETENTION_DAYS', 7))
+
+    def load(key, rows, expire_at=None):
+        staging = f'{key}:rebuild'
+        client.delete(staging)
+        count = 0
+        pipe = client.pipeline(transaction=False)
+        for user_id, score in rows:
+            pipe.zadd(staging, {str(user_id): int(score)})
+            count += 1
+            if count % batch_size == 0:
+                pipe.execute()
+        pipe.execute()
+        if count:
+            client.rename(staging, key)
+            if expire_at:
+                client.expireat(key, expire_at)
+        else:
+            client.delete(key)
+        return count
+
+    users = User.__table__
+    written = load('lb:global', db.session.execute(
+        db.select(users.c.id, users.c.total_points)
+        .where(users.c.total_points > 0)
+        .execution_options(yield_per=batch_size)
+    ))
+
+    from app.services.gamification_service import GamificationService
+
+    # Windows start at midnight, so the daily ledger (rollups + raw rows) is exact
+    for board in ('weekly', 'monthly'):
+        key, start, end = _window(board, now)
+        ledger = GamificationService().ledger_by_day(start=start.date(), end=end.date())
+        load(key, db.session.execute(
+            db.select(ledger.c.user_id, db.func.sum(ledger.c.amount))
+            .group_by(ledger.c.user_id)
+            .execution_options(yield_per=batch_size)
+        ), end + retention)
+    return written
@@ -0,0 +1,203 @@
+"""Redis-backed queue of point events applied by ``flask gamification-worker``.
+
+Producers push validated JSON point events onto
+``gamification:points:queue``.  Every event carries an idempotency key
+(generated when the producer has none, scoped to the user when it has), so
+applying an event twice is a no-op.
+
+A worker moves up to ``batch_size`` events at a time into its own
+processing list (``gamification:points:processing:<consumer>``) with
+``LMOVE`` and applies them with :meth:`GamificationService.add_points_bulk`,
+which aggregates them per user into one ledger INSERT, one totals UPDATE and
+one badge INSERT.  The processing list is cleared only after the batch is
+committed; a worker that crashes picks its leftover batch up again on
+restart.  Users without a local row are created from the Auth Service, as
+on the synchronous path.  Events that can never be applied (malformed, or
+for users the Auth Service does not know) are moved to
+``gamification:points:dead``.
+"""
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from flask import current_app
+import redis
+from app.services.gamification_service import GamificationService, InvalidAwardError
+from app.services.user_sync import missing_users_cache
+from app.utils.redis_client import get_redis
+
+QUEUE_KEY = 'gamification:points:queue'
+DEAD_KEY = 'gamification:points:dead'
+
+
+def _processing_key(consumer: str) -> str:
+    return f'gamification:points:processing:{consumer}'
+
+
+def enqueue_points(user_id, points: int, reason: Optional[str],
+                   idempotency_key: Optional[str] = None) -> Optional[str]:
+    """Validate a point award and queue it for the worker
+
+    A caller-supplied *idempotency_key* is scoped to *user_id*, so one
+    user cannot claim a key another producer will use later.
+
+    Returns:
+        The event's idempotency key, or None if the queue is unavailable
+
+    Raises:
+        ValueError: If the award or key is invalid
+    """
+    if idempotency_key is None:
+        key = f'queued:{uuid.uuid4()}'
+    else:
+        prefix = f'user:{user_id}:'
+        if not isinstance(idempotency_key, str) or not idempotency_key:
+            raise ValueError('idempotency_key must be a non-empty string')
+        if len(prefix) + len(idempotency_key) > 255:
+            raise ValueError(f'idempotency_key must be at most {255 - len(prefix)} characters')
+        key = prefix + idempotency_key
+    event = GamificationService().validate_award({
+        'user_id': user_id,
+        'points': points,
+        'reason': reason,
+        'idempotency_key': key
+    })
+
+    client = get_redis()
+    if client is None:
+        return None
+    event['enqueued_at'] = datetime.utcnow().isoformat()
+    try:
+        client.lpush(QUEUE_KEY, json.dumps(event))
+    except redis.RedisError as exc:
+        current_app.logger.warning("Failed to queue points: %s", exc)
+        return None
+    return key
+
+
+def _dead_letter(client, raw: str, error: str) -> None:
+    current_app.logger.error("Dropping point event %s: %s", raw, error)
+    client.lpush(DEAD_KEY, json.dumps({'event': raw, 'error': error, 'failed_at': datetime.utcnow().isoformat()}))
+
+
+def _apply_for_new_users(client, service: GamificationService, awards: List[Dict[str, Any]], raws: List[str],
+                         unknown_users: List[str], summary: Dict[str, int]) -> None:
+    """Create users missing locally from the Auth Service and apply their awards
+
+    Awards of users the Auth Service does not know are dead-lettered.
+
+    Raises:
+        RuntimeError: If a user could not be resolved or the awards could not
+            be applied; the batch is retried
+    """
+    created, missing = set(), set()
+    for user_id in unknown_users:
+        if service._get_or_create_user(user_id) is not None:
+            created.add(user_id)
+        elif user_id in missing_users_cache():
+            missing.add(user_id)
+        else:
+            raise RuntimeError(f'Failed to resolve user {user_id}')
+
+    retry = [award for award in awards if award['user_id'] in created]
+    if retry:
+        success, message, result = service.add_points_bulk(retry)
+        if not success:
+            raise RuntimeError(f'Failed to apply point events: {message}')
+        summary['applied'] += result['accepted']
+        summary['duplicates'] += result['duplicates']
+    for award, raw in zip(awards, raws):
+        if award['user_id'] in missing:
+            _dead_letter(client, raw, 'user not found')
+            summary['dead'] += 1
+
+
+def process_points_batch(consumer: str = 'worker', batch_size: int = 500, timeout: float = 1.0) -> Dict[str, int]:
+    """Apply one batch of queued point events
+
+    Blocks up to *timeout* seconds (0: not at all) for the first event,
+    then takes whatever else is queued, up to *batch_size* events.
+
+    Returns:
+        Dictionary with the number of events applied, duplicates and dead-lettered
+
+    Raises:
+        RuntimeError: If Redis is not configured or the batch could not be
+            applied; the batch stays in the processing list and is retried
+    """
+    client = get_redis()
+    if client is None:
+        raise RuntimeError('Redis is not configured')
+    processing = _processing_key(consumer)
+
+    raw_events = client.lrange(processing, 0, -1)  # left over from a crashed run
+    if not raw_events:
+        if timeout > 0:
+            first = client.blmove(QUEUE_KEY, processing, timeout, 'RIGHT', 'LEFT')
+        else:
+            first = client.lmove(QUEUE_KEY, processing, 'RIGHT', 'LEFT')
+        if first is None:
+            return {'applied': 0, 'duplicates': 0, 'dead': 0}
+        with client.pipeline(transaction=False) as pipe:
+            for _ in range(batch_size - 1):
+                pipe.lmove(QUEUE_KEY, processing, 'RIGHT', 'LEFT')
+            pipe.execute()
+        raw_events = client.lrange(processing, 0, -1)
+
+    service = GamificationService()
+    awards: List[Dict[str, Any]] = []
+    raws: List[str] = []
+    dead = 0
+    for raw in reversed(raw_events):  # oldest first
+        try:
+            event = json.loads(raw)
+            awards.append(service.validate_award(
+                {key: event.get(key) for key in ('user_id', 'points', 'reason', 'idempotency_key')}
+            ))
+            raws.append(raw)
+        except (AttributeError, TypeError, json.JSONDecodeError):
+            _dead_letter(client, raw, 'not a JSON object')
+            dead += 1
+        except InvalidAwardError as exc:
+            _dead_letter(client, raw, str(exc))
+            dead += 1
+
+    summary = {'applied': 0, 'duplicates': 0, 'dead': dead}
+    if awards:
+        success, message, result = service.add_points_bulk(awards)
+        if not success:
+            raise RuntimeError(f'Failed to apply point events: {message}')
+        summary['applied'], summary['duplicates'] = result['accepted'], result['duplicates']
+        if result['unknown_users']:
+            _apply_for_new_users(client, service, awards, raws, result['unknown_users'], summary)
+
+    client.delete(processing)
+    return summary
+
+
+def run_points_worker(consumer: str = 'worker', batch_size: Optional[int] = None, timeout: float = 1.0,
+                      max_batches: Optional[int] = None) -> Dict[str, int]:
+    """Apply queued point events until stopped (or *max_batches* batches ran)
+
+    Failed batches are retried after a back-off of up to 30 seconds.
+
+    Returns:
+        Totals over every batch processed
+    """
+    batch_size = batch_size or current_app.config.get('POINTS_QUEUE_BATCH_SIZE', 500)
+    totals = {'applied': 0, 'duplicates': 0, 'dead': 0}
+    batches, backoff = 0, 1
+    while max_batches is None or batches < max_batches:
+        batches += 1
+        try:
+            summary = process_points_batch(consumer, batch_size, timeout)
+        except (RuntimeError, redis.RedisError) as exc:
+            current_app.logger.warning("Points worker batch failed: %s", exc)
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+            continue
+        backoff = 1
+        for key in totals:
+            totals[key] += summary[key]
+    return totals
@@ -1,16 +1,53 @@
 from datetime import datetime
 from typing import Dict, Optional, List, Any
 from uuid import UUID
+from flask import current_app
 from app import db
+from app.models.expertise import ExpertiseArea
+from app.enums import Visibility
 from app.models.profile import UserProfile
+from app.services.connection_graph import are_connected, get_neighbors
+from app.services.expertise_service import domain_ids_for_slug, normalize_domain_slug
+from app.services.search_index import get_search_index
+from app.utils.cache import get_cache
 from app.utils.validators import validate_profile_data
 
-def get_profile_by_id(profile_id: UUID, include_private: bool = False) -> Optional[Dict[str, Any]]:
+def attach_expertise(profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Embed expertise areas into serialized profiles
+    
+    Expertise for every profile is loaded with a single IN query, so the
+    cost does not grow with the number of profiles on the page.
+    
+    Args:
+        profiles: Profile dictionaries as returned by UserProfile.to_dict
+        
+    Returns:
+        The same list, each profile with an 'expertise_areas' key
+    """
+    by_user = {p['id']: [] for p in profiles}
+    if by_user:
+        areas = ExpertiseArea.query.filter(ExpertiseArea.user_id.in_(list(by_user))).all()
+        for area in areas:
+            by_user[str(area.user_id)].append(area.to_dict())
+    for profile in profiles:
+        profile['expertise_areas'] = by_user[profile['id']]
+    return profiles
+
+def get_profile_by_id(
+    profile_id: UUID,
+    include_private: bool = False,
+    include_expertise: bool = False,
+    viewer_id: Optional[UUID] = None
+) -> Optional[Dict[str, Any]]:
     """Get a user profile by ID
     
     Args:
         profile_id: UUID of the profile to retrieve
         include_private: Whether to include private fields
+        include_expertise: Whether to embed the profile's expertise areas
+        viewer_id: UUID of the requesting user; when given, CONNECTIONS_ONLY
+            profiles are hidden unless the viewer is connected (owners and
+            admins, who get include_private, always see the profile)
         
     Returns:
         Dictionary representation of the profile or None if not found
@@ -19,13 +56,25 @@ def get_profile_by_id(profile_id: UUID, include_private: bool = False) -> Option
     if not profile or not profile.is_active():
         return None
     
-    return profile.to_dict(include_private=include_private)
+    if (
+        viewer_id is not None
+        and not include_private
+        and profile.visibility == Visibility.CONNECTIONS_ONLY.value
+        and not are_connected(viewer_id, profile.id)
+    ):
+        return None
+    
+    data = profile.to_dict(include_private=include_private, include_counters=True)
+    if include_expertise:
+        data['expertise_areas'] = [area.to_dict() for area in profile.expertise_areas]
+    return data
 
-def get_my_profile(user_id: UUID) -> Optional[Dict[str, Any]]:
+def get_my_profile(user_id: UUID, include_expertise: bool = False) -> Optional[Dict[str, Any]]:
     """Get the current user's profile
     
     Args:
         user_id: UUID of the authenticated user
+        include_expertise: Whether to embed the profile's expertise areas
         
     Returns:
         Dictionary representation of the profile or None if not found
@@ -35,7 +84,10 @@ def get_my_profile(user_id: UUID) -> Optional[Dict[str, Any]]:
         return None
     
     # Always include private data for user's own profile
-    return profile.to_dict(include_private=True)
+    data = profile.to_dict(include_private=True, include_counters=True)
+    if include_expertise:
+        data['expertise_areas'] = [area.to_dict() for area in profile.expertise_areas]
+    return data
 
 def create_profile(user_id: UUID, data: Dict[str, Any]) -> Dict[str, Any]:
     """Create a new user profile
@@ -84,7 +136,7 @@ def create_profile(user_id: UUID, data: Dict[str, Any]) -> Dict[str, Any]:
     return {
         'success': True,
         'message': 'Profile created successfully',
-        'profile': profile.to_dict(include_private=True)
+        'profile': profile.to_dict(include_private=True, include_counters=True)
     }
 
 def update_profile(profile_id: UUID, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -126,7 +178,7 @@ def update_profile(profile_id: UUID, data: Dict[str, Any]) -> Dict[str, Any]:
     return {
         'success': True,
         'message': 'Profile updated successfully',
-        'profile': profile.to_dict(include_private=True)
+        'profile': profile.to_dict(include_private=True, include_counters=True)
     }
 
 def deactivate_profile(profile_id: UUID) -> Dict[str, Any]:
@@ -154,31 +206,33 @@ def deactivate_profile(profile_id: UUID) -> Dict[str, Any]:
         'message': 'Profile deactivated successfully'
     }
 
-def search_profiles(
-    query: str = None, 
+# Facets that can be requested alongside a search, mapped to the column
+# whose values are counted.
+SEARCH_FACETS = {
+    'profession': UserProfile.profession,
+    'company': UserProfile.company,
+    'expertise_domain': ExpertiseArea.domain,
+    'expertise_level': ExpertiseArea.level,
+}
+
+def _build_search_query(
+    query: str = None,
     expertise: str = None,
     visibility: str = 'PUBLIC',
-    limit: int = 20, 
-    offset: int = 0
-) -> Dict[str, Any]:
-    """Search for user profiles with filters
-    
-    Args:
-        query: Search string for name, username, etc.
-        expertise: Domain of expertise to filter by
-        visibility: Minimum visibility level (PUBLIC by default)
-        limit: Maximum number of results to return
-        offset: Pagination offset
-        
-    Returns:
-        Dictionary with profiles and pagination info
-    """
+    viewer_id: Optional[UUID] = None
+):
+    """Return the filtered UserProfile query shared by search and facet counts"""
     # Base query: only active profiles
     base_query = UserProfile.query.filter(UserProfile.deleted_at == None)
     
     # Filter by visibility
     base_query = base_query.filter(UserProfile.visibility == visibility)
     
+    # CONNECTIONS_ONLY profiles are only searchable by their connections
+    if visibility == Visibility.CONNECTIONS_ONLY.value:
+        neighbors = get_neighbors(viewer_id) if viewer_id is not None else frozenset()
+        base_query = base_query.filter(UserProfile.id.in_(list(neighbors)))
+    
     # Apply search query if provided
     if query:
         search_term = f"%{query}%"
@@ -194,25 +248,206 @@ def search_profiles(
             )
         )
     
-    # Filter by expertise domain if provided
+    # Filter by expertise domain if provided: exact match on the canonical
+    # domain (or one of its aliases) as an indexed semi-join, so profiles
+    # with several expertise rows are not duplicated
     if expertise:
-        from app.models.expertise import ExpertiseArea
-        base_query = base_query.join(ExpertiseArea).filter(
-            ExpertiseArea.domain.ilike(f"%{expertise}%")
+        base_query = base_query.filter(
+            db.exists().where(
+                ExpertiseArea.user_id == UserProfile.id,
+                ExpertiseArea.domain_id.in_(domain_ids_for_slug(normalize_domain_slug(expertise)))
+            )
         )
     
-    # Count total results for pagination
-    total = base_query.count()
+    return base_query
+
+def search_profiles(
+    query: str = None, 
+    expertise: str = None,
+    visibility: str = 'PUBLIC',
+    limit: int = 20, 
+    offset: int = 0,
+    facets: Optional[List[str]] = None,
+    facet_limit: Optional[int] = None,
+    include_expertise: bool = False,
+    viewer_id: Optional[UUID] = None
+) -> Dict[str, Any]:
+    """Search for user profiles with filters
     
-    # Apply pagination
-    profiles = base_query.limit(limit).offset(offset).all()
+    Args:
+        query: Search string for name, username, etc.
+        expertise: Domain of expertise to filter by
+        visibility: Minimum visibility level (PUBLIC by default)
+        limit: Maximum number of results to return
+        offset: Pagination offset
+        facets: Optional facet names to count for the current filter
+        facet_limit: Maximum number of values returned per facet
+        include_expertise: Whether to embed each profile's expertise areas
+        viewer_id: UUID of the searching user, required to see CONNECTIONS_ONLY profiles
+        
+    Returns:
+        Dictionary with profiles and pagination info
+    """
+    if facets:
+        unknown = [f for f in facets if f not in SEARCH_FACETS]
+        if unknown:
+            return {
+                'success': False,
+                'message': f'Invalid facets: {", ".join(unknown)}. '
+                           f'Must be among {", ".join(SEARCH_FACETS)}'
+            }
     
-    return {
+    # Public searches can be served by the in-memory index when enabled
+    search_index = get_search_index()
+    if search_index is not None and visibility == 'PUBLIC':
+        total, profile_dicts = search_index.search(query, expertise, limit, offset)
+    else:
+        base_query = _build_search_query(query, expertise, visibility, viewer_id)
+        
+        # Count total results for pagination
+        total = base_query.count()
+        
+        # Apply pagination
+        profile_dicts = [p.to_dict() for p in base_query.limit(limit).offset(offset).all()]
+    
+    if include_expertise:
+        # Index results are shared documents; copy before embedding
+        profile_dicts = attach_expertise([dict(p) for p in profile_dicts])
+    
+    result = {
         'success': True,
-        'profiles': [p.to_dict() for p in profiles],
+        'profiles': profile_dicts,
         'pagination': {
             'total': total,
             'limit': limit,
             'offset': offset
         }
-    }
\ No newline at end of file
+    }
+    
+    if facets:
+        result['facets'] = get_search_facets(
+            facets,
+            query=query,
+            expertise=expertise,
+            visibility=visibility,
+            facet_limit=facet_limit,
+            viewer_id=viewer_id
+        )
+    
+    return result
+
+def get_search_facets(
+    facets: List[str],
+    query: str = None,
+    expertise: str = None,
+    visibility: str = 'PUBLIC',
+    facet_limit: Optional[int] = None,
+    viewer_id: Optional[UUID] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Count facet values for the profiles matching a search filter
+    
+    All requested histograms are computed in a single statement: GROUPING
+    SETS on PostgreSQL, a UNION ALL of per-facet groupings elsewhere.  Only
+    the top ``facet_limit`` values of each facet are returned, and results
+    are cached briefly per filter.
+    
+    Args:
+        facets: Facet names (keys of SEARCH_FACETS)
+        query: Search string, as for search_profiles
+        expertise: Expertise domain filter, as for search_profiles
+        visibility: Visibility filter, as for search_profiles
+        facet_limit: Maximum number of values per facet
+        viewer_id: Searching user, as for search_profiles
+        
+    Returns:
+        Mapping of facet name to a list of {'value', 'count'} dicts
+    """
+    facets = list(dict.fromkeys(facets))
+    if facet_limit is None:
+        facet_limit = current_app.config.get('SEARCH_FACET_LIMIT', 10)
+    
+    cache = get_cache('search_facets', ttl=current_app.config.get('SEARCH_FACET_CACHE_TTL', 30))
+    # Only CONNECTIONS_ONLY results depend on who is searching
+    viewer_key = str(viewer_id) if visibility == Visibility.CONNECTIONS_ONLY.value else None
+    cache_key = (tuple(sorted(facets)), query, expertise, visibility, facet_limit, viewer_key)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    matching_ids = (
+        _build_search_query(query, expertise, visibility, viewer_id)
+        .with_entities(UserProfile.id)
+        .subquery()
+    )
+    
+    if db.engine.dialect.name == 'postgresql':
+        counts = _facet_counts_grouping_sets(facets, matching_ids)
+    else:
+        counts = _facet_counts_union_all(facets, matching_ids)
+    
+    # Rank values within each facet and keep the top K in the same statement
+    rank = db.func.row_number().over(
+        partition_by=counts.c.facet,
+        order_by=(counts.c.count.desc(), counts.c.value)
+    ).label('rank')
+    ranked = db.select(counts.c.facet, counts.c.value, counts.c.count, rank).subquery()
+    rows = db.session.execute(
+        db.select(ranked.c.facet, ranked.c.value, ranked.c.count)
+        .where(ranked.c.rank <= facet_limit)
+        .order_by(ranked.c.facet, ranked.c.rank)
+    ).all()
+    
+    result = {facet: [] for facet in facets}
+    for facet, value, count in rows:
+        result[facet].append({'value': value, 'count': count})
+    
+    cache.set(cache_key, result)
+    return result
+
+def _facet_source(facets: List[str], matching_ids):
+    """Return a select over the matching profiles, joined to expertise if needed"""
+    source = UserProfile.__table__
+    if any(SEARCH_FACETS[f].table is ExpertiseArea.__table__ for f in facets):
+        source = source.outerjoin(ExpertiseArea.__table__, ExpertiseArea.user_id == UserProfile.id)
+    return source, UserProfile.id.in_(db.select(matching_ids.c.id))
+
+def _facet_counts_grouping_sets(facets: List[str], matching_ids):
+    """Facet histograms as one GROUP BY GROUPING SETS query (PostgreSQL)"""
+    source, where = _facet_source(facets, matching_ids)
+    columns = [SEARCH_FACETS[f] for f in facets]
+    
+    # GROUPING(col) is 0 for the grouping set that column belongs to
+    facet_name = db.case(
+        *[(db.func.grouping(col) == 0, db.literal(name)) for name, col in zip(facets, columns)]
+    )
+    value = db.case(
+        *[(db.func.grouping(col) == 0, db.cast(col, db.String)) for col in columns]
+    )
+    counts = (
+        db.select(
+            facet_name.label('facet'),
+            value.label('value'),
+            db.func.count(db.distinct(UserProfile.id)).label('count')
+        )
+        .select_from(source)
+        .where(where)
+        .group_by(db.func.grouping_sets(*[db.tuple_(col) for col in columns]))
+        .subquery()
+    )
+    return db.select(counts).where(counts.c.value.isnot(None)).subquery()
+
+def _facet_counts_union_all(facets: List[str], matching_ids):
+    """Facet histograms as a UNION ALL of per-facet groupings (portable)"""
+    source, where = _facet_source(facets, matching_ids)
+    selects = [
+        db.select(
+            db.literal(name).label('facet'),
+            db.cast(SEARCH_FACETS[name], db.String).label('value'),
+            db.func.count(db.distinct(UserProfile.id)).label('count')
+        )
+        .select_from(source)
+        .where(where, SEARCH_FACETS[name].isnot(None))
+        .group_by(SEARCH_FACETS[name])
+        for name in facets
+    ]
+    return db.union_all(*selects).subquery()
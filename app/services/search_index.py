@@ -0,0 +1,427 @@
+"""In-process inverted index over active public profiles.
+
+When ``SEARCH_BACKEND`` is ``'memory'`` the profile search endpoint is served
+from this index instead of PostgreSQL.  The index is bootstrapped from a
+streamed scan of the database and then kept current from the ORM change
+stream: every committed insert, update or delete of a profile, expertise area
+or expertise domain in this process is applied as soon as the transaction
+commits.  Writes made by other processes are picked up by a periodic
+background rebuild (``SEARCH_INDEX_REFRESH_SECONDS``).
+
+Matching mirrors the SQL path exactly: a query matches when it is a
+case-insensitive substring of any searchable field, and the expertise filter
+is an exact canonical slug or alias match.  Substring lookups are answered
+from trigram posting lists held in compact ``array('I')`` buffers, then
+verified against the stored text.
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models.expertise import ExpertiseArea, ExpertiseDomain, ExpertiseDomainAlias
+from app.models.profile import UserProfile
+from app.services.expertise_service import normalize_domain_slug
+
+# Fields matched by the free-text query, in the same order as the SQL path
+SEARCH_FIELDS = (
+    'username', 'first_name', 'last_name', 'biography',
+    'profession', 'company', 'current_job',
+)
+
+# Separates fields in the stored text so a match cannot span two fields
+_FIELD_SEPARATOR = '\x00'
+
+_GRAM = 3
+
+
+def _trigrams(text: str) -> Iterable[str]:
+    return {text[i:i + _GRAM] for i in range(len(text) - _GRAM + 1)}
+
+
+def _intersect(postings: List[array]) -> Iterable[int]:
+    """Intersect sorted posting lists, probing from the shortest one"""
+    postings = sorted(postings, key=len)
+    smallest, others = postings[0], postings[1:]
+    for doc in smallest:
+        for other in others:
+            i = bisect_left(other, doc)
+            if i == len(other) or other[i] != doc:
+                break
+        else:
+            yield doc
+
+
+def _is_indexable(profile: UserProfile) -> bool:
+    return profile.deleted_at is None and profile.visibility == 'PUBLIC'
+
+
+def _document(profile: Dict[str, Any], fields: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """Build the stored document for a profile from its public dict and search fields"""
+    return {
+        'profile': profile,
+        'text': _FIELD_SEPARATOR.join((fields.get(f) or '').lower() for f in SEARCH_FIELDS),
+    }
+
+
+class InvertedIndex:
+    """Trigram and expertise-domain posting lists over profile documents.
+
+    Documents get dense, increasing integer IDs so every posting list stays
+    sorted by appending.  Updating a profile tombstones its old document and
+    appends a new one; tombstones are reclaimed by compaction once they
+    outnumber live documents.  Not thread-safe on its own; callers hold
+    the owning node's lock.
+    """
+
+    def __init__(self):
+        self._doc_profile: List[Optional[str]] = []
+        self._doc_text: List[str] = []
+        self._profile_doc: Dict[str, int] = {}
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._grams: Dict[str, array] = {}
+        self._domains: Dict[str, array] = {}
+        self._slugs: Dict[str, str] = {}
+        self._tombstones = 0
+
+    def __len__(self) -> int:
+        return len(self._profile_doc)
+
+    def __contains__(self, profile_id: str) -> bool:
+        return profile_id in self._profile_doc
+
+    def set_slug(self, slug: str, domain_id: Optional[str]) -> None:
+        if domain_id is None:
+            self._slugs.pop(slug, None)
+        else:
+            self._slugs[slug] = domain_id
+
+    def upsert(
+        self,
+        profile_id: str,
+        document: Optional[Dict[str, Any]] = None,
+        expertise: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Index or re-index a profile; ``None`` arguments keep the stored value"""
+        current = self._docs.get(profile_id, {'expertise': {}})
+        record = dict(current, **(document or {}))
+        if expertise is not None:
+            record['expertise'] = dict(expertise)
+        if 'profile' not in record:
+            return
+        self.remove(profile_id)
+        self._docs[profile_id] = record
+        self._append(profile_id, record)
+
+    def set_expertise(self, profile_id: str, expertise_id: str, domain_id: Optional[str]) -> None:
+        """Add, move or (with ``domain_id=None``) drop one expertise area of an indexed profile"""
+        record = self._docs.get(profile_id)
+        if record is None:
+            return
+        expertise = dict(record['expertise'])
+        if domain_id is None:
+            expertise.pop(expertise_id, None)
+        else:
+            expertise[expertise_id] = domain_id
+        if expertise != record['expertise']:
+            self.upsert(profile_id, expertise=expertise)
+
+    def remove(self, profile_id: str) -> None:
+        self._docs.pop(profile_id, None)
+        doc = self._profile_doc.pop(profile_id, None)
+        if doc is None:
+            return
+        self._doc_profile[doc] = None
+        self._doc_text[doc] = ''
+        self._tombstones += 1
+        if self._tombstones > 1024 and self._tombstones > len(self._profile_doc):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rebuild the posting lists without tombstoned documents"""
+        docs, slugs = self._docs, self._slugs
+        self.__init__()
+        self._slugs = slugs
+        for profile_id, record in docs.items():
+            self._docs[profile_id] = record
+            self._append(profile_id, record)
+
+    def _append(self, profile_id: str, record: Dict[str, Any]) -> None:
+        doc = len(self._doc_profile)
+        self._doc_profile.append(profile_id)
+        self._doc_text.append(record['text'])
+        self._profile_doc[profile_id] = doc
+        for gram in _trigrams(record['text']):
+            self._grams.setdefault(gram, array('I')).append(doc)
+        for domain_id in set(record['expertise'].values()):
+            self._domains.setdefault(domain_id, array('I')).append(doc)
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        expertise: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Return ``(total, profiles)`` for a query/expertise filter"""
+        needle = query.lower() if query else None
+        postings = []
+
+        if needle and len(needle) >= _GRAM:
+            for gram in _trigrams(needle):
+                posting = self._grams.get(gram)
+                if not posting:
+                    return 0, []
+                postings.append(posting)
+
+        if expertise:
+            domain_id = self._slugs.get(normalize_domain_slug(expertise))
+            posting = self._domains.get(domain_id) if domain_id else None
+            if not posting:
+                return 0, []
+            postings.append(posting)
+
+        candidates = _intersect(postings) if postings else range(len(self._doc_profile))
+        texts, owners = self._doc_text, self._doc_profile
+        matches = [
+            doc for doc in candidates
+            if owners[doc] is not None and (not needle or needle in texts[doc])
+        ]
+        page = matches[offset:offset + limit]
+        return len(matches), [self._docs[owners[doc]]['profile'] for doc in page]
+
+
+class SearchIndexNode:
+    """Owns an InvertedIndex for one application: bootstrap, change stream and refresh."""
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.RLock()
+        self._index: Optional[InvertedIndex] = None
+        self._built_at = 0.0
+        self._pending: Optional[List[tuple]] = None
+        self._refreshing = False
+
+    # -------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------
+
+    def search(self, query=None, expertise=None, limit=20, offset=0) -> Tuple[int, List[Dict[str, Any]]]:
+        self._ensure_ready()
+        with self._lock:
+            return self._index.search(query, expertise, limit, offset)
+
+    def is_indexed(self, profile_id: str) -> bool:
+        with self._lock:
+            return self._index is not None and profile_id in self._index
+
+    def _ensure_ready(self) -> None:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self.rebuild()
+            return
+
+        refresh = self.app.config.get('SEARCH_INDEX_REFRESH_SECONDS', 0)
+        if refresh and time.monotonic() - self._built_at > refresh and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    def _refresh_in_background(self) -> None:
+        try:
+            with self.app.app_context():
+                self.rebuild()
+                db.session.remove()
+        except Exception:
+            self.app.logger.exception("Search index refresh failed")
+        finally:
+            self._refreshing = False
+
+    # -------------------------------------------------------------------
+    # Bootstrap
+    # -------------------------------------------------------------------
+
+    def rebuild(self) -> None:
+        """Build a fresh index from a streamed scan and swap it in
+
+        Changes committed while the scan runs are queued and replayed onto
+        the new index before it replaces the old one.
+        """
+        with self._lock:
+            self._pending = []
+        try:
+            index = self._load()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            for change in self._pending:
+                self._apply_one(index, change)
+            self._pending = None
+            self._index = index
+            self._built_at = time.monotonic()
+        self.app.logger.info("Search index built with %d profiles", len(index))
+
+    def _load(self) -> InvertedIndex:
+        batch = self.app.config.get('SEARCH_INDEX_BATCH_SIZE', 1000)
+        indexable = db.and_(UserProfile.deleted_at == None, UserProfile.visibility == 'PUBLIC')
+        index = InvertedIndex()
+        documents: Dict[str, Dict[str, Any]] = {}
+        expertise: Dict[str, Dict[str, str]] = {}
+
+        profile_columns = [
+            UserProfile.id, UserProfile.visibility, UserProfile.joined_at,
+            *[getattr(UserProfile, f) for f in SEARCH_FIELDS],
+        ]
+        rows = db.session.execute(
+            db.select(*profile_columns).where(indexable).execution_options(yield_per=batch)
+        )
+        for row in rows:
+            fields = row._mapping
+            documents[row.id] = _document({
+                'id': str(row.id),
+                'first_name': row.first_name,
+                'last_name': row.last_name,
+                'username': row.username,
+                'visibility': row.visibility,
+                'joined_at': row.joined_at.isoformat() if row.joined_at else None,
+            }, fields)
+
+        rows = db.session.execute(
+            db.select(ExpertiseArea.id, ExpertiseArea.user_id, ExpertiseArea.domain_id)
+            .join(UserProfile, UserProfile.id == ExpertiseArea.user_id)
+            .where(indexable, ExpertiseArea.domain_id != None)
+            .execution_options(yield_per=batch)
+        )
+        for expertise_id, user_id, domain_id in rows:
+            expertise.setdefault(user_id, {})[expertise_id] = domain_id
+
+        slugs = db.session.execute(
+            db.select(ExpertiseDomain.slug, ExpertiseDomain.id).union_all(
+                db.select(ExpertiseDomainAlias.slug, ExpertiseDomainAlias.domain_id)
+            ).execution_options(yield_per=batch)
+        )
+        for slug, domain_id in slugs:
+            index.set_slug(slug, domain_id)
+
+        for profile_id, document in documents.items():
+            index.upsert(profile_id, document, expertise.get(profile_id, {}))
+        return index
+
+    # -------------------------------------------------------------------
+    # Change stream
+    # -------------------------------------------------------------------
+
+    def apply(self, changes: List[tuple]) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending.extend(changes)
+            if self._index is not None:
+                for change in changes:
+                    self._apply_one(self._index, change)
+
+    @staticmethod
+    def _apply_one(index: InvertedIndex, change: tuple) -> None:
+        kind = change[0]
+        if kind == 'profile':
+            _, profile_id, document, expertise = change
+            if document is None:
+                index.remove(profile_id)
+            else:
+                index.upsert(profile_id, document, expertise)
+        elif kind == 'expertise':
+            _, profile_id, expertise_id, domain_id = change
+            index.set_expertise(profile_id, expertise_id, domain_id)
+        elif kind == 'slug':
+            _, slug, domain_id = change
+            index.set_slug(slug, domain_id)
+
+
+# ---------------------------------------------------------------------------
+# Application wiring
+# ---------------------------------------------------------------------------
+
+_CHANGES_KEY = 'search_index_changes'
+
+
+def init_search_index(app) -> None:
+    """Attach a SearchIndexNode to *app* when the memory search backend is enabled"""
+    if app.config.get('SEARCH_BACKEND', 'sql') != 'memory':
+        return
+    app.extensions['search_index'] = SearchIndexNode(app)
+
+
+def get_search_index() -> Optional[SearchIndexNode]:
+    """Return the current application's search node, or None when disabled"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('search_index')
+
+
+def _snapshot(session: Session, node: SearchIndexNode) -> List[tuple]:
+    """Describe the pending flush as index changes (state is pre-flush here)"""
+    changes = []
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, UserProfile):
+            if not _is_indexable(obj):
+                changes.append(('profile', obj.id, None, None))
+                continue
+            fields = {f: getattr(obj, f) for f in SEARCH_FIELDS}
+            # Profiles entering the index need their expertise loaded once
+            expertise = None
+            if not node.is_indexed(obj.id):
+                expertise = {e.id: e.domain_id for e in obj.expertise_areas if e.domain_id}
+            changes.append(('profile', obj.id, _document(obj.to_dict(), fields), expertise))
+        elif isinstance(obj, ExpertiseArea):
+            changes.append(('expertise', obj.user_id, obj.id, obj.domain_id))
+        elif isinstance(obj, ExpertiseDomain):
+            changes.append(('slug', obj.slug, obj.id))
+        elif isinstance(obj, ExpertiseDomainAlias):
+            changes.append(('slug', obj.slug, obj.domain_id))
+
+    for obj in session.deleted:
+        if isinstance(obj, UserProfile):
+            changes.append(('profile', obj.id, None, None))
+        elif isinstance(obj, ExpertiseArea):
+            changes.append(('expertise', obj.user_id, obj.id, None))
+        elif isinstance(obj, (ExpertiseDomain, ExpertiseDomainAlias)):
+            changes.append(('slug', obj.slug, None))
+    return changes
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    node = get_search_index()
+    if node is None:
+        return
+    changes = _snapshot(session, node)
+    if changes:
+        # Tag with the savepoint (if any) so a rolled-back savepoint can be discarded
+        session.info.setdefault(_CHANGES_KEY, []).append((session.get_nested_transaction(), changes))
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_savepoint_changes(session, previous_transaction):
+    if previous_transaction.nested and _CHANGES_KEY in session.info:
+        session.info[_CHANGES_KEY] = [
+            entry for entry in session.info[_CHANGES_KEY] if entry[0] is not previous_transaction
+        ]
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop(_CHANGES_KEY, None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_changes(session):
+    entries = session.info.pop(_CHANGES_KEY, None)
+    node = get_search_index()
+    if entries and node is not None:
+        node.apply([change for _, changes in entries for change in changes])
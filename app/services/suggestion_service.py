@@ -0,0 +1,320 @@
+""""People you may know" suggestions ranked by mutual connections.
+
+The batch job snapshots accepted connections into a sparse CSR adjacency
+matrix ``A``.  Row block ``A[i:j] @ A`` counts, for every user in the block,
+the paths of length two to every other user, i.e. their mutual connections.
+Existing counterparts (any status) and the user themselves are masked out
+and the top-K remaining candidates per row are written to
+``connection_suggestions``.
+
+Between batch runs, users whose own connections change are added to the
+``suggestions:stale`` Redis set; ``flask refresh-connection-suggestions``
+drains it off the request path, recomputing each user with one grouped
+query.  Without Redis, changes are picked up by the next batch run.
+Candidates that gained a pending or rejected request since the last
+computation are filtered out when suggestions are read.
+"""
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+import numpy as np
+from flask import current_app
+import redis
+from scipy import sparse
+from app import db
+from app.models.connection import UserConnection
+from app.models.profile import UserProfile
+from app.models.suggestion import ConnectionSuggestion
+from app.utils.redis_client import get_redis
+
+STALE_KEY = 'suggestions:stale'
+
+
+def _top_k(counts: np.ndarray, columns: np.ndarray, k: int):
+    """Return (columns, counts) of the *k* largest counts, highest first"""
+    if len(counts) > k:
+        keep = np.argpartition(-counts, k - 1)[:k]
+        counts, columns = counts[keep], columns[keep]
+    order = np.lexsort((columns, -counts))
+    return columns[order], counts[order]
+
+
+def _snapshot(batch_size: int):
+    """Stream connections between active profiles into CSR matrices
+
+    Returns:
+        Tuple of (user IDs by dense index, accepted adjacency, counterpart mask)
+    """
+    connections = UserConnection.__table__
+    requester = UserProfile.__table__.alias('requester')
+    recipient = UserProfile.__table__.alias('recipient')
+    rows = db.session.execute(
+        db.select(connections.c.requester_id, connections.c.recipient_id, connections.c.status)
+        .join(requester, requester.c.id == connections.c.requester_id)
+        .join(recipient, recipient.c.id == connections.c.recipient_id)
+        .where(requester.c.deleted_at.is_(None), recipient.c.deleted_at.is_(None))
+        .execution_options(yield_per=batch_size)
+    )
+
+    index: Dict[str, int] = {}
+    user_ids: List[str] = []
+
+    def dense(user_id) -> int:
+        user_id = str(user_id)
+        position = index.get(user_id)
+        if position is None:
+            position = index[user_id] = len(user_ids)
+            user_ids.append(user_id)
+        return position
+
+    accepted_rows, accepted_cols = array('i'), array('i')
+    pair_rows, pair_cols = array('i'), array('i')
+    for requester_id, recipient_id, status in rows:
+        a, b = dense(requester_id), dense(recipient_id)
+        pair_rows.extend((a, b))
+        pair_cols.extend((b, a))
+        if status == 'ACCEPTED':
+            accepted_rows.extend((a, b))
+            accepted_cols.extend((b, a))
+
+    n = len(user_ids)
+
+    def to_csr(row_ids, col_ids):
+        matrix = sparse.csr_matrix(
+            (np.ones(len(row_ids), dtype=np.int32),
+             (np.frombuffer(row_ids, dtype=np.int32), np.frombuffer(col_ids, dtype=np.int32))),
+            shape=(n, n)
+        )
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        return matrix
+
+    adjacency = to_csr(accepted_rows, accepted_cols)
+    mask = (to_csr(pair_rows, pair_cols) + sparse.identity(n, dtype=np.int32, format='csr')).tocsr()
+    return user_ids, adjacency, mask
+
+
+def compute_all_suggestions(top_k: Optional[int] = None, block_size: Optional[int] = None) -> int:
+    """Recompute suggestions for every user from a snapshot of the graph
+
+    Rows are processed in blocks so the product matrix stays bounded; each
+    block's suggestions are replaced in its own transaction.  Rows left over
+    from earlier runs for users no longer in the graph are removed at the end.
+
+    Args:
+        top_k: Candidates kept per user
+        block_size: Users per matrix product and transaction
+
+    Returns:
+        Number of suggestion rows written
+    """
+    top_k = top_k or current_app.config.get('SUGGESTIONS_TOP_K', 20)
+    block_size = block_size or current_app.config.get('SUGGESTIONS_BLOCK_SIZE', 2048)
+    started_at = datetime.utcnow()
+
+    user_ids, adjacency, mask = _snapshot(block_size)
+    table = ConnectionSuggestion.__table__
+    written = 0
+
+    for start in range(0, len(user_ids), block_size):
+        stop = min(start + block_size, len(user_ids))
+        counts = (adjacency[start:stop] @ adjacency).tocsr()
+        counts = (counts - counts.multiply(mask[start:stop])).tocsr()
+        counts.eliminate_zeros()
+
+        rows = []
+        for offset in range(stop - start):
+            lo, hi = counts.indptr[offset], counts.indptr[offset + 1]
+            if lo == hi:
+                continue
+            columns, mutual = _top_k(counts.data[lo:hi], counts.indices[lo:hi], top_k)
+            user_id = user_ids[start + offset]
+            rows.extend(
+                {
+                    'user_id': user_id,
+                    'candidate_id': user_ids[column],
+                    'mutual_count': int(count),
+                    'computed_at': started_at
+                }
+                for column, count in zip(columns.tolist(), mutual.tolist())
+            )
+
+        db.session.execute(db.delete(table).where(table.c.user_id.in_(user_ids[start:stop])))
+        if rows:
+            db.session.execute(db.insert(table), rows)
+        db.session.commit()
+        written += len(rows)
+
+    db.session.execute(db.delete(table).where(table.c.computed_at < started_at))
+    db.session.commit()
+    return written
+
+
+def _counterparts(user_id: str):
+    """Select every user with a connection row (any status) to *user_id*"""
+    connections = UserConnection.__table__
+    return db.union(
+        db.select(connections.c.recipient_id).where(connections.c.requester_id == user_id),
+        db.select(connections.c.requester_id).where(connections.c.recipient_id == user_id)
+    )
+
+
+def refresh_suggestions(user_id, top_k: Optional[int] = None) -> int:
+    """Recompute one user's suggestions with a single grouped query
+
+    Args:
+        user_id: UUID of the user profile
+        top_k: Candidates kept
+
+    Returns:
+        Number of suggestions stored
+    """
+    user_id = str(user_id)
+    top_k = top_k or current_app.config.get('SUGGESTIONS_TOP_K', 20)
+    connections = UserConnection.__table__
+    profiles = UserProfile.__table__
+    table = ConnectionSuggestion.__table__
+    accepted = connections.c.status == 'ACCEPTED'
+
+    # Like the batch snapshot, paths through deleted profiles do not count
+    direct = db.union_all(
+        db.select(connections.c.recipient_id.label('id')).where(connections.c.requester_id == user_id, accepted),
+        db.select(connections.c.requester_id.label('id')).where(connections.c.recipient_id == user_id, accepted)
+    ).subquery()
+    neighbors = (
+        db.select(direct.c.id)
+        .join(profiles, profiles.c.id == direct.c.id)
+        .where(profiles.c.deleted_at.is_(None))
+        .subquery()
+    )
+    second_degree = db.union_all(
+        db.select(connections.c.recipient_id.label('candidate_id'))
+        .where(connections.c.requester_id.in_(db.select(neighbors.c.id)), accepted),
+        db.select(connections.c.requester_id.label('candidate_id'))
+        .where(connections.c.recipient_id.in_(db.select(neighbors.c.id)), accepted)
+    ).subquery()
+    mutual = db.func.count().label('mutual_count')
+    candidates = db.session.execute(
+        db.select(second_degree.c.candidate_id, mutual)
+        .join(profiles, profiles.c.id == second_degree.c.candidate_id)
+        .where(
+            profiles.c.deleted_at.is_(None),
+            second_degree.c.candidate_id != user_id,
+            second_degree.c.candidate_id.not_in(_counterparts(user_id))
+        )
+        .group_by(second_degree.c.candidate_id)
+        .order_by(mutual.desc(), second_degree.c.candidate_id)
+        .limit(top_k)
+    ).all()
+
+    now = datetime.utcnow()
+    db.session.execute(db.delete(table).where(table.c.user_id == user_id))
+    if candidates:
+        db.session.execute(db.insert(table), [
+            {
+                'user_id': user_id,
+                'candidate_id': str(row.candidate_id),
+                'mutual_count': row.mutual_count,
+                'computed_at': now
+            }
+            for row in candidates
+        ])
+    db.session.commit()
+    return len(candidates)
+
+
+def mark_suggestions_stale(user_ids: Iterable) -> None:
+    """Queue users whose connections just changed for an off-request refresh
+
+    Best effort: the connection change is already committed, so if Redis
+    is unavailable the users are left for the next batch run.
+    """
+    user_ids = list(dict.fromkeys(str(u) for u in user_ids))
+    client = get_redis()
+    if client is None or not user_ids:
+        return
+    try:
+        client.sadd(STALE_KEY, *user_ids)
+    except redis.RedisError as exc:
+        current_app.logger.warning("Failed to queue suggestion refresh: %s", exc)
+
+
+def refresh_stale_suggestions(batch_size: Optional[int] = None, max_users: Optional[int] = None) -> int:
+    """Refresh the suggestions of queued users until the queue is empty
+
+    Users are popped *batch_size* at a time.  When a refresh fails, the run
+    stops and that user and the rest of its batch are put back for the next run.
+
+    Args:
+        batch_size: Users popped per round trip
+        max_users: Stop after this many users
+
+    Returns:
+        Number of users refreshed
+    """
+    client = get_redis()
+    if client is None:
+        raise RuntimeError('Redis is not configured')
+    batch_size = batch_size or current_app.config.get('SUGGESTIONS_REFRESH_BATCH_SIZE', 100)
+    refreshed = 0
+    while max_users is None or refreshed < max_users:
+        count = batch_size if max_users is None else min(batch_size, max_users - refreshed)
+        user_ids = client.spop(STALE_KEY, count)
+        if not user_ids:
+            break
+        user_ids = list(user_ids)
+        for index, user_id in enumerate(user_ids):
+            try:
+                refresh_suggestions(user_id)
+                refreshed += 1
+            except Exception as exc:
+                db.session.rollback()
+                # Put back the failed user and the rest of the popped batch
+                client.sadd(STALE_KEY, *user_ids[index:])
+                current_app.logger.warning("Failed to refresh suggestions for %s: %s", user_id, exc)
+                return refreshed
+    return refreshed
+
+
+def get_suggestions(profile_id: UUID, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Get stored connection suggestions for a user
+
+    Args:
+        profile_id: UUID of the user profile
+        limit: Maximum number of suggestions to return
+
+    Returns:
+        Dictionary with success status and suggested profiles
+    """
+    profile_id = str(profile_id)
+    profile = db.session.get(UserProfile, profile_id)
+    if not profile or not profile.is_active():
+        return {
+            'success': False,
+            'message': 'Profile not found'
+        }
+
+    top_k = current_app.config.get('SUGGESTIONS_TOP_K', 20)
+    limit = top_k if limit is None else max(1, min(limit, top_k))
+
+    table = ConnectionSuggestion.__table__
+    rows = db.session.execute(
+        db.select(UserProfile, table.c.mutual_count)
+        .join(table, table.c.candidate_id == UserProfile.id)
+        .where(
+            table.c.user_id == profile_id,
+            UserProfile.deleted_at.is_(None),
+            table.c.candidate_id.not_in(_counterparts(profile_id))
+        )
+        .order_by(table.c.mutual_count.desc(), table.c.candidate_id)
+        .limit(limit)
+    ).all()
+
+    return {
+        'success': True,
+        'suggestions': [
+            {'profile': candidate.to_dict(), 'mutual_count': mutual_count}
+            for candidate, mutual_count in rows
+        ]
+    }
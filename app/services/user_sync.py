@@ -0,0 +1,151 @@
+"""Local ``users`` rows kept in step with the Auth Service.
+
+The auth domain posts ``user.created``, ``user.updated`` and ``user.deleted``
+events to ``POST /api/gamification/users/events``; ``flask backfill-users``
+loads an export of existing users.  Both upsert ``users`` in batches, so the
+first gamification request of a user normally finds their row already there
+instead of calling the Auth Service.
+
+IDs the Auth Service reports as unknown are remembered in a per-worker
+negative cache for ``AUTH_MISSING_USER_TTL`` seconds, so repeated requests
+for them do not each pay a round trip.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.gamification import AchievementState, Points, PointsDaily, UserBadge
+from app.models.user import User
+from app.services.leaderboard import remove_from_leaderboards
+from app.utils.cache import TTLCache, get_cache
+from app.utils.sql import dialect_insert
+
+EVENT_TYPES = ('user.created', 'user.updated', 'user.deleted')
+
+
+def missing_users_cache() -> TTLCache:
+    """Return the negative cache of user IDs unknown to the Auth Service"""
+    return get_cache('missing_users', maxsize=10000, ttl=current_app.config.get('AUTH_MISSING_USER_TTL', 300))
+
+
+def _validate_event(event: Any, index: int) -> Dict[str, Any]:
+    if not isinstance(event, dict) or event.get('type') not in EVENT_TYPES:
+        raise ValueError(f"Event {index}: type must be one of {', '.join(EVENT_TYPES)}")
+    user = event.get('user')
+    if not isinstance(user, dict) or not user.get('id'):
+        raise ValueError(f"Event {index}: user.id is required")
+    if event['type'] != 'user.deleted' and not (user.get('email') and user.get('username')):
+        raise ValueError(f"Event {index}: user.email and user.username are required")
+    return {'type': event['type'], 'user': user}
+
+
+def upsert_users(users: List[Dict[str, Any]]) -> int:
+    """Insert or update (id, email, username) rows in the current transaction
+
+    The batch is written with one ``INSERT ... ON CONFLICT (id) DO UPDATE``.
+    If it collides with another row's unique email or username, rows are
+    retried one by one and the conflicting ones are skipped and logged.
+
+    Returns:
+        Number of rows written
+    """
+    if not users:
+        return 0
+    table = User.__table__
+    now = datetime.utcnow()
+    rows = [
+        {
+            'id': str(user['id']),
+            'email': user['email'],
+            'username': user['username'],
+            'level': 1,
+            'total_points': 0,
+            'created_at': now,
+            'updated_at': now
+        }
+        for user in users
+    ]
+
+    def write(batch):
+        insert = dialect_insert(table).values(batch)
+        with db.session.begin_nested():
+            db.session.execute(insert.on_conflict_do_update(
+                index_elements=[table.c.id],
+                set_={
+                    'email': insert.excluded.email,
+                    'username': insert.excluded.username,
+                    'updated_at': insert.excluded.updated_at
+                }
+            ))
+
+    try:
+        write(rows)
+        written = len(rows)
+    except IntegrityError:
+        written = 0
+        for row in rows:
+            try:
+                write([row])
+                written += 1
+            except IntegrityError as exc:
+                current_app.logger.warning("Skipping user %s: %s", row['id'], exc.orig)
+
+    cache = missing_users_cache()
+    for row in rows:
+        cache.delete(row['id'])
+    return written
+
+
+def delete_users(user_ids: Iterable[str]) -> int:
+    """Delete users and their gamification data in the current transaction
+
+    Returns:
+        Number of users deleted
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    for model in (AchievementState, UserBadge, PointsDaily, Points):
+        table = model.__table__
+        db.session.execute(db.delete(table).where(table.c.user_id.in_(user_ids)))
+    users = User.__table__
+    return db.session.execute(db.delete(users).where(users.c.id.in_(user_ids))).rowcount
+
+
+def apply_user_events(events: List[Any]) -> Dict[str, Any]:
+    """Apply a batch of auth user events in one transaction
+
+    Events are applied in order and only the last event per user counts,
+    so the batch costs one upsert and one set of deletes.
+
+    Args:
+        events: Dicts with ``type`` and ``user`` (``id``, ``email``, ``username``)
+
+    Returns:
+        Dictionary with success status and the number of users upserted and deleted
+    """
+    try:
+        events = [_validate_event(event, index) for index, event in enumerate(events)]
+    except ValueError as e:
+        return {'success': False, 'message': str(e)}
+
+    latest: Dict[str, Dict[str, Any]] = {}
+    for event in events:
+        user_id = str(event['user']['id'])
+        latest.pop(user_id, None)  # keep the last event's position
+        latest[user_id] = event
+
+    upserts = [event['user'] for event in latest.values() if event['type'] != 'user.deleted']
+    deletes = [user_id for user_id, event in latest.items() if event['type'] == 'user.deleted']
+    try:
+        upserted = upsert_users(upserts)
+        deleted = delete_users(deletes)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error("Failed to apply user events: %s", e)
+        return {'success': False, 'message': str(e)}
+    remove_from_leaderboards(deletes)
+
+    return {'success': True, 'upserted': upserted, 'deleted': deleted}
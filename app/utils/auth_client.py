@@ -84,7 +84,7 @@ def get_user_basic(user_id: UUID) -> Dict[str, Any]:
 
     If the Auth Service responds with 200, the payload is returned.  Any
     non-200 response or exception returns  {"success": False} so callers can
-    decide what to do.
+    decide what to do; ``not_found`` is set when the user does not exist.
     """
     try:
         auth_service_url = current_app.config['AUTH_SERVICE_URL']
@@ -107,7 +107,7 @@ def get_user_basic(user_id: UUID) -> Dict[str, Any]:
         current_app.logger.warning(
             "Auth Service returned %s for /users/%s", resp.status_code, user_id
         )
-        return {"success": False}
+        return {"success": False, "not_found": resp.status_code == 404}
     except Exception as exc:
         current_app.logger.error("get_user_basic error: %s", exc)
         return {"success": False}
\ No newline at end of file
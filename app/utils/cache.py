@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from flask import current_app
+
+__all__ = [
+    "TTLCache",
+    "get_cache",
+]
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after *ttl* seconds.
+
+    Intended for short-lived, per-worker memoisation of read-heavy query
+    results.  It is not shared between gunicorn workers.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for *key* or *default* if absent/expired."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store *value* under *key*; ``ttl=0`` disables caching, ``None`` uses the default."""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is not None and ttl <= 0:
+            return
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def get_cache(name: str, maxsize: int = 1024, ttl: float = 30.0) -> TTLCache:
+    """Return the named cache for the current application, creating it lazily.
+
+    Caches live in ``app.extensions`` so that every application instance
+    (and therefore every test) starts from an empty cache.
+    """
+    caches = current_app.extensions.setdefault("ttl_caches", {})
+    cache = caches.get(name)
+    if cache is None:
+        cache = caches[name] = TTLCache(maxsize=maxsize, ttl=ttl)
+    return cache
@@ -3,13 +3,12 @@ from flask import request, jsonify, g, current_app
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
 from uuid import UUID
 from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from app.utils.rate_limit import local_precheck, rate_limit_key
 
-# Initialize rate limiter
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"]
-)
+# Initialize rate limiter; storage, strategy and default limit come from the
+# RATE_LIMIT_* settings (see app.utils.rate_limit.configure_rate_limiting)
+limiter = Limiter(key_func=rate_limit_key)
+limiter.request_filter(local_precheck)
 
 def rate_limit(f):
     """Rate limiting decorator"""
@@ -0,0 +1,30 @@
+import base64
+import json
+from typing import Any, List
+
+__all__ = [
+    "encode_cursor",
+    "decode_cursor",
+]
+
+
+def encode_cursor(*values: Any) -> str:
+    """Return an opaque keyset-pagination cursor for the given sort-key values."""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed or does not hold *size* values.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
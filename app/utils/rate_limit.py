@@ -0,0 +1,180 @@
+"""Rate-limit keying and the per-worker pre-check in front of Flask-Limiter.
+
+Limits are counted in the shared storage named by ``RATE_LIMIT_STORAGE_URL``
+(Redis in production) with a moving window, so every worker enforces the
+same budget.  Callers are keyed by JWT identity and fall back to the client
+IP for anonymous requests, so users behind one NAT do not share a budget.
+
+After a request passes the shared check, the worker grants the caller
+``RATE_LIMIT_LOCAL_SHARE`` of the budget that check reported as remaining,
+until the window resets.  Requests paid for from that slice skip the storage
+round trip; they get headers from the local count, and their hits are
+charged to the shared storage in one batch, at most every second and always
+before the caller's next shared check.  Each worker only hands out a share of
+what is known to be left, so with *n* workers and ``n * share <= 1`` the
+shared limit holds.  A share of 0 disables the pre-check.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_limiter.util import get_remote_address
+from limits import parse
+from app.utils.responses import error_response
+
+__all__ = [
+    "LocalBudgets",
+    "configure_rate_limiting",
+    "local_precheck",
+    "rate_limit_key",
+]
+
+
+def rate_limit_key() -> str:
+    """Key requests by JWT identity, or by client IP when there is no valid token."""
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    return f"user:{identity}" if identity else f"ip:{get_remote_address()}"
+
+
+class _Budget:
+    __slots__ = ("limits", "amount", "allowance", "remaining", "reset_at", "pending", "charged_at")
+
+
+class LocalBudgets:
+    """Per-worker slices of callers' shared budgets, bounded to *maxsize* keys (LRU).
+
+    Methods return the pending hits of budgets they drop or flush, as
+    ``(limits, count)`` pairs, for the caller to charge to the shared storage.
+    """
+
+    def __init__(self, share: float, maxsize: int = 10000, flush_interval: float = 1.0):
+        self.share = share
+        self.maxsize = maxsize
+        self.flush_interval = flush_interval
+        self._budgets: "OrderedDict[Hashable, _Budget]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def grant(self, key: Hashable, limits: Any, amount: int, remaining: int, reset_at: float,
+              now: Optional[float] = None) -> List[Tuple[Any, int]]:
+        """Give *key* ``share`` of the *remaining* shared budget until *reset_at*."""
+        now = time.time() if now is None else now
+        charges = []
+        with self._lock:
+            old = self._budgets.pop(key, None)
+            if old is not None and old.pending:
+                charges.append((old.limits, old.pending))
+            allowance = int(remaining * self.share)
+            if allowance >= 1 and reset_at > now:
+                budget = self._budgets[key] = _Budget()
+                budget.limits, budget.amount = limits, amount
+                budget.allowance, budget.remaining, budget.reset_at = allowance, remaining, reset_at
+                budget.pending, budget.charged_at = 0, now
+            while len(self._budgets) > self.maxsize:
+                _, evicted = self._budgets.popitem(last=False)
+                if evicted.pending:
+                    charges.append((evicted.limits, evicted.pending))
+        return charges
+
+    def acquire(self, key: Hashable, now: Optional[float] = None
+                ) -> Tuple[Optional[Tuple[int, int, float]], List[Tuple[Any, int]]]:
+        """Spend one hit of *key*'s budget.
+
+        Returns:
+            ``(amount, remaining, reset_at)`` for the rate-limit headers, or
+            None when the budget is used up or expired, and the hits to charge
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            budget = self._budgets.get(key)
+            if budget is None:
+                return None, []
+            if budget.allowance < 1 or now >= budget.reset_at:
+                del self._budgets[key]
+                return None, [(budget.limits, budget.pending)] if budget.pending else []
+            self._budgets.move_to_end(key)
+            budget.allowance -= 1
+            budget.remaining -= 1
+            budget.pending += 1
+            charges = []
+            if now - budget.charged_at >= self.flush_interval:
+                charges.append((budget.limits, budget.pending))
+                budget.pending, budget.charged_at = 0, now
+            return (budget.amount, budget.remaining, budget.reset_at), charges
+
+
+def configure_rate_limiting(app) -> None:
+    """Translate the RATE_LIMIT_* settings into Flask-Limiter's configuration.
+
+    Must run before ``limiter.init_app(app)``.
+    """
+    config = app.config
+    config.setdefault("RATELIMIT_ENABLED", config.get("RATE_LIMIT_ENABLED", True))
+    config.setdefault("RATELIMIT_DEFAULT", config.get("RATE_LIMIT_DEFAULT", "60/minute"))
+    config.setdefault("RATELIMIT_STORAGE_URI", config.get("RATE_LIMIT_STORAGE_URL", "memory://"))
+    config.setdefault("RATELIMIT_STRATEGY", "moving-window")
+    config.setdefault("RATELIMIT_HEADERS_ENABLED", True)
+    # Keep limiting per worker rather than failing requests while the storage is down
+    config.setdefault("RATELIMIT_IN_MEMORY_FALLBACK_ENABLED", True)
+
+    share = config.get("RATE_LIMIT_LOCAL_SHARE", 0.0)
+    app.extensions["rate_limit_budgets"] = LocalBudgets(share) if share > 0 else None
+
+    @app.errorhandler(429)
+    def rate_limit_exceeded(_error):
+        return error_response("Too many requests. Please try again later.", 429)
+
+    @app.after_request
+    def grant_local_budget(response):
+        budgets = app.extensions["rate_limit_budgets"]
+        if budgets is None:
+            return response
+        budget = g.pop("rate_limit_budget", None)
+        if budget is not None:
+            if config["RATELIMIT_HEADERS_ENABLED"]:
+                amount, remaining, reset_at = budget
+                response.headers["X-RateLimit-Limit"] = str(amount)
+                response.headers["X-RateLimit-Remaining"] = str(remaining)
+                response.headers["X-RateLimit-Reset"] = str(int(reset_at))
+            return response
+        # Grant a slice of what the shared check left, if it let the request through
+        for limiter in app.extensions.get("limiter", ()):
+            checked = limiter.current_limits
+            if checked and not any(limit.breached for limit in checked):
+                _charge(budgets.grant(
+                    (rate_limit_key(), request.endpoint),
+                    (limiter, [(limit.limit, limit.request_args) for limit in checked]),
+                    limiter.current_limit.limit.amount,
+                    min(limit.remaining for limit in checked),
+                    min(limit.reset_at for limit in checked)
+                ))
+        return response
+
+
+def _charge(charges: List[Tuple[Any, int]]) -> None:
+    """Record locally admitted hits in the shared storage."""
+    for (limiter, limits), count in charges:
+        for limit, args in limits:
+            try:
+                limiter.limiter.hit(limit, *args, cost=count)
+            except Exception as exc:
+                current_app.logger.warning("Failed to charge %d rate-limit hits: %s", count, exc)
+
+
+def local_precheck() -> bool:
+    """Flask-Limiter request filter: True admits the request from the caller's local budget."""
+    budgets = current_app.extensions.get("rate_limit_budgets")
+    if budgets is None or not request.endpoint:
+        return False
+    headers, charges = budgets.acquire((rate_limit_key(), request.endpoint))
+    # Charge before a shared check, so it counts every hit admitted so far
+    _charge(charges)
+    if headers is None:
+        return False
+    g.rate_limit_budget = headers
+    return True
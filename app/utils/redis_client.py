@@ -0,0 +1,31 @@
+from typing import Optional
+import redis
+from flask import current_app
+
+__all__ = [
+    "init_redis",
+    "get_redis",
+]
+
+
+def init_redis(app) -> None:
+    """Create the shared Redis client for *app* when Redis is enabled.
+
+    The client connects lazily, so creating it never blocks start-up.
+    """
+    if not app.config.get('REDIS_ENABLED', True):
+        return
+    app.extensions['redis'] = redis.Redis(
+        host=app.config['REDIS_HOST'],
+        port=app.config['REDIS_PORT'],
+        db=app.config['REDIS_DB'],
+        password=app.config['REDIS_PASSWORD'],
+        decode_responses=True,
+        socket_connect_timeout=app.config.get('REDIS_SOCKET_TIMEOUT', 0.5),
+        socket_timeout=app.config.get('REDIS_SOCKET_TIMEOUT', 0.5),
+    )
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """Return the current application's Redis client, or None if disabled."""
+    return current_app.extensions.get('redis')
@@ -0,0 +1,35 @@
+from app import db
+
+__all__ = [
+    "date_bucket",
+    "dialect_insert",
+]
+
+DATE_BUCKETS = ('day', 'week', 'month')
+
+
+def dialect_insert(table):
+    """Return an INSERT construct supporting ON CONFLICT for the active dialect."""
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+def date_bucket(unit, day):
+    """Return an expression truncating the date *day* to the start of its *unit* bucket.
+
+    Weeks start on Monday.  PostgreSQL uses ``date_trunc``; SQLite, which
+    stores dates as ISO strings, uses the equivalent ``date`` modifiers.
+    """
+    if unit not in DATE_BUCKETS:
+        raise ValueError(f"Bucket must be one of {', '.join(DATE_BUCKETS)}")
+    if unit == 'day':
+        return day
+    # Literal units so the expression renders identically in SELECT and GROUP BY
+    if db.engine.dialect.name == 'postgresql':
+        return db.cast(db.func.date_trunc(db.literal_column(f"'{unit}'"), day), db.Date)
+    if unit == 'week':
+        return db.func.date(day, db.literal_column("'weekday 0'"), db.literal_column("'-6 days'"))
+    return db.func.strftime(db.literal_column("'%Y-%m-01'"), day)
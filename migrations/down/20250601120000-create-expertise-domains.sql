@@ -0,0 +1,10 @@
+-- Migration: Normalize expertise domains into a canonical taxonomy (DOWN)
+-- Created at: 2025-06-01T12:00:00
+
+DROP INDEX IF EXISTS idx_expertise_areas_domain_id_user_id;
+
+ALTER TABLE IF EXISTS expertise_areas
+    DROP COLUMN IF EXISTS domain_id;
+
+DROP TABLE IF EXISTS expertise_domain_aliases;
+DROP TABLE IF EXISTS expertise_domains;
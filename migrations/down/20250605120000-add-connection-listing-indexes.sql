@@ -0,0 +1,8 @@
+-- Migration: Composite indexes for per-user connection listings (DOWN)
+-- Created at: 2025-06-05T12:00:00
+
+CREATE INDEX IF NOT EXISTS idx_user_connections_requester_id ON user_connections(requester_id);
+CREATE INDEX IF NOT EXISTS idx_user_connections_recipient_id ON user_connections(recipient_id);
+
+DROP INDEX IF EXISTS idx_user_connections_requester_status_created;
+DROP INDEX IF EXISTS idx_user_connections_recipient_status_created;
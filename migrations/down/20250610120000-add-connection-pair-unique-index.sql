@@ -0,0 +1,4 @@
+-- Migration: One connection per unordered pair of users (DOWN)
+-- Created at: 2025-06-10T12:00:00
+
+DROP INDEX IF EXISTS uq_user_connections_pair;
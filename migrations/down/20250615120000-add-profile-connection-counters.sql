@@ -0,0 +1,7 @@
+-- Migration: Denormalized connection counters on user_profiles (DOWN)
+-- Created at: 2025-06-15T12:00:00
+
+ALTER TABLE IF EXISTS user_profiles
+    DROP COLUMN IF EXISTS connections_count,
+    DROP COLUMN IF EXISTS pending_incoming_count,
+    DROP COLUMN IF EXISTS pending_outgoing_count;
@@ -0,0 +1,5 @@
+-- Migration: Precomputed mutual-connection suggestions (DOWN)
+-- Created at: 2025-06-20T12:00:00
+
+DROP INDEX IF EXISTS idx_connection_suggestions_user_rank;
+DROP TABLE IF EXISTS connection_suggestions;
@@ -0,0 +1,5 @@
+-- Migration: Per-profile connection generation for cached connection data (DOWN)
+-- Created at: 2025-06-25T12:00:00
+
+ALTER TABLE IF EXISTS user_profiles
+    DROP COLUMN IF EXISTS connection_generation;
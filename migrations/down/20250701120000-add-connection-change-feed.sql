@@ -0,0 +1,6 @@
+-- Migration: Connection change feed (updated_at indexes and deletion tombstones) (DOWN)
+-- Created at: 2025-07-01T12:00:00
+
+DROP TABLE IF EXISTS connection_tombstones;
+DROP INDEX IF EXISTS idx_user_connections_requester_updated;
+DROP INDEX IF EXISTS idx_user_connections_recipient_updated;
@@ -0,0 +1,4 @@
+-- Migration: Daily rollups of compacted points ledger rows (DOWN)
+-- Created at: 2025-07-05T12:00:00
+
+DROP TABLE IF EXISTS points_daily;
@@ -0,0 +1,7 @@
+-- Migration: Idempotency keys for point awards (DOWN)
+-- Created at: 2025-07-10T12:00:00
+
+DROP INDEX IF EXISTS uq_points_idempotency_key;
+
+ALTER TABLE IF EXISTS points
+    DROP COLUMN IF EXISTS idempotency_key;
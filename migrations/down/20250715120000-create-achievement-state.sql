@@ -0,0 +1,4 @@
+-- Migration: Per-user progress of stateful achievement rules (DOWN)
+-- Created at: 2025-07-15T12:00:00
+
+DROP TABLE IF EXISTS achievement_state;
@@ -0,0 +1,4 @@
+-- Migration: Index points by user and time for history queries (DOWN)
+-- Created at: 2025-07-20T12:00:00
+
+DROP INDEX IF EXISTS idx_points_user_created;
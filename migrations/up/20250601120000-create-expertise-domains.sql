@@ -0,0 +1,42 @@
+-- Migration: Normalize expertise domains into a canonical taxonomy
+-- Created at: 2025-06-01T12:00:00
+
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+
+CREATE TABLE IF NOT EXISTS expertise_domains (
+    id UUID PRIMARY KEY,
+    slug VARCHAR(100) NOT NULL UNIQUE,
+    name VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS expertise_domain_aliases (
+    slug VARCHAR(100) PRIMARY KEY,
+    domain_id UUID NOT NULL REFERENCES expertise_domains(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_expertise_domain_aliases_domain_id ON expertise_domain_aliases(domain_id);
+
+ALTER TABLE expertise_areas
+    ADD COLUMN IF NOT EXISTS domain_id UUID REFERENCES expertise_domains(id);
+
+-- Backfill: one canonical domain per case-folded slug of the existing values.
+-- The slug expression mirrors normalize_domain_slug() in expertise_service.
+INSERT INTO expertise_domains (id, slug, name)
+SELECT uuid_generate_v4(), slug, MIN(domain)
+FROM (
+    SELECT domain,
+           TRIM(BOTH '-' FROM REGEXP_REPLACE(LOWER(domain), '[^[:alnum:]]+', '-', 'g')) AS slug
+    FROM expertise_areas
+) s
+WHERE slug <> ''
+GROUP BY slug
+ON CONFLICT (slug) DO NOTHING;
+
+UPDATE expertise_areas e
+SET domain_id = d.id
+FROM expertise_domains d
+WHERE e.domain_id IS NULL
+  AND d.slug = TRIM(BOTH '-' FROM REGEXP_REPLACE(LOWER(e.domain), '[^[:alnum:]]+', '-', 'g'));
+
+CREATE INDEX IF NOT EXISTS idx_expertise_areas_domain_id_user_id ON expertise_areas(domain_id, user_id);
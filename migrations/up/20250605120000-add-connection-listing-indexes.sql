@@ -0,0 +1,11 @@
+-- Migration: Composite indexes for per-user connection listings
+-- Created at: 2025-06-05T12:00:00
+
+CREATE INDEX IF NOT EXISTS idx_user_connections_requester_status_created
+    ON user_connections(requester_id, status, created_at);
+CREATE INDEX IF NOT EXISTS idx_user_connections_recipient_status_created
+    ON user_connections(recipient_id, status, created_at);
+
+-- Superseded by the composite indexes above (leading column)
+DROP INDEX IF EXISTS idx_user_connections_requester_id;
+DROP INDEX IF EXISTS idx_user_connections_recipient_id;
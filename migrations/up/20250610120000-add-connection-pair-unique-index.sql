@@ -0,0 +1,19 @@
+-- Migration: One connection per unordered pair of users
+-- Created at: 2025-06-10T12:00:00
+
+-- Remove reciprocal duplicates, keeping accepted connections first, then the oldest
+DELETE FROM user_connections
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY LEAST(requester_id, recipient_id), GREATEST(requester_id, recipient_id)
+                   ORDER BY (status = 'ACCEPTED') DESC, created_at, id
+               ) AS rn
+        FROM user_connections
+    ) ranked
+    WHERE rn > 1
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_user_connections_pair
+    ON user_connections (LEAST(requester_id, recipient_id), GREATEST(requester_id, recipient_id));
@@ -0,0 +1,26 @@
+-- Migration: Denormalized connection counters on user_profiles
+-- Created at: 2025-06-15T12:00:00
+
+ALTER TABLE IF EXISTS user_profiles
+    ADD COLUMN IF NOT EXISTS connections_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS pending_incoming_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS pending_outgoing_count INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill from existing connections
+UPDATE user_profiles p
+SET connections_count = c.accepted,
+    pending_incoming_count = c.pending_in,
+    pending_outgoing_count = c.pending_out
+FROM (
+    SELECT profile_id,
+           COUNT(*) FILTER (WHERE status = 'ACCEPTED') AS accepted,
+           COUNT(*) FILTER (WHERE status = 'PENDING' AND side = 'in') AS pending_in,
+           COUNT(*) FILTER (WHERE status = 'PENDING' AND side = 'out') AS pending_out
+    FROM (
+        SELECT requester_id AS profile_id, status, 'out' AS side FROM user_connections
+        UNION ALL
+        SELECT recipient_id AS profile_id, status, 'in' AS side FROM user_connections
+    ) sides
+    GROUP BY profile_id
+) c
+WHERE p.id = c.profile_id;
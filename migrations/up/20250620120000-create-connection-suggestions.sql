@@ -0,0 +1,13 @@
+-- Migration: Precomputed mutual-connection suggestions
+-- Created at: 2025-06-20T12:00:00
+
+CREATE TABLE IF NOT EXISTS connection_suggestions (
+    user_id UUID NOT NULL REFERENCES user_profiles(id) ON DELETE CASCADE,
+    candidate_id UUID NOT NULL REFERENCES user_profiles(id) ON DELETE CASCADE,
+    mutual_count INTEGER NOT NULL,
+    computed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, candidate_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_connection_suggestions_user_rank
+    ON connection_suggestions(user_id, mutual_count);
@@ -0,0 +1,5 @@
+-- Migration: Per-profile connection generation for cached connection data
+-- Created at: 2025-06-25T12:00:00
+
+ALTER TABLE IF EXISTS user_profiles
+    ADD COLUMN IF NOT EXISTS connection_generation BIGINT NOT NULL DEFAULT 0;
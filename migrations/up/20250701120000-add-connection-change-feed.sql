@@ -0,0 +1,19 @@
+-- Migration: Connection change feed (updated_at indexes and deletion tombstones)
+-- Created at: 2025-07-01T12:00:00
+
+CREATE INDEX IF NOT EXISTS idx_user_connections_requester_updated
+    ON user_connections(requester_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_user_connections_recipient_updated
+    ON user_connections(recipient_id, updated_at);
+
+CREATE TABLE IF NOT EXISTS connection_tombstones (
+    connection_id UUID PRIMARY KEY,
+    requester_id UUID NOT NULL,
+    recipient_id UUID NOT NULL,
+    deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_connection_tombstones_requester_deleted
+    ON connection_tombstones(requester_id, deleted_at);
+CREATE INDEX IF NOT EXISTS idx_connection_tombstones_recipient_deleted
+    ON connection_tombstones(recipient_id, deleted_at);
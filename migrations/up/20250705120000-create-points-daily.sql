@@ -0,0 +1,11 @@
+-- Migration: Daily rollups of compacted points ledger rows
+-- Created at: 2025-07-05T12:00:00
+
+CREATE TABLE IF NOT EXISTS points_daily (
+    user_id VARCHAR(36) NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    reason VARCHAR(255) NOT NULL DEFAULT '',
+    amount BIGINT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (user_id, day, reason)
+);
@@ -0,0 +1,7 @@
+-- Migration: Idempotency keys for point awards
+-- Created at: 2025-07-10T12:00:00
+
+ALTER TABLE IF EXISTS points
+    ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(255);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_points_idempotency_key ON points(idempotency_key);
@@ -0,0 +1,11 @@
+-- Migration: Per-user progress of stateful achievement rules
+-- Created at: 2025-07-15T12:00:00
+
+CREATE TABLE IF NOT EXISTS achievement_state (
+    user_id VARCHAR(36) NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    rule_id VARCHAR(100) NOT NULL,
+    value INTEGER NOT NULL DEFAULT 0,
+    last_day DATE,
+    completed BOOLEAN NOT NULL DEFAULT FALSE,
+    PRIMARY KEY (user_id, rule_id)
+);
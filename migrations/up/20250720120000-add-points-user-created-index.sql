@@ -0,0 +1,4 @@
+-- Migration: Index points by user and time for history queries
+-- Created at: 2025-07-20T12:00:00
+
+CREATE INDEX IF NOT EXISTS idx_points_user_created ON points(user_id, created_at);
@@ -115,3 +115,50 @@ def app_context(app):
     """Push a Flask app context for the duration of each test."""
     with app.app_context():
         yield
+
+# ---------------------------------------------------------------------------
+# Query counting
+# ---------------------------------------------------------------------------
+
+from contextlib import contextmanager
+from sqlalchemy import event
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager factory recording the SQL statements executed inside it.
+
+    Usage::
+
+        with count_queries() as queries:
+            ...
+        assert len(queries) == 2
+    """
+    @contextmanager
+    def _count():
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _record)
+
+    return _count
+
+# ---------------------------------------------------------------------------
+# Redis
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def fake_redis(app):
+    """Install an in-memory fakeredis client as the application's Redis."""
+    import fakeredis
+
+    client = fakeredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    app.extensions['redis'] = client
+    yield client
+    app.extensions.pop('redis', None)
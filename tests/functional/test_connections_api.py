@@ -0,0 +1,93 @@
+import json
+import pytest
+from uuid import uuid4
+from flask_jwt_extended import create_access_token
+from app.services.connection_service import request_connection
+from app.services.profile_service import create_profile
+
+
+@pytest.fixture
+def member():
+    """A profile id and auth headers for it."""
+    profile_id = uuid4()
+    create_profile(profile_id, {"username": "connmember"})
+    token = create_access_token(identity=str(profile_id))
+    return profile_id, {"Authorization": f"Bearer {token}"}
+
+
+def test_bulk_accept_connections(client, member):
+    """Test the bulk endpoint accepts pending requests addressed to the caller."""
+    profile_id, headers = member
+    request_ids = []
+    for i in range(2):
+        requester = uuid4()
+        create_profile(requester, {"username": f"bulkapi{i}"})
+        request_ids.append(request_connection(requester, profile_id)["connection"]["id"])
+
+    response = client.post(
+        f"/api/profiles/{profile_id}/connections/bulk",
+        headers=headers,
+        json={"action": "accept", "connection_ids": request_ids}
+    )
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["results"] == {connection_id: "accepted" for connection_id in request_ids}
+
+
+def test_bulk_update_invalid_connection_id(client, member):
+    """Test malformed connection IDs are rejected with 400."""
+    profile_id, headers = member
+    response = client.post(
+        f"/api/profiles/{profile_id}/connections/bulk",
+        headers=headers,
+        json={"action": "accept", "connection_ids": [str(uuid4()), "not-a-uuid"]}
+    )
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Invalid connection ID"
+
+
+def test_bulk_update_other_profile_forbidden(client, member):
+    """Test callers can only act on their own requests."""
+    _, headers = member
+    response = client.post(
+        f"/api/profiles/{uuid4()}/connections/bulk",
+        headers=headers,
+        json={"action": "accept", "connection_ids": []}
+    )
+    assert response.status_code == 403
+
+
+def test_get_suggestions_owner_only(client, member):
+    """Test suggestions are only served to their owner."""
+    profile_id, headers = member
+
+    response = client.get(f"/api/profiles/{profile_id}/suggestions", headers=headers)
+    assert response.status_code == 200
+    assert json.loads(response.data)["suggestions"] == []
+
+    response = client.get(f"/api/profiles/{uuid4()}/suggestions", headers=headers)
+    assert response.status_code == 403
+
+
+def test_connection_status_endpoint(client, member):
+    """Test the batch status lookup validates its input."""
+    profile_id, headers = member
+    other = uuid4()
+    create_profile(other, {"username": "statusapi"})
+    request_connection(profile_id, other)
+
+    response = client.post(
+        f"/api/profiles/{profile_id}/connections/status",
+        headers=headers,
+        json={"profile_ids": [str(other)]}
+    )
+    assert response.status_code == 200
+    assert json.loads(response.data)["statuses"][str(other)]["status"] == "pending_outgoing"
+
+    response = client.post(
+        f"/api/profiles/{profile_id}/connections/status",
+        headers=headers,
+        json={"profile_ids": ["not-a-uuid"]}
+    )
+    assert response.status_code == 400
@@ -73,4 +73,15 @@ def test_search_profiles(client, test_profile, user_token):
     data = json.loads(response.data)
     assert data["success"] is True
     assert len(data["profiles"]) > 0
-    assert test_profile.username in [p["username"] for p in data["profiles"]]
\ No newline at end of file
+    assert test_profile.username in [p["username"] for p in data["profiles"]]
+
+def test_search_profiles_include_expertise(client, test_profile, user_token):
+    """Test the include=expertise option on search."""
+    response = client.get(
+        "/api/profiles/search?q=test&include=expertise",
+        headers={"Authorization": f"Bearer {user_token}"}
+    )
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert all("expertise_areas" in p for p in data["profiles"])
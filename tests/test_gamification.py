@@ -1,6 +1,19 @@
+import datetime
+import json
 import pytest
-from app.models.gamification import Badge, Points, UserBadge
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.gamification import AchievementState, Badge, Points, PointsDaily, UserBadge
 from app.models.user import User
+from app.services.achievements import PointEvent, get_achievement_engine
+from app.services.badge_catalog import bump_badge_catalog_version, get_badge_catalog
+from app.services.gamification_service import GamificationService
+from app.services.leaderboard import get_around, get_rank, get_top, rebuild_leaderboards
+from app.services.points_queue import DEAD_KEY, QUEUE_KEY, enqueue_points, process_points_batch
+from app.services.user_sync import apply_user_events
 
 def test_gamification_flow(client, auth_headers, test_user, db_session):
     """Test the complete gamification flow"""
@@ -110,6 +123,31 @@ def test_level_up(client, auth_headers, test_user, db_session):
     assert user.level == 2
     assert user.total_points == 1000
 
+def test_progress_endpoints_query_counts(client, auth_headers, test_user, count_queries):
+    """Test progress and badges cost a fixed number of statements regardless of badge count"""
+    get_badge_catalog()
+
+    with count_queries() as statements:
+        response = client.post('/api/gamification/points', headers=auth_headers,
+                               json={'points': 1500, 'reason': 'Test points'})
+    assert response.status_code == 200
+    progress = response.get_json()['progress']
+    assert (progress['level'], progress['total_points']) == (2, 1500)
+    assert {badge['requirement'] for badge in progress['badges']} == {'2', 'first_points'}
+    # total UPDATE, ledger INSERT, badge INSERT, badges SELECT; the user is not reloaded
+    assert len(statements) == 4
+
+    with count_queries() as statements:
+        response = client.get('/api/gamification/progress', headers=auth_headers)
+    assert response.get_json()['total_points'] == 1500
+    assert len(response.get_json()['badges']) == 2
+    assert len(statements) == 1  # user and badges in one joined query
+
+    with count_queries() as statements:
+        response = client.get('/api/gamification/badges', headers=auth_headers)
+    assert len(response.get_json()['badges']) == 2
+    assert len(statements) == 1
+
 def test_get_badges(client, auth_headers, test_user):
     """Test getting user's badges"""
     response = client.get('/api/gamification/badges', headers=auth_headers)
@@ -159,4 +197,495 @@ def test_invalid_badge_award(client, auth_headers):
                           headers=auth_headers,
                           json={'type': 'invalid', 'requirement': '999'})
     assert response.status_code == 400
-    assert 'Badge not found' in response.get_json()['message'] 
\ No newline at end of file
+    assert 'Badge not found' in response.get_json()['message']
+
+def test_concurrent_add_points(tmp_path, monkeypatch):
+    """Test concurrent accruals for one user never lose updates"""
+    # A file database so each thread gets its own connection and transaction
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'points.db'}")
+    app = create_app('testing')
+    service = GamificationService()
+    with app.app_context():
+        Badge.create_initial_badges()
+        user = User(email='racer@example.com', username='racer')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    def accrue(_):
+        with app.app_context():
+            return service.add_points(user_id, 10, 'race')
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(accrue, range(200)))
+
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        assert all(success for success, _ in results)
+        assert user.total_points == 2000
+        assert user.level == 3
+        assert Points.query.filter_by(user_id=user_id).count() == 200
+        db.engine.dispose()
+
+def _add_level_badges(levels):
+    for level in levels:
+        db.session.add(Badge(type='level', name=f'Level {level}', requirement=str(level)))
+    db.session.commit()
+    bump_badge_catalog_version()
+
+def test_level_jump_awards_every_crossed_badge(test_user, db_session):
+    """Test a multi-level jump awards each crossed level badge once"""
+    _add_level_badges(range(3, 6))
+    service = GamificationService()
+
+    success, _ = service.add_points(test_user.id, 4500, 'Big jump')
+    assert success
+    level_badges = UserBadge.query.join(Badge).filter(UserBadge.user_id == test_user.id, Badge.type == 'level')
+    assert {ub.badge.requirement for ub in level_badges} == {'2', '3', '4', '5'}
+
+    # Already-held badges are skipped, not duplicated
+    success, _ = service.add_points(test_user.id, 500, 'Next level')
+    assert success
+    assert level_badges.count() == 4
+
+def test_badge_catalog_cached_per_worker(test_user, count_queries, fake_redis):
+    """Test badge lookups come from the catalog until its version is bumped"""
+    service = GamificationService()
+    get_badge_catalog()
+
+    with count_queries() as statements:
+        service.award_badge(test_user.id, 'level', '1')
+        service.award_badge(test_user.id, 'level', '2')
+    assert not any('FROM badges' in statement for statement in statements)
+
+    db.session.add(Badge(type='achievement', name='Streak', requirement='streak_7'))
+    db.session.commit()
+    assert get_badge_catalog().get('achievement', 'streak_7') is None
+
+    fake_redis.incr('badges:catalog:version')  # another worker bumped the version
+    current_app.config['BADGE_CATALOG_CHECK_SECONDS'] = 0
+    assert get_badge_catalog().get('achievement', 'streak_7') is not None
+
+def _make_players(scores):
+    service = GamificationService()
+    players = []
+    for i, score in enumerate(scores):
+        user = User(email=f'player{i}@example.com', username=f'player{i}')
+        db.session.add(user)
+        db.session.commit()
+        service.add_points(user.id, score, 'game')
+        players.append(user.id)
+    return players
+
+def test_leaderboards(fake_redis):
+    """Test top-N, rank and around-me queries on the Redis boards"""
+    players = _make_players([300, 100, 500, 200, 400])
+
+    top = get_top(limit=3)
+    assert [(e['rank'], e['user_id'], e['score']) for e in top['entries']] == [
+        (1, players[2], 500), (2, players[4], 400), (3, players[0], 300)
+    ]
+    assert top['entries'][0]['username'] == 'player2'
+
+    assert get_rank(players[3]) == {'success': True, 'board': 'global', 'rank': 4, 'score': 200}
+    around = get_around(players[0], radius=1)
+    assert [e['user_id'] for e in around['entries']] == [players[4], players[0], players[3]]
+
+    weekly = get_top('weekly')
+    assert weekly['entries'][0]['score'] == 500
+    weekly_key = next(fake_redis.scan_iter('lb:weekly:*'))
+    assert fake_redis.ttl(weekly_key) > 0
+    assert get_top('yearly')['success'] is False
+
+def test_rebuild_leaderboards(fake_redis):
+    """Test the rebuild reproduces the incrementally maintained boards"""
+    _make_players([300, 100, 500])
+    before = {key: fake_redis.zrange(key, 0, -1, withscores=True) for key in fake_redis.scan_iter('lb:*')}
+
+    fake_redis.flushall()
+    assert rebuild_leaderboards(batch_size=2) == 3
+
+    after = {key: fake_redis.zrange(key, 0, -1, withscores=True) for key in fake_redis.scan_iter('lb:*')}
+    assert after == before
+
+def test_leaderboard_unavailable_without_redis(client, auth_headers):
+    """Test the leaderboard endpoints report Redis being unavailable"""
+    response = client.get('/api/gamification/leaderboard', headers=auth_headers)
+    assert response.status_code == 503
+
+def test_compact_points_preserves_history(test_user):
+    """Test compaction moves old rows into daily rollups without changing history"""
+    now = datetime.datetime.utcnow()
+    old_day = now - datetime.timedelta(days=100)
+    for amount, reason, when in [
+        (10, 'quiz', old_day), (15, 'quiz', old_day), (5, None, old_day),
+        (7, 'quiz', old_day - datetime.timedelta(days=1)), (20, 'quiz', now),
+    ]:
+        db.session.add(Points(user_id=test_user.id, amount=amount, reason=reason, created_at=when))
+    db.session.commit()
+    service = GamificationService()
+    before = service.get_points_history(test_user.id)
+
+    assert service.compact_points(older_than_days=90, batch_size=2) == 4
+
+    assert Points.query.count() == 1
+    assert PointsDaily.query.count() == 3
+    assert service.get_points_history(test_user.id) == before
+    assert {(e['reason'], e['amount'], e['count']) for e in before if e['day'] == old_day.date().isoformat()} == {
+        ('quiz', 25, 2), (None, 5, 1)
+    }
+
+    # Compacting again merges into existing rollups
+    db.session.add(Points(user_id=test_user.id, amount=1, reason='quiz', created_at=old_day))
+    db.session.commit()
+    service.compact_points(older_than_days=90)
+    rollup = db.session.get(PointsDaily, (test_user.id, old_day.date(), 'quiz'))
+    assert (rollup.amount, rollup.count) == (26, 3)
+
+def test_points_history_buckets(client, auth_headers, test_user, count_queries):
+    """Test history is bucketed in SQL, paginated by cursor and cached once closed"""
+    for amount, reason, day in [
+        (10, 'quiz', 2), (5, 'login', 3), (7, 'quiz', 9), (1, 'quiz', 23), (2, 'quiz', 30),
+    ]:
+        db.session.add(Points(user_id=test_user.id, amount=amount, reason=reason,
+                              created_at=datetime.datetime(2025, 6, day, 12)))
+    db.session.add(PointsDaily(user_id=test_user.id, day=datetime.date(2025, 6, 4), reason='quiz',
+                               amount=100, count=4))
+    db.session.commit()
+    url = '/api/gamification/history?bucket=week&from=2025-06-02&to=2025-06-29&limit=2&by_reason=true'
+
+    response = client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    page = response.get_json()
+    assert [(b['start'], b['amount'], b['count']) for b in page['buckets']] == [
+        ('2025-06-02', 115, 6), ('2025-06-09', 7, 1)
+    ]
+    assert page['buckets'][0]['reasons'] == [
+        {'reason': 'login', 'amount': 5, 'count': 1}, {'reason': 'quiz', 'amount': 110, 'count': 5}
+    ]
+
+    response = client.get(f"{url}&cursor={page['next_cursor']}", headers=auth_headers)
+    page = response.get_json()
+    assert [(b['start'], b['amount']) for b in page['buckets']] == [('2025-06-23', 1)]  # the 30th is after to
+    assert page['next_cursor'] is None
+
+    # Closed buckets are served from the cache
+    with count_queries() as statements:
+        assert client.get(url, headers=auth_headers).status_code == 200
+    assert statements == []
+
+    response = client.get('/api/gamification/history?bucket=month&from=2025-06-01&to=2025-06-30',
+                          headers=auth_headers)
+    assert response.get_json()['buckets'] == [{'start': '2025-06-01', 'amount': 125, 'count': 9}]
+
+    assert client.get('/api/gamification/history?bucket=year', headers=auth_headers).status_code == 400
+    assert client.get('/api/gamification/history?from=June', headers=auth_headers).status_code == 400
+
+def test_points_history_open_bucket_follows_utc(test_user, monkeypatch):
+    """Test the bucket still receiving points (by UTC) is never cached"""
+    class FrozenDatetime(datetime.datetime):
+        @classmethod
+        def utcnow(cls):
+            return cls(2025, 6, 10, 23, 30)
+
+    monkeypatch.setattr('app.services.gamification_service.datetime', FrozenDatetime)
+    service = GamificationService()
+    history = lambda: service.get_points_buckets(test_user.id, 'week', datetime.date(2025, 6, 2),
+                                                 datetime.date(2025, 6, 15))[2]['buckets']
+    db.session.add(Points(user_id=test_user.id, amount=1, reason='quiz', created_at=datetime.datetime(2025, 6, 3)))
+    db.session.commit()
+    assert [b['amount'] for b in history()] == [1]
+
+    db.session.add(Points(user_id=test_user.id, amount=2, reason='quiz', created_at=datetime.datetime(2025, 6, 10, 23)))
+    db.session.commit()
+    assert [b['amount'] for b in history()] == [1, 2]
+    db.session.add(Points(user_id=test_user.id, amount=4, reason='quiz', created_at=datetime.datetime(2025, 6, 10, 23, 15)))
+    db.session.commit()
+    assert [b['amount'] for b in history()] == [1, 6]
+
+def _make_users(count):
+    users = [User(email=f'bulk{i}@example.com', username=f'bulk{i}') for i in range(count)]
+    db.session.add_all(users)
+    db.session.commit()
+    return [user.id for user in users]
+
+def test_add_points_bulk(count_queries):
+    """Test bulk awards drop duplicate keys and cost a fixed number of statements"""
+    users = _make_users(50)
+    awards = [
+        {'user_id': user_id, 'points': 600, 'reason': 'import', 'idempotency_key': f'{user_id}-{n}'}
+        for user_id in users for n in range(2)
+    ]
+    awards.append(dict(awards[0]))  # repeated within the batch
+    service = GamificationService()
+
+    with count_queries() as statements:
+        success, _, summary = service.add_points_bulk(awards, chunk_size=500)
+
+    assert success
+    assert summary == {'accepted': 100, 'duplicates': 1, 'users': 50, 'skipped': 0, 'unknown_users': []}
+    # user lookup, 1 ledger chunk, totals UPDATE, badge INSERT (+ catalog load)
+    assert len([s for s in statements if not s.startswith('SELECT badges')]) == 4
+    user = db.session.get(User, users[0])
+    assert (user.total_points, user.level) == (1200, 2)
+    assert UserBadge.query.count() == 100  # level 2 and first_points for each user
+
+    # A retried batch is a no-op
+    success, _, summary = service.add_points_bulk(awards)
+    assert summary['accepted'] == 0
+    assert db.session.get(User, users[0]).total_points == 1200
+
+def test_add_points_bulk_skips_unknown_users(monkeypatch):
+    """Test awards for unknown users are reported without calling the Auth Service"""
+    monkeypatch.setattr('app.services.gamification_service.get_user_basic',
+                        lambda _user_id: pytest.fail('Auth Service called'))
+    user_id = _make_users(1)[0]
+    awards = [
+        {'user_id': 'ghost-b', 'points': 5, 'idempotency_key': 'g1'},
+        {'user_id': user_id, 'points': 5, 'idempotency_key': 'k1'},
+        {'user_id': 'ghost-a', 'points': 5, 'idempotency_key': 'g2'},
+    ]
+
+    success, _, summary = GamificationService().add_points_bulk(awards)
+
+    assert success
+    assert (summary['accepted'], summary['skipped'], summary['unknown_users']) == (1, 2, ['ghost-a', 'ghost-b'])
+    assert db.session.get(User, 'ghost-a') is None
+    assert db.session.get(User, user_id).total_points == 5
+
+def test_add_points_bulk_validation():
+    """Test malformed awards are rejected with their position"""
+    success, message, _ = GamificationService().add_points_bulk([{'user_id': 'x', 'points': 0}])
+    assert not success
+    assert message.startswith('Award 0')
+
+def test_add_points_bulk_endpoint(client, auth_headers, test_user, monkeypatch):
+    """Test the bulk endpoint requires the award permission"""
+    payload = {'awards': [{'user_id': test_user.id, 'points': 5, 'idempotency_key': 'k1'}]}
+    response = client.post('/api/gamification/points/bulk', headers=auth_headers, json=payload)
+    assert response.status_code == 403
+
+    monkeypatch.setattr(
+        'app.utils.auth_client.get_user_permissions',
+        lambda _user_id: {'success': True, 'permissions': ['gamification:award']}
+    )
+    response = client.post('/api/gamification/points/bulk', headers=auth_headers, json=payload)
+    assert response.status_code == 200
+    assert response.get_json()['accepted'] == 1
+
+def test_ingest_points_command(app, tmp_path):
+    """Test the NDJSON ingestion command"""
+    users = _make_users(2)
+    source = tmp_path / 'awards.ndjson'
+    source.write_text('\n'.join(
+        json.dumps({'user_id': user_id, 'points': 10, 'reason': 'cli', 'idempotency_key': f'cli-{user_id}'})
+        for user_id in users + users
+    ) + '\n')
+
+    result = app.test_cli_runner().invoke(args=['ingest-points', str(source), '--batch-size', '3'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Recorded 2 awards, skipped 2 duplicates' in result.output
+
+def test_first_points_awarded_by_rule(test_user):
+    """Test the default threshold rule awards first_points once"""
+    service = GamificationService()
+    service.add_points(test_user.id, 5, 'signup')
+    service.add_points(test_user.id, 5, 'signup')
+
+    awarded = [ub.badge.requirement for ub in UserBadge.query.filter_by(user_id=test_user.id)]
+    assert awarded == ['first_points']
+
+def test_stateful_achievement_rules(app, test_user, count_queries):
+    """Test count and streak rules advance stored state instead of rescanning points"""
+    app.config['ACHIEVEMENT_RULES'] = [
+        {'id': 'three_posts', 'type': 'count', 'count': 3, 'reason': 'post', 'badge': 'posts_3'},
+        {'id': 'streak', 'type': 'streak', 'days': 3, 'badge': 'streak_3'},
+    ]
+    app.extensions.pop('achievement_engine', None)
+    db.session.add_all([
+        Badge(type='achievement', name='Poster', requirement='posts_3'),
+        Badge(type='achievement', name='Streak', requirement='streak_3'),
+    ])
+    db.session.commit()
+    bump_badge_catalog_version()
+    engine = get_achievement_engine()
+    user_id = test_user.id
+    day = datetime.date(2025, 7, 1)
+
+    def evaluate(*events):
+        awards = engine.evaluate([PointEvent(user_id, 1, reason, 1, d) for reason, d in events])
+        db.session.commit()
+        return {badge.requirement for _, badge in awards}
+
+    assert evaluate(('post', day), ('comment', day)) == set()
+    with count_queries() as statements:
+        assert evaluate(('post', day + datetime.timedelta(days=1))) == set()
+    # one state read, one upsert; the points ledger is never queried
+    assert len(statements) == 2
+    assert not any('FROM points' in statement for statement in statements)
+
+    assert evaluate(('post', day + datetime.timedelta(days=2))) == {'posts_3', 'streak_3'}
+    assert evaluate(('post', day + datetime.timedelta(days=3))) == set()  # completed rules stay quiet
+
+    # A missed day restarts a streak
+    state = db.session.get(AchievementState, (user_id, 'streak'))
+    state.completed, state.value = False, 2
+    db.session.commit()
+    assert evaluate(('post', day + datetime.timedelta(days=5))) == set()
+    assert db.session.get(AchievementState, (user_id, 'streak')).value == 1
+
+def test_invalid_achievement_rule(app):
+    """Test malformed rules are rejected when the engine is compiled"""
+    app.config['ACHIEVEMENT_RULES'] = [{'id': 'bad', 'type': 'count', 'badge': 'x'}]
+    app.extensions.pop('achievement_engine', None)
+    with pytest.raises(ValueError):
+        get_achievement_engine()
+
+def test_add_points_async(client, auth_headers, test_user, fake_redis):
+    """Test async mode queues the award and returns 202 without touching totals"""
+    response = client.post('/api/gamification/points', headers=auth_headers,
+                           json={'points': 50, 'reason': 'quiz', 'async': True})
+    assert response.status_code == 202
+    assert fake_redis.llen(QUEUE_KEY) == 1
+    assert db.session.get(User, test_user.id).total_points == 0
+
+    assert process_points_batch(timeout=0) == {'applied': 1, 'duplicates': 0, 'dead': 0}
+    db.session.expire_all()
+    assert db.session.get(User, test_user.id).total_points == 50
+
+def test_add_points_async_creates_new_user(client, fake_redis, monkeypatch):
+    """Test the worker creates a user with no local row from the Auth Service, like the sync path"""
+    monkeypatch.setattr('app.services.gamification_service.get_user_basic',
+                        lambda _user_id: {'success': True, 'email': 'new@example.com', 'username': 'newbie'})
+    headers = {'Authorization': f"Bearer {create_access_token(identity='new-user')}"}
+    response = client.post('/api/gamification/points', headers=headers, json={'points': 30, 'async': True})
+    assert response.status_code == 202
+
+    assert process_points_batch(timeout=0) == {'applied': 1, 'duplicates': 0, 'dead': 0}
+    user = db.session.get(User, 'new-user')
+    assert (user.username, user.total_points) == ('newbie', 30)
+    assert fake_redis.llen(DEAD_KEY) == 0
+
+def test_add_points_async_scopes_and_validates_keys(client, auth_headers, test_user, fake_redis):
+    """Test client keys are scoped to the caller and bad keys are rejected up front"""
+    response = client.post('/api/gamification/points', headers=auth_headers,
+                           json={'points': 5, 'async': True, 'idempotency_key': 'import-42'})
+    assert response.status_code == 202
+    assert response.get_json()['idempotency_key'] == f'user:{test_user.id}:import-42'
+
+    for key in (42, '', 'k' * 255):
+        response = client.post('/api/gamification/points', headers=auth_headers,
+                               json={'points': 5, 'async': True, 'idempotency_key': key})
+        assert response.status_code == 400
+    assert fake_redis.llen(QUEUE_KEY) == 1
+
+def test_add_points_async_without_queue(client, auth_headers):
+    """Test async mode is unavailable without Redis"""
+    response = client.post('/api/gamification/points?async=true', headers=auth_headers, json={'points': 5})
+    assert response.status_code == 503
+
+def test_points_worker_batches(fake_redis, count_queries, monkeypatch):
+    """Test the worker aggregates a batch per user, dead-letters bad events and survives redelivery"""
+    monkeypatch.setattr('app.services.gamification_service.get_user_basic',
+                        lambda _user_id: {'success': False, 'not_found': True})
+    users = _make_users(2)
+    for user_id in users:
+        for n in range(3):
+            enqueue_points(user_id, 400, 'quiz', idempotency_key=f'{user_id}-{n}')
+    fake_redis.lpush(QUEUE_KEY, 'not json', json.dumps({'user_id': users[0], 'points': -1}),
+                     json.dumps({'user_id': 'ghost', 'points': 5}))
+    get_badge_catalog()
+
+    with count_queries() as statements:
+        summary = process_points_batch('w1', batch_size=100, timeout=0)
+    assert summary == {'applied': 6, 'duplicates': 0, 'dead': 3}
+    errors = sorted(json.loads(raw)['error'] for raw in fake_redis.lrange(DEAD_KEY, 0, -1))
+    assert errors == ['invalid points value', 'not a JSON object', 'user not found']
+    assert fake_redis.llen(QUEUE_KEY) == 0
+    assert [(u.total_points, u.level) for u in User.query.filter(User.id.in_(users))] == [(1200, 2), (1200, 2)]
+    # bad events are dropped up front, the rest is one bulk apply
+    assert len(statements) < 20
+
+    # A worker that crashed before clearing its batch re-applies it harmlessly
+    for n in range(3):
+        fake_redis.lpush('gamification:points:processing:w1',
+                         json.dumps({'user_id': users[0], 'points': 400, 'idempotency_key': f'user:{users[0]}:{users[0]}-{n}'}))
+    assert process_points_batch('w1', timeout=0) == {'applied': 0, 'duplicates': 3, 'dead': 0}
+    assert db.session.get(User, users[0]).total_points == 1200
+    assert process_points_batch('w1', timeout=0)['applied'] == 0
+
+def test_gamification_worker_command(app, fake_redis):
+    """Test the worker CLI drains the queue"""
+    user_id = _make_users(1)[0]
+    enqueue_points(user_id, 10, 'cli')
+
+    result = app.test_cli_runner().invoke(args=['gamification-worker', '--consumer', 'cli',
+                                                '--max-batches', '2', '--timeout', '0'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Applied 1 events' in result.output
+    assert db.session.get(User, user_id).total_points == 10
+
+def _user_event(kind, user_id, **fields):
+    return {'type': kind, 'user': {'id': user_id, **fields}}
+
+def test_user_events_webhook(client, auth_headers, test_user, monkeypatch):
+    """Test auth user events upsert and delete local users in one batch"""
+    payload = {'events': [_user_event('user.created', 'u-1', email='u1@example.com', username='u1')]}
+    assert client.post('/api/gamification/users/events', headers=auth_headers, json=payload).status_code == 403
+
+    monkeypatch.setattr(
+        'app.utils.auth_client.get_user_permissions',
+        lambda _user_id: {'success': True, 'permissions': ['gamification:sync-users']}
+    )
+    user_id = test_user.id
+    GamificationService().add_points(user_id, 10, 'quiz')
+    payload = {'events': [
+        _user_event('user.created', 'u-1', email='u1@example.com', username='u1'),
+        _user_event('user.created', 'u-2', email='u2@example.com', username='u2'),
+        _user_event('user.updated', 'u-1', email='new@example.com', username='u1'),
+        _user_event('user.created', 'u-3', email='u2@example.com', username='u3'),  # email taken
+        _user_event('user.deleted', user_id),
+    ]}
+    response = client.post('/api/gamification/users/events', headers=auth_headers, json=payload)
+
+    assert response.status_code == 200
+    assert (response.get_json()['upserted'], response.get_json()['deleted']) == (2, 1)
+    db.session.expire_all()
+    assert db.session.get(User, 'u-1').email == 'new@example.com'
+    assert db.session.get(User, 'u-3') is None
+    assert db.session.get(User, user_id) is None
+    assert Points.query.count() == 0
+
+    payload = {'events': [{'type': 'user.renamed', 'user': {'id': 'u-1'}}]}
+    assert client.post('/api/gamification/users/events', headers=auth_headers, json=payload).status_code == 400
+
+def test_unknown_users_negatively_cached(monkeypatch):
+    """Test IDs the Auth Service does not know are not looked up again"""
+    calls = []
+    monkeypatch.setattr('app.services.gamification_service.get_user_basic',
+                        lambda user_id: calls.append(user_id) or {'success': False, 'not_found': True})
+    service = GamificationService()
+
+    assert service.add_points('ghost', 5, 'quiz') == (False, 'User not found')
+    assert service.add_points('ghost', 5, 'quiz') == (False, 'User not found')
+    assert calls == ['ghost']
+
+    # Provisioning the user clears the negative entry
+    apply_user_events([_user_event('user.created', 'ghost', email='ghost@example.com', username='ghost')])
+    assert service.add_points('ghost', 5, 'quiz') == (True, 'Points added successfully')
+    assert calls == ['ghost']
+
+def test_backfill_users_command(app, tmp_path):
+    """Test the NDJSON user backfill command"""
+    source = tmp_path / 'users.ndjson'
+    source.write_text('\n'.join(
+        json.dumps({'id': f'b-{i}', 'email': f'b{i}@example.com', 'username': f'b{i}'}) for i in range(5)
+    ) + '\n')
+
+    result = app.test_cli_runner().invoke(args=['backfill-users', str(source), '--batch-size', '2'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Upserted 5 users' in result.output
+    assert User.query.filter(User.id.like('b-%')).count() == 5
@@ -0,0 +1,145 @@
+import pytest
+from uuid import uuid4
+from app.services.connection_graph import (
+    are_connected,
+    connected_subset,
+    get_neighbors,
+    get_neighbors_many,
+    rebuild_connection_graph,
+    shortest_distance,
+)
+from app.services.connection_service import (
+    request_connection,
+    update_connection_status,
+    delete_connection,
+    get_connection_distance,
+)
+from app.services.profile_service import create_profile, get_profile_by_id, search_profiles
+from app.utils.cache import get_cache
+
+
+def _make_profile(username, visibility="PUBLIC"):
+    user_id = uuid4()
+    create_profile(user_id, {"username": username, "visibility": visibility})
+    return user_id
+
+
+def _accept(a, b):
+    connection = request_connection(a, b)["connection"]
+    update_connection_status(b, connection["id"], "ACCEPTED")
+    return connection["id"]
+
+
+@pytest.fixture
+def trio():
+    return _make_profile("graphalice"), _make_profile("graphbob"), _make_profile("graphcarol")
+
+
+@pytest.mark.parametrize("with_redis", [False, True])
+def test_graph_follows_connection_lifecycle(request, trio, with_redis):
+    """Test membership checks follow accept and delete, with and without Redis."""
+    if with_redis:
+        request.getfixturevalue("fake_redis")
+    alice, bob, carol = trio
+
+    # Warm both layers before the writes so they must be kept current
+    assert get_neighbors(alice) == frozenset()
+    assert not are_connected(alice, bob)
+
+    connection_id = _accept(alice, bob)
+    assert are_connected(alice, bob) and are_connected(bob, alice)
+    assert connected_subset(alice, [bob, carol]) == {str(bob)}
+
+    pending = request_connection(alice, carol)["connection"]
+    assert not are_connected(alice, carol)
+    update_connection_status(carol, pending["id"], "REJECTED")
+    assert not are_connected(alice, carol)
+
+    delete_connection(alice, connection_id)
+    assert not are_connected(alice, bob)
+
+
+def test_redis_answers_without_database(app, trio, fake_redis, count_queries):
+    """Test loaded sets are served from Redis once the local layer is cold."""
+    alice, bob, carol = trio
+    _accept(alice, bob)
+    get_neighbors(alice)
+    get_cache("connection_adjacency").clear()
+
+    with count_queries() as queries:
+        assert connected_subset(alice, [bob, carol]) == {str(bob)}
+    assert queries == []
+
+
+def test_rebuild_connection_graph(trio, fake_redis):
+    """Test the bulk loader writes complete sets for every connected user."""
+    alice, bob, carol = trio
+    _accept(alice, bob)
+    _accept(carol, alice)
+    fake_redis.flushall()
+
+    assert rebuild_connection_graph(batch_size=1) == 3
+    assert fake_redis.smembers(f"conn:adj:{alice}") == {"*", str(bob), str(carol)}
+    assert fake_redis.smembers(f"conn:adj:{bob}") == {"*", str(alice)}
+
+
+def test_connections_only_visibility_enforced(trio):
+    """Test CONNECTIONS_ONLY profiles are hidden from non-connections."""
+    alice, bob, _ = trio
+    hidden = _make_profile("graphdave", visibility="CONNECTIONS_ONLY")
+
+    assert get_profile_by_id(hidden, viewer_id=alice) is None
+    assert search_profiles(visibility="CONNECTIONS_ONLY", viewer_id=alice)["profiles"] == []
+
+    _accept(hidden, alice)
+    assert get_profile_by_id(hidden, viewer_id=alice)["username"] == "graphdave"
+    assert get_profile_by_id(hidden, viewer_id=bob) is None
+    result = search_profiles(visibility="CONNECTIONS_ONLY", viewer_id=alice)
+    assert [p["username"] for p in result["profiles"]] == ["graphdave"]
+
+
+@pytest.fixture
+def chain():
+    """Five profiles connected in a line: p0 - p1 - p2 - p3 - p4."""
+    people = [_make_profile(f"chain{i}") for i in range(5)]
+    for a, b in zip(people, people[1:]):
+        _accept(a, b)
+    return people
+
+
+@pytest.mark.parametrize("with_redis", [False, True])
+def test_neighbors_many_batches_lookups(request, chain, count_queries, with_redis):
+    """Test a whole frontier is resolved with one query."""
+    if with_redis:
+        request.getfixturevalue("fake_redis")
+    get_cache("connection_adjacency").clear()
+
+    with count_queries() as statements:
+        neighbors = get_neighbors_many(chain)
+
+    assert len(statements) == 1
+    assert neighbors[str(chain[2])] == {str(chain[1]), str(chain[3])}
+    assert neighbors[str(chain[0])] == {str(chain[1])}
+
+
+def test_shortest_distance(chain):
+    """Test distances, the depth bound and the visit budget."""
+    assert shortest_distance(chain[0], chain[0], 3, 100)["distance"] == 0
+    assert shortest_distance(chain[0], chain[1], 3, 100)["distance"] == 1
+    assert shortest_distance(chain[0], chain[3], 3, 100)["distance"] == 3
+    assert shortest_distance(chain[0], chain[4], 3, 100) == {"distance": None, "truncated": False}
+    assert shortest_distance(chain[0], chain[4], 4, 100)["distance"] == 4
+    assert shortest_distance(chain[0], chain[4], 4, 3) == {"distance": None, "truncated": True}
+
+
+def test_connection_distance_is_memoized(chain, count_queries):
+    """Test repeated lookups for either ordering of the pair hit the memo."""
+    assert get_connection_distance(chain[0], chain[2])["distance"] == 2
+
+    with count_queries() as statements:
+        result = get_connection_distance(chain[2], chain[0])
+
+    assert result["distance"] == 2
+    assert len(statements) == 1  # profile existence check only
+    assert get_connection_distance(chain[0], chain[2], max_depth=0)["success"] is False
+    assert get_connection_distance(chain[0], uuid4())["message"] == "Profile not found"
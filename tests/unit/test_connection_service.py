@@ -0,0 +1,291 @@
+import datetime
+import pytest
+from uuid import uuid4
+from app import db
+from app.models.connection import UserConnection
+from app.services.connection_service import (
+    delete_connection,
+    get_connection_changes,
+    get_connection_statuses,
+    get_connections,
+    request_connection,
+    update_connection_status,
+)
+from app.services.profile_service import create_profile
+
+
+def _make_profile(username):
+    user_id = uuid4()
+    create_profile(user_id, {"username": username})
+    return user_id
+
+
+def _connect(requester, recipient, status="ACCEPTED", minutes_ago=0):
+    connection = UserConnection(
+        requester_id=str(requester),
+        recipient_id=str(recipient),
+        status=status,
+        created_at=datetime.datetime.utcnow() - datetime.timedelta(minutes=minutes_ago)
+    )
+    db.session.add(connection)
+    db.session.commit()
+    return connection
+
+
+@pytest.fixture
+def hub():
+    """A profile with a mix of incoming/outgoing and accepted/pending connections."""
+    hub_id = _make_profile("hubuser")
+    for i in range(6):
+        other = _make_profile(f"spoke{i}")
+        if i % 2:
+            _connect(hub_id, other, minutes_ago=i)
+        else:
+            _connect(other, hub_id, minutes_ago=i)
+    _connect(_make_profile("pendingspoke"), hub_id, status="PENDING")
+    return hub_id
+
+
+def test_get_connections_filters_in_sql(hub):
+    """Test status and direction filters."""
+    accepted = get_connections(hub)
+    assert len(accepted["connections"]) == 6
+    assert accepted["next_cursor"] is None
+
+    incoming = get_connections(hub, direction="incoming")
+    assert all(c["recipient_id"] == str(hub) for c in incoming["connections"])
+    assert len(incoming["connections"]) == 3
+
+    pending = get_connections(hub, status="PENDING")
+    assert [c["status"] for c in pending["connections"]] == ["PENDING"]
+
+    assert get_connections(hub, direction="sideways")["success"] is False
+
+
+def test_get_connections_keyset_pagination(hub):
+    """Test pages are newest first and do not overlap."""
+    seen = []
+    cursor = None
+    while True:
+        page = get_connections(hub, limit=4, cursor=cursor)
+        seen.extend(page["connections"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 6
+    assert len({c["id"] for c in seen}) == 6
+    created = [c["created_at"] for c in seen]
+    assert created == sorted(created, reverse=True)
+
+    assert get_connections(hub, cursor="not-a-cursor")["message"] == "Invalid cursor"
+
+
+def test_get_connections_include_profile(hub, count_queries):
+    """Test counterpart summaries are embedded without extra queries."""
+    with count_queries() as queries:
+        result = get_connections(hub, include_profile=True)
+    # One profile lookup plus one listing query
+    assert len(queries) == 2
+    for connection in result["connections"]:
+        counterpart = connection["counterpart"]
+        assert counterpart["id"] != str(hub)
+        assert counterpart["username"].startswith("spoke")
+
+
+def test_request_connection_round_trips(count_queries):
+    """Test a successful request costs the insert plus the counter update."""
+    alice, bob = _make_profile("pairalice"), _make_profile("pairbob")
+    with count_queries() as queries:
+        result = request_connection(alice, bob)
+    assert result["success"] is True
+    assert result["connection"]["status"] == "PENDING"
+    assert len(queries) == 2
+
+
+def test_request_connection_conflicts():
+    """Test duplicate, reverse and invalid requests map to the existing messages."""
+    alice, bob = _make_profile("pairalice2"), _make_profile("pairbob2")
+    request_connection(alice, bob)
+
+    assert request_connection(alice, bob)["message"] == "Connection already exists with status: PENDING"
+    assert request_connection(bob, alice)["message"] == "Reverse connection already exists with status: PENDING"
+    assert request_connection(alice, alice)["message"] == "Cannot connect with yourself"
+    assert request_connection(uuid4(), bob)["message"] == "Requester profile not found"
+    assert request_connection(alice, uuid4())["message"] == "Recipient profile not found"
+
+
+def test_pair_unique_index_rejects_reverse_row():
+    """Test the unordered-pair index blocks reciprocal rows written directly."""
+    from sqlalchemy.exc import IntegrityError
+
+    alice, bob = _make_profile("pairalice3"), _make_profile("pairbob3")
+    _connect(alice, bob, status="PENDING")
+    with pytest.raises(IntegrityError):
+        _connect(bob, alice, status="PENDING")
+    db.session.rollback()
+
+
+def test_bulk_update_connections():
+    """Test bulk accept reports per-ID outcomes and only touches the caller's pending requests."""
+    from app.services.connection_service import bulk_update_connections
+
+    me = _make_profile("bulkme")
+    pending = [_connect(_make_profile(f"bulkfan{i}"), me, status="PENDING").id for i in range(3)]
+    accepted = _connect(_make_profile("bulkfriend"), me).id
+    not_mine = _connect(me, _make_profile("bulkother"), status="PENDING").id
+    unknown = str(uuid4())
+
+    result = bulk_update_connections(me, "accept", connection_ids=pending[:2] + [accepted, not_mine, unknown])
+    assert result["success"] is True
+    assert result["results"] == {
+        pending[0]: "accepted",
+        pending[1]: "accepted",
+        accepted: "not_pending",
+        not_mine: "not_found",
+        unknown: "not_found",
+    }
+
+    swept = bulk_update_connections(me, "delete", pending_before=datetime.datetime.utcnow())
+    assert swept["results"] == {pending[2]: "deleted"}
+    assert get_connections(me, status="PENDING", direction="incoming")["connections"] == []
+
+    assert bulk_update_connections(me, "ignore", connection_ids=pending)["success"] is False
+    assert bulk_update_connections(me, "accept")["success"] is False
+
+
+def _counters(profile_id):
+    from app.models.profile import UserProfile
+
+    profile = db.session.get(UserProfile, str(profile_id))
+    db.session.refresh(profile)
+    return (profile.connections_count, profile.pending_incoming_count, profile.pending_outgoing_count)
+
+
+def test_connection_counters_follow_lifecycle():
+    """Test counters are maintained by request, accept, reject, delete and bulk updates."""
+    from app.services.connection_service import (
+        bulk_update_connections,
+        delete_connection,
+        update_connection_status,
+    )
+
+    alice, bob, carol = (_make_profile(f"counter{n}") for n in ("alice", "bob", "carol"))
+
+    first = request_connection(alice, bob)["connection"]["id"]
+    second = request_connection(carol, bob)["connection"]["id"]
+    assert _counters(alice) == (0, 0, 1)
+    assert _counters(bob) == (0, 2, 0)
+
+    update_connection_status(bob, first, "ACCEPTED")
+    assert _counters(alice) == (1, 0, 0)
+    assert _counters(bob) == (1, 1, 0)
+
+    bulk_update_connections(bob, "reject", connection_ids=[second])
+    assert _counters(bob) == (1, 0, 0)
+    assert _counters(carol) == (0, 0, 0)
+
+    delete_connection(alice, first)
+    assert _counters(alice) == (0, 0, 0)
+    assert _counters(bob) == (0, 0, 0)
+
+
+def test_reconcile_connection_counters():
+    """Test reconciliation repairs drifted counters only."""
+    from app.models.profile import UserProfile
+    from app.services.connection_service import reconcile_connection_counters
+
+    alice, bob = _make_profile("driftalice"), _make_profile("driftbob")
+    request_connection(alice, bob)
+    db.session.execute(
+        db.update(UserProfile).where(UserProfile.id == str(alice)).values(pending_outgoing_count=7)
+    )
+    db.session.commit()
+
+    assert reconcile_connection_counters(batch_size=1) == 1
+    assert _counters(alice) == (0, 0, 1)
+    assert reconcile_connection_counters() == 0
+
+
+def test_connection_statuses(count_queries):
+    """Test statuses in both directions come from one query and are cached per generation."""
+    viewer = _make_profile("statusviewer")
+    friend, asked, asker, stranger = (_make_profile(f"status{i}") for i in range(4))
+    _connect(friend, viewer)
+    outgoing = request_connection(viewer, asked)["connection"]
+    request_connection(asker, viewer)
+
+    with count_queries() as statements:
+        result = get_connection_statuses(viewer, [friend, asked, asker, stranger, viewer])
+    assert len(statements) == 2  # viewer generation + pair lookup
+    statuses = {pid: entry["status"] for pid, entry in result["statuses"].items()}
+    assert statuses == {
+        str(friend): "connected",
+        str(asked): "pending_outgoing",
+        str(asker): "pending_incoming",
+        str(stranger): "none",
+        str(viewer): "self",
+    }
+
+    with count_queries() as statements:
+        cached = get_connection_statuses(viewer, [stranger, asker, friend, asked, viewer])
+    assert len(statements) == 1
+    assert cached == result
+
+    update_connection_status(asked, outgoing["id"], "REJECTED")
+    changed = get_connection_statuses(viewer, [asked])
+    assert changed["generation"] > result["generation"]
+    assert changed["statuses"][str(asked)]["status"] == "rejected"
+
+    delete_connection(viewer, outgoing["id"])
+    assert get_connection_statuses(viewer, [asked])["statuses"][str(asked)]["status"] == "none"
+
+
+def _sync(profile_id, cursor=None, limit=None):
+    changes = []
+    while True:
+        page = get_connection_changes(profile_id, cursor=cursor, limit=limit)
+        changes.extend(page["changes"])
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            return changes, cursor
+
+
+def test_connection_change_feed(app):
+    """Test the feed reports inserts, status changes and deletions incrementally."""
+    app.config["CONNECTION_FEED_SETTLE_SECONDS"] = 0
+    me = _make_profile("feedme")
+    a, b, c = (_make_profile(f"feed{i}") for i in range(3))
+    first = request_connection(a, me)["connection"]
+    second = request_connection(me, b)["connection"]
+
+    changes, cursor = _sync(me, limit=1)
+    assert [(ch["change"], ch["connection"]["id"]) for ch in changes] == [
+        ("upserted", first["id"]),
+        ("upserted", second["id"]),
+    ]
+
+    update_connection_status(me, first["id"], "ACCEPTED")
+    delete_connection(me, second["id"])
+    third = request_connection(c, me)["connection"]
+
+    changes, cursor = _sync(me, cursor)
+    assert [(ch["change"], ch["connection"]["id"]) for ch in changes] == [
+        ("upserted", first["id"]),
+        ("deleted", second["id"]),
+        ("upserted", third["id"]),
+    ]
+    assert changes[0]["connection"]["status"] == "ACCEPTED"
+    assert _sync(me, cursor) == ([], cursor)
+    assert get_connection_changes(b)["changes"][-1]["change"] == "deleted"
+
+
+def test_connection_change_feed_holds_back_recent_changes(app):
+    """Test changes younger than the settle window are not served yet."""
+    app.config["CONNECTION_FEED_SETTLE_SECONDS"] = 60
+    me, other = _make_profile("settleme"), _make_profile("settleother")
+    request_connection(other, me)
+
+    page = get_connection_changes(me)
+    assert page["changes"] == [] and page["next_cursor"] is None
+    assert get_connection_changes(me, cursor="garbage")["message"] == "Invalid cursor"
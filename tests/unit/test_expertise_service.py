@@ -0,0 +1,69 @@
+import pytest
+from uuid import uuid4
+from app.services.expertise_service import (
+    normalize_domain_slug,
+    add_domain_alias,
+    add_expertise_area,
+    update_expertise_area,
+)
+from app.services.profile_service import create_profile, search_profiles
+
+
+def _make_profile(username):
+    user_id = uuid4()
+    create_profile(user_id, {"username": username})
+    return user_id
+
+
+def test_normalize_domain_slug():
+    """Test slugs are case-folded and punctuation-insensitive."""
+    assert normalize_domain_slug("Machine  Learning") == "machine-learning"
+    assert normalize_domain_slug("MACHINE_LEARNING") == "machine-learning"
+    assert normalize_domain_slug(" --- ") == ""
+
+
+def test_add_expertise_area_normalizes_domain():
+    """Test differently-cased domains resolve to one canonical domain."""
+    first = _make_profile("domainuser1")
+    second = _make_profile("domainuser2")
+
+    a = add_expertise_area(first, {"domain": "Machine Learning", "level": "EXPERT"})
+    b = add_expertise_area(second, {"domain": "machine-learning", "level": "BEGINNER"})
+    assert a["success"] is True and b["success"] is True
+    assert a["expertise"]["domain_id"] == b["expertise"]["domain_id"]
+    assert b["expertise"]["domain"] == "Machine Learning"
+
+    duplicate = add_expertise_area(first, {"domain": "MACHINE LEARNING", "level": "EXPERT"})
+    assert duplicate["success"] is False
+
+
+def test_update_expertise_area_rejects_duplicate_domain():
+    """Test renaming an area onto a domain the user already has."""
+    user_id = _make_profile("domainuser3")
+    add_expertise_area(user_id, {"domain": "Python", "level": "EXPERT"})
+    other = add_expertise_area(user_id, {"domain": "Rust", "level": "BEGINNER"})
+
+    result = update_expertise_area(user_id, other["expertise"]["id"], {"domain": "python"})
+    assert result["success"] is False
+
+
+def test_search_by_expertise_exact_and_alias():
+    """Test expertise search matches canonical names and aliases without duplicates."""
+    user_id = _make_profile("aliasuser")
+    add_expertise_area(user_id, {"domain": "JavaScript", "level": "EXPERT"})
+    add_expertise_area(user_id, {"domain": "Java", "level": "EXPERT"})
+    assert add_domain_alias("JavaScript", "JS")["success"] is True
+
+    result = search_profiles(expertise="javascript")
+    assert [p["username"] for p in result["profiles"]] == ["aliasuser"]
+    assert result["pagination"]["total"] == 1
+
+    assert search_profiles(expertise="js")["pagination"]["total"] == 1
+    assert search_profiles(expertise="script")["pagination"]["total"] == 0
+
+
+def test_add_domain_alias_conflict():
+    """Test an alias cannot point at two domains."""
+    add_domain_alias("Go", "golang")
+    result = add_domain_alias("Python", "golang")
+    assert result["success"] is False
@@ -0,0 +1,56 @@
+import os
+import numpy as np
+from uuid import uuid4
+from app import db
+from app.models.connection import UserConnection
+from app.services.graph_snapshot import GraphSnapshot, get_graph_snapshot, write_graph_snapshot
+from app.services.profile_service import create_profile
+
+
+def _make_profile(username):
+    user_id = uuid4()
+    create_profile(user_id, {"username": username})
+    return str(user_id)
+
+
+def _connect(requester, recipient, status="ACCEPTED"):
+    db.session.add(UserConnection(requester_id=requester, recipient_id=recipient, status=status))
+    db.session.commit()
+
+
+def test_snapshot_round_trip(app, tmp_path):
+    """Test the CSR arrays reproduce the accepted graph."""
+    hub, a, b, loner = (_make_profile(f"snap{i}") for i in range(4))
+    _connect(hub, a)
+    _connect(b, hub)
+    _connect(a, b, status="PENDING")
+
+    path = write_graph_snapshot(str(tmp_path), batch_size=1)
+    snapshot = GraphSnapshot(path)
+
+    assert isinstance(snapshot.neighbors, np.memmap)
+    assert len(snapshot) == 3
+    assert list(snapshot.ids) == sorted(snapshot.ids)
+    assert sorted(snapshot.get_neighbors(hub)) == sorted([a, b])
+    assert snapshot.get_neighbors(a) == [hub]
+    assert snapshot.degree(hub) == 2
+    assert snapshot.are_connected(b, hub)
+    assert not snapshot.are_connected(a, b)
+    assert snapshot.get_neighbors(loner) == []
+
+
+def test_current_snapshot_follows_symlink(app, tmp_path):
+    """Test workers pick up a new snapshot and old ones are pruned."""
+    app.config["CONNECTION_GRAPH_SNAPSHOT_DIR"] = str(tmp_path)
+    assert get_graph_snapshot() is None
+
+    a, b = _make_profile("snapa"), _make_profile("snapb")
+    write_graph_snapshot(str(tmp_path))
+    assert len(get_graph_snapshot()) == 0
+
+    _connect(a, b)
+    write_graph_snapshot(str(tmp_path))
+    write_graph_snapshot(str(tmp_path), keep=2)
+
+    assert get_graph_snapshot().are_connected(a, b)
+    assert len([name for name in os.listdir(tmp_path) if name.startswith("snapshot-")]) == 2
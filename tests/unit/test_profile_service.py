@@ -66,4 +66,78 @@ def test_deactivate_profile(test_profile):
     
     # Verify profile is deactivated
     profile = get_profile_by_id(test_profile.id)
-    assert profile is None
\ No newline at end of file
+    assert profile is None
+
+def test_search_profiles_facets():
+    """Test facet counts computed alongside a search."""
+    from app.services.expertise_service import add_expertise_area
+
+    for i, (profession, company) in enumerate([
+        ("Engineer", "Acme"), ("Engineer", "Globex"), ("Designer", "Acme")
+    ]):
+        user_id = uuid4()
+        create_profile(user_id, {
+            "username": f"facetuser{i}",
+            "profession": profession,
+            "company": company,
+        })
+        add_expertise_area(user_id, {"domain": "Python", "level": "EXPERT"})
+
+    result = search_profiles(
+        query="facetuser",
+        facets=["profession", "company", "expertise_domain", "expertise_level"]
+    )
+    assert result["success"] is True
+    facets = result["facets"]
+    assert facets["profession"] == [
+        {"value": "Engineer", "count": 2},
+        {"value": "Designer", "count": 1},
+    ]
+    assert facets["company"][0] == {"value": "Acme", "count": 2}
+    assert facets["expertise_domain"] == [{"value": "Python", "count": 3}]
+    assert facets["expertise_level"] == [{"value": "EXPERT", "count": 3}]
+
+    limited = search_profiles(query="facetuser", facets=["company"], facet_limit=1)
+    assert limited["facets"]["company"] == [{"value": "Acme", "count": 2}]
+
+
+def test_search_profiles_invalid_facet():
+    """Test requesting an unknown facet."""
+    result = search_profiles(facets=["shoe_size"])
+    assert result["success"] is False
+
+
+def test_search_profiles_include_expertise_constant_queries(count_queries):
+    """Test embedding expertise costs the same number of queries for any page size."""
+    from app.services.expertise_service import add_expertise_area
+
+    def _seed(prefix, count):
+        for i in range(count):
+            user_id = uuid4()
+            create_profile(user_id, {"username": f"{prefix}{i}"})
+            add_expertise_area(user_id, {"domain": f"Domain {i}", "level": "EXPERT"})
+            add_expertise_area(user_id, {"domain": "Shared", "level": "BEGINNER"})
+
+    _seed("smallpage", 2)
+    _seed("largepage", 10)
+
+    with count_queries() as small:
+        small_result = search_profiles(query="smallpage", include_expertise=True)
+    with count_queries() as large:
+        large_result = search_profiles(query="largepage", include_expertise=True)
+
+    assert len(large_result["profiles"]) == 10
+    assert len(large) == len(small)
+    for profile in large_result["profiles"]:
+        assert len(profile["expertise_areas"]) == 2
+        assert {area["user_id"] for area in profile["expertise_areas"]} == {profile["id"]}
+
+
+def test_get_profile_by_id_include_expertise(test_profile):
+    """Test embedding expertise on a single profile."""
+    from app.services.expertise_service import add_expertise_area
+
+    add_expertise_area(test_profile.id, {"domain": "Testing", "level": "EXPERT"})
+    profile = get_profile_by_id(test_profile.id, include_expertise=True)
+    assert [area["domain"] for area in profile["expertise_areas"]] == ["Testing"]
+    assert "expertise_areas" not in get_profile_by_id(test_profile.id)
@@ -0,0 +1,79 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.config import TestingConfig
+from app.utils.rate_limit import LocalBudgets
+
+
+@pytest.fixture
+def limited_app(monkeypatch):
+    """Application with rate limiting on, in-memory storage and a 3/minute default."""
+    monkeypatch.setattr(TestingConfig, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(TestingConfig, "RATE_LIMIT_STORAGE_URL", "memory://")
+    monkeypatch.setattr(TestingConfig, "RATE_LIMIT_DEFAULT", "3/minute")
+    monkeypatch.setattr(TestingConfig, "RATE_LIMIT_LOCAL_SHARE", 0.0)
+    return create_app("testing")
+
+
+def _headers(app, identity):
+    with app.app_context():
+        return {"Authorization": f"Bearer {create_access_token(identity=identity)}"}
+
+
+def test_limits_are_keyed_by_identity(limited_app):
+    """Test each JWT identity has its own budget and anonymous callers share their IP's."""
+    client = limited_app.test_client()
+    alice, bob = _headers(limited_app, "alice"), _headers(limited_app, "bob")
+
+    for _ in range(3):
+        response = client.get("/docs", headers=alice)
+        assert response.status_code != 429
+    assert response.headers["X-RateLimit-Limit"] == "3"
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+
+    blocked = client.get("/docs", headers=alice)
+    assert blocked.status_code == 429
+    assert blocked.get_json()["success"] is False
+    assert "Retry-After" in blocked.headers
+
+    assert client.get("/docs", headers=bob).status_code != 429
+    assert client.get("/docs").status_code != 429
+
+
+def test_local_precheck_keeps_shared_limit(limited_app, monkeypatch):
+    """Test locally admitted requests get headers and are charged to the shared storage."""
+    monkeypatch.setattr(TestingConfig, "RATE_LIMIT_LOCAL_SHARE", 1.0)
+    app = create_app("testing")
+    client = app.test_client()
+    headers = _headers(app, "carol")
+
+    # 1 shared check, then the 2 hits it reported as left are admitted locally
+    remaining = [client.get("/docs", headers=headers).headers["X-RateLimit-Remaining"] for _ in range(3)]
+    assert remaining == ["2", "1", "0"]
+
+    # Charged before the next shared check, which therefore refuses the 4th
+    assert client.get("/docs", headers=headers).status_code == 429
+
+
+def test_local_budgets_grant_spend_and_charge():
+    """Test budgets spend their slice, then expire or run out and hand back pending hits."""
+    budgets = LocalBudgets(share=0.5, maxsize=2, flush_interval=10)
+
+    assert budgets.grant("a", "lim-a", amount=10, remaining=4, reset_at=60, now=0) == []
+    assert budgets.acquire("a", now=1) == ((10, 3, 60), [])
+    assert budgets.acquire("a", now=2) == ((10, 2, 60), [])
+    assert budgets.acquire("a", now=3) == (None, [("lim-a", 2)])
+    assert budgets.acquire("a", now=3) == (None, [])
+
+    budgets.grant("b", "lim-b", amount=10, remaining=10, reset_at=60, now=0)
+    assert budgets.acquire("b", now=11) == ((10, 9, 60), [("lim-b", 1)])  # flushed after the interval
+    budgets.acquire("b", now=12)
+    assert budgets.acquire("b", now=60) == (None, [("lim-b", 1)])  # window reset
+
+    assert budgets.grant("c", "lim-c", amount=10, remaining=1, reset_at=60, now=0) == []  # share < 1 hit
+    assert budgets.acquire("c", now=1) == (None, [])
+
+    budgets.grant("d", "lim-d", amount=10, remaining=10, reset_at=60, now=0)
+    budgets.acquire("d", now=1)
+    budgets.grant("e", "lim-e", amount=10, remaining=10, reset_at=60, now=0)
+    assert budgets.grant("f", "lim-f", amount=10, remaining=10, reset_at=60, now=0) == [("lim-d", 1)]
@@ -0,0 +1,82 @@
+import pytest
+from uuid import uuid4
+from app.services.expertise_service import add_expertise_area, delete_expertise_area
+from app.services.profile_service import (
+    create_profile,
+    update_profile,
+    deactivate_profile,
+    search_profiles
+)
+from app.services.search_index import SearchIndexNode
+
+
+@pytest.fixture
+def search_node(app):
+    """Route public searches through an in-memory index for the test."""
+    node = SearchIndexNode(app)
+    app.extensions['search_index'] = node
+    yield node
+    app.extensions.pop('search_index', None)
+
+
+def _usernames(result):
+    return sorted(p["username"] for p in result["profiles"])
+
+
+def test_bootstrap_matches_sql_path(app):
+    """Test the index returns the same results as the SQL search."""
+    for i, company in enumerate(["Acme Corp", "Globex", "acme labs"]):
+        user_id = uuid4()
+        create_profile(user_id, {"username": f"indexed{i}", "company": company})
+        add_expertise_area(user_id, {"domain": "Data Science", "level": "EXPERT"})
+    create_profile(uuid4(), {"username": "hiddenacme", "visibility": "PRIVATE"})
+
+    cases = [{"query": "acme"}, {"query": "ex"}, {"expertise": "data-science"},
+             {"query": "ACME", "expertise": "Data Science"}, {"query": "zzz"}]
+    expected = [search_profiles(**case) for case in cases]
+
+    app.extensions['search_index'] = SearchIndexNode(app)
+    try:
+        for case, sql_result in zip(cases, expected):
+            result = search_profiles(**case)
+            assert _usernames(result) == _usernames(sql_result), case
+            assert result["pagination"]["total"] == sql_result["pagination"]["total"]
+    finally:
+        app.extensions.pop('search_index', None)
+
+
+def test_index_follows_committed_changes(search_node):
+    """Test profile and expertise writes are reflected without a rebuild."""
+    search_profiles(query="anything")  # bootstrap the empty index
+
+    user_id = uuid4()
+    create_profile(user_id, {"username": "streamuser"})
+    assert _usernames(search_profiles(query="stream")) == ["streamuser"]
+
+    update_profile(user_id, {"profession": "Astronomer"})
+    assert _usernames(search_profiles(query="astro")) == ["streamuser"]
+
+    added = add_expertise_area(user_id, {"domain": "Optics", "level": "EXPERT"})
+    assert _usernames(search_profiles(expertise="optics")) == ["streamuser"]
+
+    delete_expertise_area(user_id, added["expertise"]["id"])
+    assert search_profiles(expertise="optics")["pagination"]["total"] == 0
+
+    update_profile(user_id, {"visibility": "PRIVATE"})
+    assert search_profiles(query="stream")["pagination"]["total"] == 0
+
+    update_profile(user_id, {"visibility": "PUBLIC"})
+    assert _usernames(search_profiles(query="stream")) == ["streamuser"]
+
+    deactivate_profile(user_id)
+    assert search_profiles(query="stream")["pagination"]["total"] == 0
+
+
+def test_index_pagination(search_node):
+    """Test limit and offset are applied to index results."""
+    for i in range(5):
+        create_profile(uuid4(), {"username": f"pageuser{i}"})
+
+    result = search_profiles(query="pageuser", limit=2, offset=2)
+    assert result["pagination"]["total"] == 5
+    assert len(result["profiles"]) == 2
@@ -0,0 +1,132 @@
+import pytest
+from uuid import uuid4
+from app import db
+from app.models.connection import UserConnection
+from app.models.suggestion import ConnectionSuggestion
+from app.services.connection_service import request_connection, update_connection_status
+from app.services.profile_service import create_profile
+from app.services.suggestion_service import (
+    STALE_KEY,
+    compute_all_suggestions,
+    get_suggestions,
+    refresh_stale_suggestions,
+    refresh_suggestions
+)
+
+
+def _make_profile(username):
+    user_id = uuid4()
+    create_profile(user_id, {"username": username})
+    return str(user_id)
+
+
+def _connect(requester, recipient, status="ACCEPTED"):
+    db.session.add(UserConnection(requester_id=requester, recipient_id=recipient, status=status))
+    db.session.commit()
+
+
+def _stored(user_id):
+    rows = ConnectionSuggestion.query.filter_by(user_id=user_id).all()
+    return {row.candidate_id: row.mutual_count for row in rows}
+
+
+@pytest.fixture
+def graph():
+    """me knows a and b; x is a mutual of both, y of a only, z has a pending request with me."""
+    users = {name: _make_profile(f"sugg{name}") for name in ("me", "a", "b", "x", "y", "z")}
+    _connect(users["me"], users["a"])
+    _connect(users["b"], users["me"])
+    _connect(users["a"], users["x"])
+    _connect(users["x"], users["b"])
+    _connect(users["a"], users["y"])
+    _connect(users["a"], users["z"])
+    _connect(users["z"], users["me"], status="PENDING")
+    return users
+
+
+def test_batch_ranks_by_mutual_connections(graph):
+    """Test the sparse batch job excludes self and existing counterparts."""
+    compute_all_suggestions(top_k=10, block_size=2)
+
+    assert _stored(graph["me"]) == {graph["x"]: 2, graph["y"]: 1}
+    assert _stored(graph["x"]) == {graph["me"]: 2, graph["y"]: 1, graph["z"]: 1}
+
+    result = get_suggestions(graph["me"])
+    assert [s["profile"]["id"] for s in result["suggestions"]] == [graph["x"], graph["y"]]
+    assert result["suggestions"][0]["mutual_count"] == 2
+
+
+def test_batch_keeps_top_k(graph):
+    """Test only the best candidates are stored."""
+    compute_all_suggestions(top_k=1)
+
+    assert _stored(graph["me"]) == {graph["x"]: 2}
+
+
+def test_single_user_refresh_matches_batch(graph):
+    """Test the incremental query agrees with the matrix product."""
+    compute_all_suggestions(top_k=10)
+    batch = {user_id: _stored(user_id) for user_id in graph.values()}
+
+    db.session.query(ConnectionSuggestion).delete()
+    db.session.commit()
+    for user_id in graph.values():
+        refresh_suggestions(user_id, top_k=10)
+
+    assert {user_id: _stored(user_id) for user_id in graph.values()} == batch
+
+
+def test_deleted_profiles_do_not_count_as_mutuals(graph):
+    """Test the incremental query ignores paths through deleted profiles, like the batch."""
+    from datetime import datetime
+    from app.models.profile import UserProfile
+
+    db.session.get(UserProfile, graph["a"]).deleted_at = datetime.utcnow()
+    db.session.commit()
+    compute_all_suggestions(top_k=10)
+    batch = _stored(graph["me"])
+
+    refresh_suggestions(graph["me"], top_k=10)
+
+    assert _stored(graph["me"]) == batch == {graph["x"]: 1}
+
+
+def test_accepting_connection_queues_refresh(graph, fake_redis):
+    """Test both sides of a new connection are refreshed off the request path."""
+    newcomer = _make_profile("suggnewcomer")
+    connection = request_connection(newcomer, graph["x"])["connection"]
+
+    update_connection_status(graph["x"], connection["id"], "ACCEPTED")
+
+    assert _stored(newcomer) == {}
+    assert fake_redis.smembers(STALE_KEY) == {newcomer, graph["x"]}
+    assert refresh_stale_suggestions(batch_size=1) == 2
+    assert _stored(newcomer) == {graph["a"]: 1, graph["b"]: 1}
+    assert fake_redis.scard(STALE_KEY) == 0
+
+
+def test_failed_refresh_requeues_rest_of_batch(graph, fake_redis, monkeypatch):
+    """Test a failure mid-batch puts back the failed user and every user after it."""
+    import app.services.suggestion_service as suggestion_service
+
+    done = []
+
+    def flaky_refresh(user_id):
+        if len(done) == 1:
+            raise RuntimeError("database unavailable")
+        done.append(user_id)
+
+    monkeypatch.setattr(suggestion_service, "refresh_suggestions", flaky_refresh)
+    fake_redis.sadd(STALE_KEY, graph["me"], graph["a"], graph["b"])
+
+    assert refresh_stale_suggestions(batch_size=3) == 1
+    assert fake_redis.smembers(STALE_KEY) == {graph["me"], graph["a"], graph["b"]} - set(done)
+
+
+def test_pending_request_hides_stored_suggestion(graph):
+    """Test candidates contacted after the last run are filtered on read."""
+    compute_all_suggestions()
+    request_connection(graph["me"], graph["x"])
+
+    ids = [s["profile"]["id"] for s in get_suggestions(graph["me"])["suggestions"]]
+    assert ids == [graph["y"]]